@@ -1,7 +1,7 @@
 from fastapi import APIRouter
 
 # 1. endpoints 폴더에 있는 각 기능별 라우터 파일을 불러옵니다.
-from .endpoints import senior, family, auth
+from .endpoints import senior, family, auth, jobs, usage
 
 # 2. v1 API 전체를 대표할 새로운 APIRouter 객체를 생성합니다.
 api_router = APIRouter()
@@ -10,4 +10,6 @@ api_router = APIRouter()
 # 🔧 senior는 prefix 없이, family만 prefix 사용
 api_router.include_router(senior.router, tags=["Senior"])  # prefix 제거
 api_router.include_router(family.router, prefix="/family", tags=["Family"])
-api_router.include_router(auth.router, prefix="/auth", tags=["Authentication"])
\ No newline at end of file
+api_router.include_router(auth.router, prefix="/auth", tags=["Authentication"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["Jobs"])
+api_router.include_router(usage.router, prefix="/usage", tags=["Usage"])
@@ -1,18 +1,23 @@
+import asyncio
+import logging
 import os
-from fastapi import APIRouter, Depends, File, UploadFile, Form, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, File, UploadFile, Form, Header, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import text
 from pydantic import BaseModel
 from typing import List
-from datetime import datetime
+from datetime import date, datetime, timedelta
 
-from app.db.database import get_db
-from app.services import report_service
+from app.core import serialization
+from app.core.config import settings
+from app.db.database import SessionLocal, get_db
+from app.services import album_export_service, family_events, family_search, media_store, photo_view_service, report_facts, report_service, upload_sessions
 from app.services.photo_service import PhotoService
 from app.services.comment_service import CommentService
 from app.db.models import FamilyPhoto, User, PhotoComment, Post
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 # Pydantic 스키마 정의
@@ -46,6 +51,20 @@ class PostCreate(BaseModel):
     location: str = ""
     audio_message: str = ""
 
+class UploadSessionCreate(BaseModel):
+    user_id_str: str
+    uploaded_by: str
+    file_name: str
+    total_size: int
+    chunk_size: int | None = None
+    description: str = ""
+    mentions: str = ""
+    location: str = ""
+    audio_message: str = ""
+
+class SeniorProfileUpdate(BaseModel):
+    display_name: str
+
 class PhotoMetadataSchema(BaseModel):
     id: int
     description: str
@@ -59,16 +78,84 @@ class PhotoMetadataSchema(BaseModel):
     class Config:
         from_attributes = True
 
-# 여기에 실제 서버 IP나 도메인 사용
-# BASE_URL = "http://192.168.0.5:8000"  # 또는 localhost가 아닌 실제 접속 주소
-# BASE_URL = "http://192.168.0.5"  # 또는 localhost가 아닌 실제 접속 주소
-BASE_URL = "http://192.168.101.48:8889"  # 또는 localhost가 아닌 실제 접속 주소
+# 사진 URL 의 서버 주소는 settings.PUBLIC_BASE_URL 로 설정합니다. (photo_view_service.public_url)
+
+def _photo_view_response(db: Session, view: str, photo_id: int, if_none_match: str | None, not_found_detail: str) -> Response:
+    """캐시된(미리 직렬화된) 사진 응답을 ETag 와 함께 반환합니다. 클라이언트 ETag 가 같으면 304."""
+    entry = photo_view_service.get_photo_view(db, view, photo_id, serialization.current_format())
+    if entry is None:
+        raise HTTPException(status_code=404, detail=not_found_detail)
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if photo_view_service.etag_matches(if_none_match, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type=entry.media_type, headers=headers)
 
 @router.get("/reports/{senior_user_id}")
 def get_senior_report_api(senior_user_id: str, db: Session = Depends(get_db)):
     report_data = report_service.get_report_by_user_id(db, senior_user_id)
     return report_data
 
+@router.put("/seniors/{senior_user_id}/profile")
+def update_senior_profile(senior_user_id: str, profile: SeniorProfileUpdate, db: Session = Depends(get_db)):
+    """홈 화면에 보이는 어르신 이름을 바꿉니다. (빈 문자열이면 기본값 "어르신")"""
+    user = db.query(User).filter(User.user_id_str == senior_user_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+    user.display_name = profile.display_name.strip()[:100] or None
+    db.commit()
+    return {"status": "success", "display_name": user.display_name}
+
+@router.get("/reports/{senior_user_id}/trends")
+def get_senior_report_trends_api(
+    senior_user_id: str,
+    days: int = Query(30, ge=1, le=366, description="오늘부터 거슬러 올라갈 기간(일). 예: 30, 90"),
+    granularity: str = Query("week", pattern="^(day|week|month)$", description="day | week | month"),
+    db: Session = Depends(get_db),
+):
+    """감정/건강 언급/요청 물품 추이. 리포트 저장 시 미리 뽑아 둔 facts 와 주/월 합계만 읽습니다."""
+    user = db.query(User).filter(User.user_id_str == senior_user_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+    end = date.today()
+    start = end - timedelta(days=days - 1)
+    return {
+        "user_id": senior_user_id,
+        "granularity": granularity,
+        "from": str(start),
+        "to": str(end),
+        "points": report_facts.get_trends(db, user.id, start, end, granularity),
+    }
+
+@router.get("/search/{senior_user_id}")
+def search_senior_history(
+    senior_user_id: str,
+    q: str = Query(..., min_length=1, max_length=100, description="검색어. 예: 병원"),
+    type: str | None = Query(None, pattern="^(conversation|report)$", description="conversation | report (생략 시 둘 다)"),
+    limit: int = Query(family_search.DEFAULT_LIMIT, ge=1, le=family_search.MAX_LIMIT),
+    cursor: str | None = Query(None, description="이전 응답의 next_cursor"),
+    db: Session = Depends(get_db),
+):
+    """어르신 대화/리포트 검색 (최근 것부터). 결과의 highlights 는 snippet 안의 [시작, 끝) 글자 위치입니다."""
+    user = db.query(User).filter(User.user_id_str == senior_user_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+    return family_search.search(db, user.id, q, doc_type=type, limit=limit, cursor=cursor)
+
+def _write_upload(contents: bytes, file_ext: str) -> tuple[str, str]:
+    upload_path, unique_filename_base = PhotoService.generate_file_path()
+    unique_filename = f"{unique_filename_base}{file_ext}"
+    file_path = os.path.join(upload_path, unique_filename)
+    with open(file_path, "wb") as f:
+        f.write(contents)
+    return file_path, unique_filename
+
+def _remove_files(paths: list[str]):
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
 @router.post("/family-yard/upload")
 async def upload_photos(
     files: list[UploadFile] = File(...),
@@ -78,26 +165,33 @@ async def upload_photos(
     mentions: str = Form(""),
     location: str = Form(""),
     audio_message: str = Form(""),
+    audio: UploadFile | None = File(None, description="음성 메시지 파일 (게시글 전체에 하나)"),
     db: Session = Depends(get_db)
 ):
+    written_paths = []
     try:
-        print(f"📸 여러 장 업로드 요청: {len(files)}장")
+        logger.info("사진 업로드 요청", extra={"user_id": user_id_str, "count": len(files)})
         user = db.query(User).filter(User.user_id_str == user_id_str).first()
         if not user:
             raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
 
+        # 음성은 파일로 저장하고 게시글에는 경로만 둡니다. (audio_message 에 base64 로 온 음성도 파일로 옮김)
+        audio_message, audio_path = await asyncio.to_thread(media_store.extract_inline_audio, audio_message)
+        if audio is not None and audio.filename:
+            media_store.remove(audio_path)
+            audio_path = await asyncio.to_thread(media_store.save_audio_stream, audio.file, audio.filename)
+        if audio_path:
+            written_paths.append(audio_path)
+
         saved_photos = []
         created_posts = []
 
         for file in files:
             contents = await file.read()
-            upload_path, unique_filename_base = PhotoService.generate_file_path()
             file_ext = os.path.splitext(file.filename)[1].lower()
-            unique_filename = f"{unique_filename_base}{file_ext}"
-            file_path = os.path.join(upload_path, unique_filename)
-
-            with open(file_path, "wb") as f:
-                f.write(contents)
+            # 디렉터리 생성/파일 쓰기는 이벤트 루프를 막지 않도록 스레드에서 실행합니다.
+            file_path, unique_filename = await asyncio.to_thread(_write_upload, contents, file_ext)
+            written_paths.append(file_path)
 
             photo = PhotoService.save_photo_metadata(
                 db=db,
@@ -106,7 +200,8 @@ async def upload_photos(
                 original_name=file.filename,
                 file_path=file_path,
                 file_size=len(contents),
-                uploaded_by=uploaded_by
+                uploaded_by=uploaded_by,
+                commit=False,
             )
             saved_photos.append(photo)
 
@@ -117,18 +212,18 @@ async def upload_photos(
                 mentions=mentions,
                 location=location,
                 audio_message=audio_message,
+                audio_path=audio_path,
             )
             db.add(new_post)
             created_posts.append(new_post)
 
-        # for문 끝난 후 한 번만 커밋/refresh/디버깅
-        print("Post 생성: photo_id=", [p.photo_id for p in created_posts], "user_id=", [p.user_id for p in created_posts])
-        print("커밋 직전 saved_photos:", [p.id for p in saved_photos])
-        print("커밋 직전 created_posts:", [p.id for p in created_posts])
+        # for문 끝난 후 한 번만 커밋/refresh
         db.commit()
         for post in created_posts:
             db.refresh(post)
-        print("커밋 후 post_ids:", [p.id for p in created_posts])
+            photo_view_service.invalidate(post.photo_id)
+        family_events.publish(user.id, family_events.EVENT_PHOTOS_ADDED, photo_ids=[p.id for p in saved_photos])
+        logger.info("사진 업로드 완료", extra={"photo_ids": [p.id for p in saved_photos], "post_ids": [p.id for p in created_posts]})
 
         return {
             "status": "success",
@@ -137,11 +232,59 @@ async def upload_photos(
             "post_ids": [p.id for p in created_posts]
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"❌ 다중 업로드 실패: {str(e)}")
+        logger.exception("다중 업로드 실패")
         db.rollback()
+        # 사진/게시글은 한 번에 커밋하므로, 실패하면 이미 쓴 파일도 지웁니다.
+        await asyncio.to_thread(_remove_files, written_paths)
         raise HTTPException(status_code=500, detail=f"업로드 실패: {str(e)}")
 
+# --- 이어받기 업로드 (큰 파일/불안정한 모바일 연결용, app/services/upload_sessions.py) ---
+
+@router.post("/family-yard/uploads")
+def create_upload_session(data: UploadSessionCreate, db: Session = Depends(get_db)):
+    """업로드 세션을 만들고 조각 크기/개수를 돌려줍니다. 파일 하나당 세션 하나입니다."""
+    user = db.query(User).filter(User.user_id_str == data.user_id_str).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+    upload = upload_sessions.create_session(
+        db,
+        user,
+        uploaded_by=data.uploaded_by,
+        file_name=data.file_name,
+        total_size=data.total_size,
+        chunk_size=data.chunk_size,
+        description=data.description,
+        mentions=data.mentions,
+        location=data.location,
+        audio_message=data.audio_message,
+    )
+    return upload_sessions.get_status(db, upload)
+
+@router.put("/family-yard/uploads/{upload_id}/chunks/{chunk_index}")
+async def put_upload_chunk(
+    upload_id: str,
+    chunk_index: int,
+    request: Request,
+    offset: int | None = Query(None, description="조각의 파일 내 위치 (chunk_index * chunk_size 와 같아야 함)"),
+    db: Session = Depends(get_db),
+):
+    """요청 본문(원본 바이트)을 조각으로 받습니다. 같은 조각을 다시 보내도 됩니다."""
+    data = await request.body()
+    return await asyncio.to_thread(upload_sessions.write_chunk, db, upload_id, chunk_index, data, offset)
+
+@router.get("/family-yard/uploads/{upload_id}")
+def get_upload_session(upload_id: str, db: Session = Depends(get_db)):
+    """받은 조각/빠진 조각. 연결이 끊겼다가 이어받을 때 빠진 조각만 다시 보냅니다."""
+    return upload_sessions.get_status(db, upload_sessions.get_session(db, upload_id))
+
+@router.post("/family-yard/uploads/{upload_id}/complete")
+def complete_upload_session(upload_id: str, db: Session = Depends(get_db)):
+    """모든 조각을 받았으면 사진/게시글을 만듭니다. (다시 호출해도 같은 photo_id/post_id)"""
+    return upload_sessions.complete(db, upload_id)
+
 @router.get("/family-yard/photos")
 def get_family_photos(
     user_id_str: str,
@@ -149,23 +292,114 @@ def get_family_photos(
     db: Session = Depends(get_db)
 ):
     try:
-        print(f"📷 사진 목록 조회 요청: user={user_id_str}")
         user = db.query(User).filter(User.user_id_str == user_id_str).first()
         if not user:
-            print(f"❌ 사용자를 찾을 수 없음: {user_id_str}")
+            logger.warning("사용자를 찾을 수 없음", extra={"user_id": user_id_str})
             raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
         photos = PhotoService.get_photos_by_user(db, user, limit)
         photos_by_date = PhotoService.group_photos_by_date(photos)
-        print(f"✅ 사진 목록 조회 완료: {len(photos)}개")
-        return {
+        logger.debug("사진 목록 조회 완료", extra={"user_id": user_id_str, "count": len(photos)})
+        # 목록이 커질 수 있으므로 jsonable_encoder 를 거치지 않고 바로 직렬화합니다.
+        return serialization.NegotiatedResponse({
             "status": "success",
             "photos_by_date": photos_by_date,
             "total_count": len(photos)
-        }
+        })
+    except HTTPException as e:
+        raise e
     except Exception as e:
-        print(f"❌ 사진 조회 실패: {str(e)}")
+        logger.exception("사진 조회 실패")
         raise HTTPException(status_code=500, detail=f"조회 실패: {str(e)}")
 
+def _find_family_id(user_id_str: str) -> int | None:
+    # 스트림이 열려 있는 동안 DB 연결을 잡고 있지 않도록 조회 후 바로 세션을 닫습니다.
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.user_id_str == user_id_str).first()
+        return user.id if user else None
+    finally:
+        db.close()
+
+def _sse_message(event_type: str, data: dict, event_id: int | None = None) -> bytes:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event_type}\ndata: ".encode() + serialization.dumps_json({"type": event_type, **data}) + b"\n\n"
+
+@router.get("/family-yard/events")
+async def stream_family_events(request: Request, user_id_str: str):
+    """가족 피드 변경 알림 (Server-Sent Events). 폴링 대신 이 스트림을 구독하고 이벤트가 오면 해당 항목만 다시 조회합니다.
+    이벤트: photos_added{photo_ids}, comments_changed{photo_id}, report_updated{report_date}, resync"""
+    family_id = await asyncio.to_thread(_find_family_id, user_id_str)
+    if family_id is None:
+        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+
+    async def event_stream():
+        subscription = family_events.hub.subscribe(family_id)
+        try:
+            yield b"retry: 3000\n\n" + _sse_message("ready", {})
+            while True:
+                batch = await subscription.next_batch(settings.FAMILY_EVENTS_HEARTBEAT_SECONDS)
+                if await request.is_disconnected():
+                    break
+                if not batch:
+                    # 프록시(nginx) 유휴 타임아웃 방지용 주석 라인
+                    yield b": ping\n\n"
+                    continue
+                for event_type, data in batch:
+                    family_events.EVENTS.inc(type=event_type, result="delivered")
+                    yield _sse_message(event_type, data, family_events.hub.next_event_id())
+        finally:
+            family_events.hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/family-yard/album.zip")
+def download_album(
+    user_id_str: str,
+    start: date | None = None,
+    end: date | None = None,
+    range_header: str | None = Header(None, alias="Range"),
+    if_range: str | None = Header(None),
+    db: Session = Depends(get_db)
+):
+    """기간(start~end, 생략 가능) 안의 사진을 ZIP 으로 스트리밍합니다. Range 요청으로 이어받기를 지원합니다."""
+    user = db.query(User).filter(User.user_id_str == user_id_str).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없습니다")
+    try:
+        archive = album_export_service.build_album(db, user, start, end)
+    except album_export_service.ArchiveTooLarge:
+        raise HTTPException(status_code=413, detail="앨범이 너무 큽니다. 기간을 나눠서 받아주세요.")
+    # ZIP 배치 계산이 끝났으므로 스트리밍 중에는 DB 연결을 잡고 있지 않습니다.
+    db.close()
+
+    period = f"{start or 'all'}_{end or 'all'}"
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": archive.etag,
+        "Content-Disposition": f'attachment; filename="tripot_album_{period}.zip"',
+    }
+    # If-Range 가 현재 앨범과 다르면 (사진이 바뀜) 처음부터 전체를 보냅니다.
+    if if_range and if_range != archive.etag:
+        range_header = None
+    try:
+        byte_range = album_export_service.parse_range(range_header, archive.total_size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{archive.total_size}"})
+
+    logger.info("앨범 내보내기", extra={"user_id": user_id_str, "count": len(archive.entries), "bytes": archive.total_size, "range": range_header})
+    if byte_range is None:
+        headers["Content-Length"] = str(archive.total_size)
+        return StreamingResponse(archive.iter_bytes(), media_type="application/zip", headers=headers)
+
+    first, last = byte_range
+    headers["Content-Length"] = str(last - first + 1)
+    headers["Content-Range"] = f"bytes {first}-{last}/{archive.total_size}"
+    return StreamingResponse(archive.iter_bytes(first, last), status_code=206, media_type="application/zip", headers=headers)
+
 @router.get("/family-yard/photo/{photo_id}")
 def get_photo_file(photo_id: int, db: Session = Depends(get_db)):
     try:
@@ -177,92 +411,58 @@ def get_photo_file(photo_id: int, db: Session = Depends(get_db)):
             media_type = "image/png"
         return FileResponse(photo.file_path, media_type=media_type)
     except Exception as e:
-        print(f"❌ 사진 파일 조회 실패: {str(e)}")
+        logger.error("사진 파일 조회 실패", extra={"photo_id": photo_id, "error": str(e)})
         raise HTTPException(status_code=500, detail=f"사진 파일 조회 실패: {str(e)}")
-@router.get("/family-yard/photo/{photo_id}/meta")
-def get_photo_meta(photo_id: int, db: Session = Depends(get_db)):
+@router.get("/family-yard/photo/{photo_id}/audio")
+def get_photo_audio(photo_id: int, db: Session = Depends(get_db)):
+    """게시글 음성 파일. Range/If-Range 요청을 지원해 재생하는 만큼만 받을 수 있습니다."""
+    audio_path = media_store.get_audio_path(db, photo_id)
+    # 파일을 보내는 동안 DB 연결을 잡고 있지 않습니다.
+    db.close()
+    if not audio_path or not os.path.exists(audio_path):
+        raise HTTPException(status_code=404, detail="음성 메시지를 찾을 수 없습니다")
+    return FileResponse(audio_path, media_type=media_store.media_type_for(audio_path), headers={"Cache-Control": "private, max-age=86400"})
+
+@router.put("/family-yard/photo/{photo_id}/audio")
+async def put_photo_audio(photo_id: int, audio: UploadFile = File(...), db: Session = Depends(get_db)):
+    """이미 올린 사진의 게시글에 음성 메시지를 붙이거나 바꿉니다."""
+    post = db.query(Post).filter(Post.photo_id == photo_id).order_by(Post.id.desc()).first()
+    if not post:
+        raise HTTPException(status_code=404, detail="게시글을 찾을 수 없습니다")
+    audio_path = await asyncio.to_thread(media_store.save_audio_stream, audio.file, audio.filename)
+    previous = post.audio_path
+    post.audio_path = audio_path
     try:
-        photo_with_post = db.execute(text("""
-            SELECT
-                fp.id AS id,
-                fp.user_id AS user_id,
-                fp.file_path AS file_path,
-                fp.created_at AS created_at,
-                fp.uploaded_by AS uploaded_by,
-                p.description AS description,
-                p.mentions AS mentions,
-                p.location AS location,
-                p.audio_message AS audio_message
-            FROM family_photos fp
-            LEFT JOIN posts p ON fp.id = p.photo_id
-            WHERE fp.id = :photo_id
-        """), {"photo_id": photo_id}).fetchone()
-
-        if not photo_with_post:
-            raise HTTPException(status_code=404, detail="사진 없음")
-
-        # API URL prefix 예시
-        # BASE_URL = "http://your-server-url.com"  # 실제 도메인 또는 IP로 수정
-
-        return {
-            "id": photo_with_post.id,
-            "user_id": photo_with_post.user_id,
-            "file_url": f"{BASE_URL}/{photo_with_post.file_path}",
-            "created_at": photo_with_post.created_at,
-            "uploaded_by": photo_with_post.uploaded_by,
-            "description": photo_with_post.description or "",
-            "mentions": photo_with_post.mentions or "",
-            "location": photo_with_post.location or "",
-            "audio_message": photo_with_post.audio_message or ""
-        }
+        db.commit()
+    except Exception:
+        db.rollback()
+        await asyncio.to_thread(media_store.remove, audio_path)
+        raise
+    # 여러 장을 한 번에 올린 게시글은 같은 음성 파일을 함께 쓰므로, 다른 게시글이 쓰지 않을 때만 지웁니다.
+    if previous and not db.query(Post.id).filter(Post.audio_path == previous).first():
+        await asyncio.to_thread(media_store.remove, previous)
+    photo_view_service.invalidate(photo_id)
+    logger.info("게시글 음성 저장", extra={"photo_id": photo_id, "post_id": post.id})
+    return {"status": "success", "photo_id": photo_id, "audio_url": media_store.audio_url(photo_id)}
 
+@router.get("/family-yard/photo/{photo_id}/meta")
+def get_photo_meta(photo_id: int, if_none_match: str | None = Header(None), db: Session = Depends(get_db)):
+    try:
+        return _photo_view_response(db, photo_view_service.VIEW_META, photo_id, if_none_match, "사진 없음")
+    except HTTPException as e:
+        raise e
     except Exception as e:
-        print(f"❌ 사진 메타데이터 조회 실패: {str(e)}")
+        logger.error("사진 메타데이터 조회 실패", extra={"photo_id": photo_id, "error": str(e)})
         raise HTTPException(status_code=500, detail="사진 정보 조회 실패")
     
 @router.get("/family-yard/photo/{photo_id}/detail")
-def get_photo_detail(photo_id: int, db: Session = Depends(get_db)):
+def get_photo_detail(photo_id: int, if_none_match: str | None = Header(None), db: Session = Depends(get_db)):
     try:
-        print(f"🔍 사진 상세 정보 요청: photo_id={photo_id}")
-        query = text("""
-            SELECT
-              fp.id AS id,
-              fp.user_id AS user_id,
-              fp.file_path AS file_path,
-              fp.created_at AS created_at,
-              fp.uploaded_by AS uploaded_by,
-              p.description AS description,
-              p.mentions AS mentions,
-              p.location AS location,
-              p.audio_message AS audio_message
-            FROM family_photos fp
-            LEFT JOIN posts p ON fp.id = p.photo_id
-            WHERE fp.id = :photo_id
-        """)
-        result = db.execute(query, {"photo_id": photo_id}).fetchone()
-        print(f"✅ 사진 상세 정보 조회 완료: {result}")
-        if not result:
-            raise HTTPException(status_code=404, detail="사진을 찾을 수 없습니다.")
-
-
-        # file_url = f"{BASE_URL}/{result.file_path}" if result.file_path else None
-        relative_url = result.file_path.split("uploads")[-1]  # → /family_photos/...
-        file_url = f"{BASE_URL}/uploads{relative_url}"
-        print(f"✅ file_url: {file_url}")
-
-        return {
-            "id": result.id,
-            "user_id": result.user_id,
-            "file_url": file_url,
-            "created_at": result.created_at,
-            "uploaded_by": result.uploaded_by,
-            "description": result.description,
-            "mentions": result.mentions,
-            "location": result.location,
-            "audio_message": result.audio_message,
-        }
+        return _photo_view_response(db, photo_view_service.VIEW_DETAIL, photo_id, if_none_match, "사진을 찾을 수 없습니다.")
+    except HTTPException as e:
+        raise e
     except Exception as e:
-        print(f"❌ 사진 상세 조회 실패: {str(e)}")
+        logger.error("사진 상세 조회 실패", extra={"photo_id": photo_id, "error": str(e)})
         raise HTTPException(status_code=500, detail=f"사진 상세 조회 실패: {str(e)}")
 
 @router.post("/family-yard/comment", response_model=CommentResponse)
@@ -271,8 +471,6 @@ def create_comment_for_photo(
     db: Session = Depends(get_db)
 ):
     try:
-        print(f"💬 댓글 생성 요청: photo_id={comment_data.photo_id}, user={comment_data.user_id_str}")
-        
         # user_id_str로 실제 user_id 찾기
         user = db.query(User).filter(User.user_id_str == comment_data.user_id_str).first()
         if not user:
@@ -289,7 +487,7 @@ def create_comment_for_photo(
     except HTTPException as e:
         raise e
     except Exception as e:
-        print(f"❌ 댓글 생성 실패: {str(e)}")
+        logger.exception("댓글 생성 실패")
         raise HTTPException(status_code=500, detail=f"댓글 생성 실패: {str(e)}")
 
 @router.get("/family-yard/photo/{photo_id}/comments", response_model=List[CommentResponse])
@@ -298,34 +496,17 @@ def get_comments_for_photo(
     db: Session = Depends(get_db)
 ):
     try:
-        print(f"🔍 댓글 목록 조회 요청: photo_id={photo_id}")
         comments = CommentService.get_comments_by_photo_id(db, photo_id)
         return comments
     except HTTPException as e:
         raise e
     except Exception as e:
-        print(f"❌ 댓글 조회 실패: {str(e)}")
+        logger.exception("댓글 조회 실패")
         raise HTTPException(status_code=500, detail=f"댓글 조회 실패: {str(e)}")
     
 @router.get("/photo/{photo_id}/meta", response_model=PhotoMetadataSchema)
-def get_photo_metadata(photo_id: int, db: Session = Depends(get_db)):
-    photo = db.query(Photo).filter(Photo.id == photo_id).first()
-    if not photo:
-        raise HTTPException(status_code=404, detail="Photo not found")
-
-    return {
-        "id": photo.id,
-        "description": photo.description,
-        "mentions": photo.mentions,
-        "location": photo.location,
-        "uploaded_by": photo.uploaded_by,
-        "created_at": photo.created_at,
-        "file_url": f"/uploads/{photo.filename}",
-        "comments": [
-            {"id": c.id, "comment": c.comment, "created_at": c.created_at}
-            for c in photo.comments
-        ]
-    }
+def get_photo_metadata(photo_id: int, if_none_match: str | None = Header(None), db: Session = Depends(get_db)):
+    return _photo_view_response(db, photo_view_service.VIEW_METADATA, photo_id, if_none_match, "Photo not found")
 
 @router.put("/family-yard/comment/{comment_id}", response_model=CommentResponse)
 def update_comment(
@@ -334,7 +515,6 @@ def update_comment(
     db: Session = Depends(get_db)
 ):
     try:
-        print(f"✏️ 댓글 수정 요청: comment_id={comment_id}, user={comment_data.user_id_str}")
         updated_comment = CommentService.update_comment(
             db=db,
             comment_id=comment_id,
@@ -345,7 +525,7 @@ def update_comment(
     except HTTPException as e:
         raise e
     except Exception as e:
-        print(f"❌ 댓글 수정 실패: {str(e)}")
+        logger.exception("댓글 수정 실패")
         raise HTTPException(status_code=500, detail=f"댓글 수정 실패: {str(e)}")
 
 @router.delete("/family-yard/comment/{comment_id}")
@@ -355,7 +535,6 @@ def delete_comment(
     db: Session = Depends(get_db)
 ):
     try:
-        print(f"🗑️ 댓글 삭제 요청: comment_id={comment_id}, user={comment_data.user_id_str}")
         CommentService.delete_comment(
             db=db,
             comment_id=comment_id,
@@ -365,5 +544,5 @@ def delete_comment(
     except HTTPException as e:
         raise e
     except Exception as e:
-        print(f"❌ 댓글 삭제 실패: {str(e)}")
+        logger.exception("댓글 삭제 실패")
         raise HTTPException(status_code=500, detail=f"댓글 삭제 실패: {str(e)}")
\ No newline at end of file
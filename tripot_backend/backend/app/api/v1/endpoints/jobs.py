@@ -0,0 +1,25 @@
+from fastapi import APIRouter, HTTPException, Query
+
+from app.services import job_runner
+
+# 백그라운드 작업 상태 조회 (운영/디버깅용)
+router = APIRouter()
+
+
+@router.get("")
+def list_jobs(
+    status: str | None = Query(None, description="queued | running | succeeded | failed"),
+    queue: str | None = Query(None),
+    name: str | None = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+):
+    """최근 작업 목록 (id 내림차순)"""
+    return {"jobs": job_runner.list_jobs(status=status, queue=queue, name=name, limit=limit)}
+
+
+@router.get("/{job_id}")
+def get_job(job_id: int):
+    job = job_runner.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    return job
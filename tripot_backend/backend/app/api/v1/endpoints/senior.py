@@ -1,129 +1,217 @@
-import json
 import asyncio
-import os
+import logging
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 from sqlalchemy.orm import Session
 
 # DB 세션을 직접 생성하기 위해 SessionLocal을 가져옵니다.
-from app.services import ai_service, vector_db, conversation_service
+from app.services import ai_service, job_runner, conversation_service, filler_service, report_scheduler
 from app.db.database import SessionLocal
+from app.core import metrics, serialization
+from app.core.config import settings
 
-print("🔥🔥🔥 SENIOR.PY 파일이 로드되었습니다! 🔥🔥🔥")
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+ACTIVE_SESSIONS = metrics.gauge("tripot_senior_active_sessions", "현재 연결된 어르신 WebSocket 세션 수")
+AUDIO_FRAME_BYTES = metrics.histogram(
+    "tripot_senior_audio_frame_bytes", "수신한 음성 프레임 크기(바이트, 텍스트 프레임은 base64 길이)",
+    ("frame",),
+    buckets=(16_000, 64_000, 256_000, 1_000_000, 4_000_000),
+)
+TURNS_SUPERSEDED = metrics.counter(
+    "tripot_senior_turns_superseded_total", "응답 전에 새 발화가 도착해 취소한 대화 턴 수"
+)
+
+class TurnSlot:
+    """세션당 처리 중인 대화 턴. 응답을 보내기 전에 새 발화가 오면 이전 턴을 취소합니다. (최신 발화 우선)
+    이미 응답을 보내기 시작한 턴은 대화 기록 저장까지 마치도록 둡니다."""
+    def __init__(self):
+        self.current: asyncio.Task | None = None
+        self.tasks: set[asyncio.Task] = set()
+        self.delivering: set[asyncio.Task] = set()
+
+    def start(self, coro) -> bool:
+        """새 턴을 시작하고, 이전 턴을 취소했으면 True 를 반환합니다."""
+        superseded = self.cancel_pending()
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self._on_done)
+        self.current = task
+        return superseded
+
+    def mark_delivering(self):
+        """현재 태스크의 턴이 응답 전송 단계에 들어갔음을 표시합니다. (이후로는 취소하지 않음)"""
+        self.delivering.add(asyncio.current_task())
+
+    def cancel_pending(self) -> bool:
+        task = self.current
+        if task is not None and not task.done() and task not in self.delivering:
+            task.cancel()
+            return True
+        return False
+
+    async def drain(self):
+        """연결 종료 시: 응답 전인 턴은 취소하고, 전송 중인 턴은 끝날 때까지 기다립니다."""
+        self.cancel_pending()
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    def _on_done(self, task: asyncio.Task):
+        self.tasks.discard(task)
+        self.delivering.discard(task)
+
 class ConnectionManager:
     def __init__(self):
         self.active_connections: dict[str, WebSocket] = {}
-    async def connect(self, websocket: WebSocket, user_id: str):
+        # 연결별 송신 프레임 형식 (json: 텍스트 프레임, msgpack: 바이너리 프레임)
+        self.encodings: dict[str, str] = {}
+    async def connect(self, websocket: WebSocket, user_id: str, encoding: str = serialization.FORMAT_JSON):
         await websocket.accept()
         self.active_connections[user_id] = websocket
+        self.encodings[user_id] = encoding
     def disconnect(self, user_id: str):
         if user_id in self.active_connections:
             del self.active_connections[user_id]
+        self.encodings.pop(user_id, None)
     async def send_json(self, data: dict, user_id: str):
         if user_id in self.active_connections:
             websocket = self.active_connections[user_id]
-            await websocket.send_text(json.dumps(data, ensure_ascii=False))
+            if self.encodings.get(user_id) == serialization.FORMAT_MSGPACK:
+                await websocket.send_bytes(serialization.dumps_msgpack(data))
+            else:
+                await websocket.send_text(serialization.dumps_json(data).decode("utf-8"))
 
 manager = ConnectionManager()
 session_conversations = {}
 
 def _load_start_question():
-    """프롬프트 파일을 로드하여 시작 질문을 반환합니다."""
-    possible_paths = [
-        # Docker 컨테이너 내부의 정확한 경로들
-        '/backend/prompts/talk_prompts.json',  # 올바른 파일명
-        './prompts/talk_prompts.json',
-        # 상대 경로
-        os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', '..', 'prompts', 'talk_prompts.json'),
-        # 혹시 모를 경우를 위한 백업 경로
-        '/backend/prompts/talk_prompt.json',
-    ]
-
-    for path in possible_paths:
-        try:
-            print(f"🔍 프롬프트 파일 시도: {path}")
-            with open(path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                start_question = data.get('main_chat_prompt', {}).get('start_question', "안녕하세요!")
-                print(f"✅ 프롬프트 파일 로드 성공: {path}")
-                print(f"✅ 시작 질문: {start_question}")
-                return start_question
-        except FileNotFoundError:
-            print(f"❌ 파일 없음: {path}")
-            continue
-        except Exception as e:
-            print(f"❌ 파일 로드 실패 ({path}): {str(e)}")
-            continue
-
-    print("❌ 모든 경로에서 프롬프트 파일 로드 실패, 기본값 사용")
-    return "안녕하세요! 오늘은 어떤 하루를 보내고 계신가요?"
+    """프롬프트 설정에서 시작 질문을 반환합니다. (프롬프트 파일은 최초 1회만 읽습니다)"""
+    prompts_config = ai_service.get_prompts_config()
+    if not prompts_config:
+        logger.error("프롬프트 설정 로드 실패, 기본값 사용")
+        return "안녕하세요! 오늘은 어떤 하루를 보내고 계신가요?"
+    return prompts_config.get('start_question', "안녕하세요!")
+
+async def _receive_audio(websocket: WebSocket) -> str | bytes:
+    """텍스트 프레임(base64 음성) 또는 바이너리 프레임(원본 음성 바이트)을 받습니다."""
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000))
+    if message.get("bytes") is not None:
+        return message["bytes"]
+    return message.get("text") or ""
 
 # 🔥 핵심 수정사항: prefix가 없으므로 전체 경로 필요
 @router.websocket("/senior/ws/{user_id}")
-async def websocket_endpoint(websocket: WebSocket, user_id: str):
-    print(f"🔗 WebSocket 연결 요청 받음: {user_id}")
-
+async def websocket_endpoint(websocket: WebSocket, user_id: str, filler: bool | None = None, encoding: str = serialization.FORMAT_JSON):
+    logger.info("WebSocket 연결 요청 받음", extra={"user_id": user_id})
+    # ?filler=true 로 연결하면 본 응답 전에 짧은 맞장구(ai_filler)를 먼저 보냅니다.
+    use_filler = settings.SPECULATIVE_FILLER_ENABLED if filler is None else filler
+    # ?encoding=msgpack 으로 연결하면 서버 메시지를 MessagePack 바이너리 프레임으로 보냅니다.
+    if encoding not in serialization.MEDIA_TYPES:
+        encoding = serialization.FORMAT_JSON
+
+    turns = TurnSlot()
     try:
-        await manager.connect(websocket, user_id)
+        await manager.connect(websocket, user_id, encoding)
         session_conversations[user_id] = []
-        print(f"✅ 클라이언트 [{user_id}] 연결됨.")
+        ACTIVE_SESSIONS.inc()
 
         # 프롬프트 파일에서 시작 질문 로드
         start_question = _load_start_question()
         await manager.send_json({"type": "ai_message", "content": start_question}, user_id)
         session_conversations[user_id].append(f"AI: {start_question}")
 
+        # 턴 처리 중에도 계속 수신해, 처리보다 빠르게 들어오는 프레임이 소켓 버퍼에 쌓이지 않게 합니다.
         while True:
-            audio_base64 = await websocket.receive_text()
-            print(f"🎵 오디오 데이터 받음: {len(audio_base64)} bytes")
+            # 어르신이 말하지 않는 동안의 대기 시간은 턴 지연이 아니므로, 프레임을 받은 뒤부터 trace 를 시작합니다.
+            audio = await _receive_audio(websocket)
+            with metrics.trace():
+                AUDIO_FRAME_BYTES.observe(len(audio), frame="binary" if isinstance(audio, bytes) else "text")
+                # 태스크는 현재 trace id 를 이어받습니다.
+                if turns.start(_handle_turn(user_id, audio, use_filler, turns)):
+                    TURNS_SUPERSEDED.inc()
+                    logger.info("새 발화로 이전 턴 취소", extra={"user_id": user_id})
 
-            # 🔧 실제 AI 서비스 호출로 복원
+    except WebSocketDisconnect:
+        logger.info("클라이언트 연결 종료", extra={"user_id": user_id})
+    except Exception:
+        logger.exception("WebSocket 오류", extra={"user_id": user_id})
+    finally:
+        await turns.drain()
+        if user_id in session_conversations:
+            ACTIVE_SESSIONS.dec()
+            current_session_log = session_conversations.pop(user_id)
+            # 기억 생성(요약/임베딩/Pinecone 저장)과 리포트 예약은 작업 실행기로 넘겨 연결 종료를 지연시키지 않습니다.
             try:
-                user_message, ai_response = await ai_service.process_user_audio(user_id, audio_base64)
+                await asyncio.to_thread(_enqueue_session_jobs, user_id, current_session_log)
+            except Exception as job_error:
+                logger.warning("세션 종료 작업 등록 실패 (무시)", extra={"user_id": user_id, "error": str(job_error)})
+
+        manager.disconnect(user_id)
+        logger.info("클라이언트 처리 완료", extra={"user_id": user_id})
+
+
+def _enqueue_session_jobs(user_id: str, session_log: list[str]):
+    job_runner.enqueue("memory.create", {"user_id": user_id, "session_log": session_log})
+    # 시작 질문 외에 어르신 발화가 있었던 세션만 리포트 대상입니다.
+    if settings.REPORT_SCHEDULER_ENABLED and len(session_log) > 1:
+        report_scheduler.schedule_after_session(user_id)
 
-                if user_message:
-                    await manager.send_json({"type": "user_message", "content": user_message}, user_id)
+
+async def _handle_turn(user_id: str, audio: str | bytes, use_filler: bool, turns: TurnSlot):
+    """수신한 음성 프레임 하나를 처리해 응답을 보내고 대화 기록을 저장합니다."""
+    speculative = None
+    on_transcript = None
+    if use_filler:
+        speculative = filler_service.SpeculativeFiller(lambda data: manager.send_json(data, user_id))
+
+        async def on_transcript(user_message: str):
+            # 전사 결과를 먼저 보여주고, 본 응답을 기다리는 동안 필러를 예약합니다.
+            await manager.send_json({"type": "user_message", "content": user_message}, user_id)
+            speculative.start(user_message)
+
+    # 🔧 실제 AI 서비스 호출로 복원
+    try:
+        with metrics.span("turn"):
+            user_message, ai_response = await ai_service.process_user_audio(user_id, audio, on_transcript=on_transcript)
+            turns.mark_delivering()
+
+            if user_message:
+                if speculative:
+                    ai_response = await speculative.settle(ai_response)
+                with metrics.span("send"):
+                    if not speculative:
+                        await manager.send_json({"type": "user_message", "content": user_message}, user_id)
                     await manager.send_json({"type": "ai_message", "content": ai_response}, user_id)
 
-                    session_conversations[user_id].append(f"사용자: {user_message}")
-                    session_conversations[user_id].append(f"AI: {ai_response}")
+                # 직전 AI 메시지가 질문이었으면 '답한 질문' 으로 셉니다.
+                session_log = session_conversations[user_id]
+                answered_question = bool(session_log) and session_log[-1].startswith("AI:") and session_log[-1].rstrip().endswith("?")
+                session_conversations[user_id].append(f"사용자: {user_message}")
+                session_conversations[user_id].append(f"AI: {ai_response}")
 
-                    # 🔧 DB 저장 다시 활성화
-                    try:
+                # 🔧 DB 저장 다시 활성화
+                try:
+                    with metrics.span("db_save"):
                         db: Session = SessionLocal()
                         try:
                             user = conversation_service.get_or_create_user(db, user_id)
-                            conversation_service.save_conversation(db, user, user_message, ai_response)
-                            print(f"✅ DB 저장 완료: {user_id} - {user_message[:20]}...")
+                            conversation_service.save_conversation(db, user, user_message, ai_response, answered_question)
                         finally:
                             db.close()
-                    except Exception as db_error:
-                        print(f"❌ DB 저장 실패 (무시): {str(db_error)}")
-                        # DB 오류가 있어도 대화는 계속 진행
-                else:
+                except Exception as db_error:
+                    # DB 오류가 있어도 대화는 계속 진행
+                    logger.error("DB 저장 실패 (무시)", extra={"user_id": user_id, "error": str(db_error)})
+            else:
+                with metrics.span("send"):
                     await manager.send_json({"type": "ai_message", "content": ai_response}, user_id)
 
-            except Exception as e:
-                print(f"❌ AI 서비스 오류: {str(e)}")
-                error_response = "죄송합니다. 잠시 문제가 있었어요. 다시 말씀해 주세요."
-                await manager.send_json({"type": "ai_message", "content": error_response}, user_id)
-
-    except WebSocketDisconnect:
-        print(f"🔌 클라이언트 [{user_id}] 연결이 끊어졌습니다.")
-    except Exception as e:
-        print(f"❌ WebSocket 오류: {str(e)}")
-        import traceback
-        print(f"❌ 상세 오류: {traceback.format_exc()}")
+    except Exception:
+        logger.exception("AI 서비스 오류", extra={"user_id": user_id})
+        error_response = "죄송합니다. 잠시 문제가 있었어요. 다시 말씀해 주세요."
+        await manager.send_json({"type": "ai_message", "content": error_response}, user_id)
     finally:
-        if user_id in session_conversations:
-            current_session_log = session_conversations.pop(user_id)
-            try:
-                await vector_db.create_memory_for_pinecone(user_id, current_session_log)
-                print(f"✅ 벡터 DB 저장 완료: {user_id} - {len(current_session_log)}개 대화")
-            except Exception as vector_error:
-                print(f"❌ 벡터 DB 저장 실패 (무시): {str(vector_error)}")
-
-        manager.disconnect(user_id)
-        print(f"⏹️ [{user_id}] 클라이언트와의 모든 처리가 완료되었습니다.")
\ No newline at end of file
+        if speculative:
+            speculative.cancel()
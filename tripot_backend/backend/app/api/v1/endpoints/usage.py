@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.db.database import get_db
+from app.services import llm_usage
+
+# 모델 호출 토큰 사용량/비용 조회 (운영용)
+router = APIRouter()
+
+
+@router.get("")
+def get_usage(
+    days: int = Query(7, ge=1, le=llm_usage.MAX_DAYS),
+    call_site: str | None = Query(None, description="chat_turn | memory_summary | report ..."),
+    db: Session = Depends(get_db),
+):
+    """최근 days 일의 호출 위치/모델별 토큰 수와 비용(USD). 이 인스턴스에 쌓여 있던 사용량을 먼저 저장하고 조회합니다."""
+    llm_usage.flush()
+    return llm_usage.get_usage(db, days=days, call_site=call_site)
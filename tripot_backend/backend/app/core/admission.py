@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+
+from app.core import metrics
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 외부 API(OpenAI/Pinecone) 호출 입장 제어
+# 모든 소켓과 백그라운드 작업의 외부 호출이 프로세스 전체에서
+# - 토큰 버킷(UPSTREAM_RATE_PER_SECOND, UPSTREAM_BURST)으로 초당 호출 수를,
+# - 동시 호출 한도(UPSTREAM_MAX_CONCURRENCY)로 진행 중인 호출 수를 제한합니다.
+# 대기는 ADMISSION_MAX_QUEUE_SECONDS(턴 마감이 더 가까우면 그 시각)까지만 하고, 넘을 것이 확실하거나
+# 대기열이 ADMISSION_MAX_WAITERS 를 넘으면 바로 Overloaded 를 발생시켜 지연이 끝없이 쌓이지 않게 합니다.
+# 턴 마감이 이미 지난 호출은 토큰을 쓰지 않고 deadline_exceeded 로 거절합니다. (과부하가 아니므로 rate_limited 와 구분)
+# 슬롯은 스레드 안의 SDK 호출이 실제로 끝날 때 반납합니다. (호출한 쪽이 취소되어도 스레드는 계속 돌기 때문)
+
+QUEUE_SECONDS = metrics.histogram(
+    "tripot_upstream_queue_seconds", "외부 API 호출의 입장 대기 시간(초)", ("upstream",),
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+SHED = metrics.counter(
+    "tripot_upstream_shed_total", "입장을 거절한 외부 API 호출 수 (reason: rate_limited | queue_full | timeout | deadline_exceeded)",
+    ("upstream", "reason"),
+)
+IN_FLIGHT = metrics.gauge("tripot_upstream_in_flight", "진행 중인 외부 API 호출 수")
+
+
+class Overloaded(Exception):
+    def __init__(self, upstream: str, reason: str):
+        super().__init__(f"{upstream} 과부하로 거절 ({reason})")
+        self.upstream = upstream
+        self.reason = reason
+
+
+class TokenBucket:
+    """초당 rate 개씩 채워지는 토큰 버킷. 토큰을 미리 예약하고 그만큼 기다리는 방식이라 대기 시간을 미리 알 수 있습니다."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait: float) -> float | None:
+        """토큰 하나를 예약하고 기다려야 할 시간(초)을 반환합니다. max_wait 를 넘으면 예약하지 않고 None."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+            if wait > max_wait:
+                return None
+            self._tokens -= 1
+            return wait
+
+
+class _Waiter:
+    __slots__ = ("loop", "future", "granted")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.future = loop.create_future()
+        self.granted = False
+
+
+class ConcurrencyLimiter:
+    """동시 실행 한도. 반납(release)은 어느 스레드에서 해도 되고, 기다리던 순서대로 슬롯을 넘겨줍니다."""
+
+    def __init__(self, limit: int, max_waiters: int):
+        self.limit = limit
+        self.max_waiters = max_waiters
+        self._in_use = 0
+        self._waiters: deque[_Waiter] = deque()
+        self._lock = threading.Lock()
+
+    async def acquire(self, timeout: float) -> str | None:
+        """슬롯을 얻으면 None, 못 얻으면 거절 사유를 반환합니다."""
+        with self._lock:
+            if self._in_use < self.limit and not self._waiters:
+                self._in_use += 1
+                IN_FLIGHT.inc()
+                return None
+            if len(self._waiters) >= self.max_waiters:
+                return "queue_full"
+            waiter = _Waiter(asyncio.get_running_loop())
+            self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter.future, timeout=max(timeout, 0))
+            return None
+        except BaseException as e:
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    self._waiters.remove(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                # 시간이 다 된 순간 슬롯을 넘겨받았다면 그대로 사용합니다.
+                return None if granted else "timeout"
+            if granted:
+                self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            if self._waiters:
+                # 슬롯 수는 그대로 두고 다음 대기자에게 넘깁니다.
+                waiter = self._waiters.popleft()
+                waiter.granted = True
+                waiter.loop.call_soon_threadsafe(_wake, waiter.future)
+                return
+            self._in_use -= 1
+            IN_FLIGHT.dec()
+
+
+def _wake(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+_bucket = TokenBucket(settings.UPSTREAM_RATE_PER_SECOND, settings.UPSTREAM_BURST)
+_limiter = ConcurrencyLimiter(settings.UPSTREAM_MAX_CONCURRENCY, settings.ADMISSION_MAX_WAITERS)
+
+
+async def admit(upstream: str, max_wait: float | None = None):
+    """외부 호출 하나의 입장 허가를 받습니다. 허가를 받았으면 호출이 끝날 때 release() 를 한 번 호출해야 합니다."""
+    kind = upstream.split(":", 1)[0]
+    if max_wait is not None and max_wait <= 0:
+        SHED.inc(upstream=kind, reason="deadline_exceeded")
+        raise Overloaded(upstream, "deadline_exceeded")
+    limit = settings.ADMISSION_MAX_QUEUE_SECONDS if max_wait is None else min(max_wait, settings.ADMISSION_MAX_QUEUE_SECONDS)
+    started_at = time.monotonic()
+
+    wait = _bucket.reserve(limit)
+    if wait is None:
+        SHED.inc(upstream=kind, reason="rate_limited")
+        raise Overloaded(upstream, "rate_limited")
+    if wait > 0:
+        await asyncio.sleep(wait)
+
+    reason = await _limiter.acquire(limit - (time.monotonic() - started_at))
+    if reason is not None:
+        SHED.inc(upstream=kind, reason=reason)
+        logger.warning("외부 호출 과부하 거절", extra={"upstream": upstream, "reason": reason})
+        raise Overloaded(upstream, reason)
+    QUEUE_SECONDS.observe(time.monotonic() - started_at, upstream=kind)
+
+
+def release():
+    _limiter.release()
@@ -9,17 +9,157 @@ class Settings(BaseSettings):
     """
     # OpenAI
     OPENAI_API_KEY: str
+    OPENAI_TIMEOUT_SECONDS: float = 30.0
+    # 일일 리포트 생성 호출 (긴 입력, JSON 출력) 의 응답 대기 시간
+    REPORT_TIMEOUT_SECONDS: float = 300.0
 
     # Pinecone
     PINECONE_API_KEY: str
     PINECONE_INDEX_NAME: str = "long-term-memory"
 
+    # 대화 모델 라우팅 (발화 난이도에 따라 모델 티어 선택)
+    MODEL_ROUTING_ENABLED: bool = True
+    CHAT_MODEL_LARGE: str = "gpt-4o"
+    CHAT_MODEL_SMALL: str = "gpt-4o-mini"
+    CHAT_MAX_TOKENS_LARGE: int = 150
+    CHAT_MAX_TOKENS_SMALL: int = 100
+    ROUTING_SMALL_MAX_CHARS: int = 20
+
+    # 음성 대화 턴 시간 예산 (초). 단계 예산은 턴 전체 남은 시간을 넘지 않습니다.
+    TURN_DEADLINE_SECONDS: float = 12.0
+    STT_BUDGET_SECONDS: float = 4.0
+    # 넘으면 기억 검색 없이 응답합니다.
+    MEMORY_BUDGET_SECONDS: float = 1.5
+    # 넘으면 작은 모델로 다시 시도하고, 남은 시간이 COMPLETION_FALLBACK_MIN_SECONDS 보다 적으면 짧은 안내 응답을 보냅니다.
+    COMPLETION_BUDGET_SECONDS: float = 6.0
+    COMPLETION_FALLBACK_MIN_SECONDS: float = 1.5
+    # 외부 API 서킷 브레이커: 연속 실패 횟수, 차단 시간(초)
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_OPEN_SECONDS: float = 30.0
+    # 외부 API 입장 제어 (프로세스 전체): 동시 호출 수, 초당 호출 수(0 이면 제한 없음)와 순간 허용량
+    UPSTREAM_MAX_CONCURRENCY: int = 32
+    UPSTREAM_RATE_PER_SECOND: float = 20.0
+    UPSTREAM_BURST: int = 40
+    # 입장 대기 상한(초)과 최대 대기 호출 수. 넘으면 기다리지 않고 바로 거절합니다.
+    ADMISSION_MAX_QUEUE_SECONDS: float = 2.0
+    ADMISSION_MAX_WAITERS: int = 64
+
+    # 모델 입력 토큰 예산 (app/core/tokens.py). 넘으면 우선순위가 낮은 부분부터 줄입니다.
+    # 대화 프롬프트 전체 / 그 안의 기억 구역 (넘치면 대화 예시 → 기억 순으로 줄임)
+    CHAT_PROMPT_MAX_TOKENS: int = 3000
+    CHAT_MEMORY_MAX_TOKENS: int = 800
+    # 세션 기억 요약에 넣는 대화 (앞뒤를 남기고 가운데 생략), 요약 없이 저장하는 짧은 발화 기억
+    MEMORY_SUMMARY_INPUT_MAX_TOKENS: int = 6000
+    MEMORY_UTTERANCE_MAX_TOKENS: int = 500
+    # 임베딩 입력 (text-embedding-3-small 한도 8191)
+    EMBEDDING_MAX_TOKENS: int = 8000
+    # 일일 리포트 대화가 이보다 길면 REPORT_CHUNK_TOKENS 조각으로 나눠 작은 모델로 먼저 정리한 뒤 리포트를 만듭니다.
+    REPORT_INPUT_MAX_TOKENS: int = 24000
+    REPORT_CHUNK_TOKENS: int = 8000
+    REPORT_CHUNK_NOTE_MAX_TOKENS: int = 1200
+    # 모델별 100만 토큰당 가격(USD) [입력, 출력]. 비용 조회(GET /api/v1/usage)에 씁니다.
+    LLM_PRICES_PER_MTOK: dict[str, list[float]] = {
+        "gpt-4o": [2.5, 10.0],
+        "gpt-4o-mini": [0.15, 0.6],
+        "text-embedding-3-small": [0.02, 0.0],
+    }
+    # 메모리에 쌓은 토큰 사용량을 llm_usage 테이블에 더하는 간격(초)
+    LLM_USAGE_FLUSH_SECONDS: float = 60.0
+
+    # 본 응답 대기 중 짧은 맞장구(필러)를 먼저 보내는 모드
+    SPECULATIVE_FILLER_ENABLED: bool = False
+    FILLER_DELAY_MS: int = 300
+
     # MySQL Database
     MYSQL_DATABASE: str
     MYSQL_USER: str
     MYSQL_PASSWORD: str
     DB_HOST: str # ❗️오류 해결을 위해 MYSQL_HOST에서 다시 DB_HOST로 변경
     MYSQL_ROOT_PASSWORD: str
+    DB_CONNECT_TIMEOUT: int = 5
+    # 지정하면 MySQL 대신 이 URL로 접속합니다. (예: 벤치마크용 sqlite:///bench.db)
+    SQLALCHEMY_DATABASE_URL: str | None = None
+
+    # 가족 앱에 내려주는 사진 URL 의 앞부분 (nginx 외부 주소)
+    PUBLIC_BASE_URL: str = "http://192.168.101.48:8889"
+    # 사진 상세/메타 응답 캐시 (댓글/게시글 변경 시 무효화, TTL 은 다른 프로세스에서의 변경 대비)
+    PHOTO_VIEW_CACHE_MAX_ENTRIES: int = 2048
+    PHOTO_VIEW_CACHE_TTL_SECONDS: float = 300.0
+
+    # 이어받기 업로드: 기본/최대 조각 크기(nginx 요청 크기 제한보다 작게), 파일 최대 크기, 미완료 업로드 보관 시간
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+    UPLOAD_MAX_CHUNK_SIZE: int = 8 * 1024 * 1024
+    UPLOAD_MAX_FILE_BYTES: int = 200 * 1024 * 1024
+    UPLOAD_SESSION_TTL_HOURS: int = 48
+    UPLOAD_CLEANUP_HOUR: int = 4
+    # 게시글 음성 메시지 파일 최대 크기 (uploads/family_audio 에 저장)
+    AUDIO_MAX_FILE_BYTES: int = 20 * 1024 * 1024
+
+    # 가족 앱 실시간 알림(SSE): 연결별 최대 대기 이벤트 수, 하트비트 간격
+    FAMILY_EVENTS_MAX_PENDING: int = 100
+    FAMILY_EVENTS_HEARTBEAT_SECONDS: float = 15.0
+
+    # 백그라운드 작업 실행기 (끄면 작업은 DB 에 쌓이기만 하고 다른 인스턴스가 처리)
+    JOB_RUNNER_ENABLED: bool = True
+    JOB_POLL_INTERVAL_SECONDS: float = 2.0
+    JOB_RETRY_BASE_SECONDS: float = 10.0
+    # 실행 중인 작업의 임대 시간. 실행기는 그 1/3 마다 임대를 연장하고, 연장되지 않고 만료된 running 작업은
+    # 중단된 것(프로세스 종료 등)으로 보고 다시 대기열에 넣습니다.
+    JOB_LEASE_SECONDS: float = 120.0
+    # 완료된 작업 기록 보관 기간 (실패한 작업은 지우지 않음)
+    JOB_RETENTION_DAYS: int = 7
+
+    # 일일 리포트 자동 생성 (app/services/report_scheduler.py)
+    REPORT_SCHEDULER_ENABLED: bool = True
+    # 어르신의 마지막 대화 세션이 끝나고 이 시간 동안 새 세션이 없으면 오늘 리포트를 생성합니다.
+    REPORT_IDLE_DELAY_SECONDS: float = 1800.0
+    # 매일 이 시각(서버 현지 시간)부터 REPORT_NIGHTLY_WINDOW_MINUTES 동안 나눠서 전날 리포트를 보완합니다.
+    REPORT_NIGHTLY_HOUR: int = 1
+    REPORT_NIGHTLY_WINDOW_MINUTES: int = 240
+    # 같은 날 리포트를 다시 만들 때 이전 생성 이후 늘어난 대화만 분석해 기존 리포트를 갱신합니다. (끄면 매번 전체 분석, 입력이 같으면 건너뜀은 유지)
+    REPORT_INCREMENTAL_ENABLED: bool = True
+
+    # 장기 사용자 기억 정리 (app/services/memory_compaction.py)
+    MEMORY_COMPACTION_ENABLED: bool = True
+    MEMORY_COMPACTION_HOUR: int = 3
+    MEMORY_COMPACTION_INTERVAL_DAYS: int = 7
+    MEMORY_COMPACTION_WINDOW_MINUTES: int = 120
+    # 기억이 이보다 적은 사용자는 정리하지 않습니다.
+    MEMORY_COMPACTION_MIN_MEMORIES: int = 30
+    # 최근 기억은 원문 그대로 둡니다.
+    MEMORY_COMPACTION_MIN_AGE_DAYS: int = 14
+    # 같은 기간(일) 안에서 코사인 유사도가 이 값 이상인 기억끼리 하나로 합칩니다.
+    MEMORY_CLUSTER_PERIOD_DAYS: int = 30
+    MEMORY_CLUSTER_SIMILARITY: float = 0.82
+    # 합쳐지지 않은 발화(utterance) 기억의 보관 기간
+    MEMORY_UTTERANCE_TTL_DAYS: int = 90
+    # 한 번에 읽어오는 사용자 기억 수 (Pinecone query top_k 상한 내)
+    MEMORY_COMPACTION_FETCH_LIMIT: int = 1000
+
+    # 대화 기록 월 단위 보관 (app/services/conversation_archive.py)
+    CONVERSATION_ARCHIVE_ENABLED: bool = True
+    CONVERSATION_ARCHIVE_HOUR: int = 2
+    # 이번 달을 포함해 최근 이 개월 수만 conversations 테이블에 두고, 이전 달은 압축 파일로 옮깁니다.
+    CONVERSATION_RETENTION_MONTHS: int = 12
+    CONVERSATION_ARCHIVE_DIR: str = "archive/conversations"
+    # MySQL 월 파티션을 미리 만들어 두는 개월 수
+    CONVERSATION_PARTITION_MONTHS_AHEAD: int = 3
+
+    # 기억 검색 (벡터 + 키워드 BM25 결합)
+    MEMORY_LEXICAL_ENABLED: bool = True
+    MEMORY_LEXICAL_CACHE_USERS: int = 512
+    MEMORY_LEXICAL_CACHE_TTL_SECONDS: float = 300.0
+    # 관련도 = 벡터 유사도 * 가중치 + 키워드 점수 * (1 - 가중치)
+    MEMORY_HYBRID_VECTOR_WEIGHT: float = 0.6
+
+    # 로그 (json | text), DEBUG 로그 샘플링 비율
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
+    LOG_DEBUG_SAMPLE_RATE: float = 0.1
+
+    # 서버 시작/준비 상태 확인
+    STARTUP_SCHEMA_TIMEOUT_SECONDS: float = 15.0
+    READINESS_TIMEOUT_SECONDS: float = 2.0
 
     @property
     def DATABASE_URL(self) -> str:
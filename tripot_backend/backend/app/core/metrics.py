@@ -0,0 +1,197 @@
+import bisect
+import contextvars
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    """단조 증가 카운터 (Prometheus counter)"""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    """증감 가능한 현재 값 (Prometheus gauge)"""
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    """누적 버킷 히스토그램 (Prometheus histogram)"""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 라벨 값 -> [버킷별 개수..., 합계, 전체 개수]
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-2]}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+_registry: dict[str, Counter | Gauge | Histogram] = {}
+_registry_lock = threading.Lock()
+
+
+def counter(name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+    """이름으로 카운터를 가져오거나 새로 등록합니다."""
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = Counter(name, documentation, labelnames)
+        return _registry[name]
+
+
+def gauge(name: str, documentation: str, labelnames: tuple = ()) -> Gauge:
+    """이름으로 게이지를 가져오거나 새로 등록합니다."""
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = Gauge(name, documentation, labelnames)
+        return _registry[name]
+
+
+def histogram(name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS) -> Histogram:
+    """이름으로 히스토그램을 가져오거나 새로 등록합니다."""
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = Histogram(name, documentation, labelnames, buckets)
+        return _registry[name]
+
+
+def render_prometheus() -> str:
+    """등록된 모든 지표를 Prometheus 텍스트 형식으로 반환합니다."""
+    with _registry_lock:
+        metrics = list(_registry.values())
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# --- 음성 대화 턴 트레이싱 ---
+
+TURN_STAGE_SECONDS = histogram(
+    "tripot_turn_stage_seconds", "음성 대화 턴의 단계별 소요 시간(초)", ("stage",)
+)
+SPAN_ERRORS = counter("tripot_turn_stage_errors_total", "예외로 끝난 단계 수", ("stage",))
+
+_trace_id: contextvars.ContextVar[str | None] = contextvars.ContextVar("trace_id", default=None)
+_span_listeners: list = []
+
+
+def add_span_listener(listener):
+    """span 이 끝날 때마다 listener(stage, elapsed_seconds) 를 호출합니다. (벤치마크의 원본 샘플 수집용)"""
+    _span_listeners.append(listener)
+
+
+def remove_span_listener(listener):
+    if listener in _span_listeners:
+        _span_listeners.remove(listener)
+
+
+def current_trace_id() -> str | None:
+    return _trace_id.get()
+
+
+@contextmanager
+def trace():
+    """하나의 대화 턴을 묶는 trace id 를 설정합니다. 같은 태스크 안의 span 로그에 함께 기록됩니다."""
+    token = _trace_id.set(uuid.uuid4().hex[:16])
+    try:
+        yield _trace_id.get()
+    finally:
+        _trace_id.reset(token)
+
+
+@contextmanager
+def span(stage: str, **fields):
+    """단계 소요 시간을 히스토그램에 기록하고 DEBUG 로그로 남깁니다."""
+    started_at = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except BaseException:
+        status = "error"
+        SPAN_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started_at
+        TURN_STAGE_SECONDS.observe(elapsed, stage=stage)
+        for listener in _span_listeners:
+            listener(stage, elapsed)
+        logger.debug(
+            "span",
+            extra={"trace_id": _trace_id.get(), "stage": stage, "duration_ms": round(elapsed * 1000, 1), "status": status, **fields},
+        )
@@ -0,0 +1,13 @@
+import json
+import os
+from functools import lru_cache
+
+# backend/prompts 폴더 (실행 위치와 관계없이 이 파일 기준으로 찾습니다)
+PROMPTS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'prompts'))
+
+
+@lru_cache()
+def load_prompt_file(filename: str) -> dict:
+    """prompts 폴더의 JSON 파일을 처음 사용할 때 한 번만 읽어 캐싱합니다."""
+    with open(os.path.join(PROMPTS_DIR, filename), 'r', encoding='utf-8') as f:
+        return json.load(f)
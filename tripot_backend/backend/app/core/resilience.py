@@ -0,0 +1,173 @@
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from app.core import admission, metrics
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 대화 턴 시간 예산과 외부 API 서킷 브레이커
+# - turn_deadline(): 턴 전체 마감 시각을 contextvar 로 설정합니다. (하위 호출과 to_thread 로 전달됨)
+# - run_stage(): 단계(stt/memory/completion)마다 예산을 두고, 넘으면 BudgetExceeded 를 발생시킵니다.
+#   단계 예산은 턴 전체 남은 시간을 넘지 않습니다. 어떻게 대체할지는 호출하는 쪽이 정합니다.
+# - call_upstream(): 외부 API 호출을 입장 제어(app/core/admission.py)와 서킷 브레이커로 감싸고,
+#   남은 시간을 SDK 요청 timeout 으로 넘깁니다.
+#   (wait_for 로 취소해도 스레드 안의 SDK 호출은 계속 돌기 때문에 SDK 쪽에서도 끊어야 합니다)
+
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar("turn_deadline", default=None)
+
+BUDGET_OVERRUNS = metrics.counter("tripot_turn_budget_overruns_total", "대화 턴 단계별 시간 예산 초과 수", ("stage",))
+CIRCUIT_OPEN = metrics.gauge("tripot_circuit_open", "외부 API 서킷 브레이커 차단 여부 (1: 차단)", ("upstream",))
+CIRCUIT_REJECTED = metrics.counter("tripot_circuit_rejected_total", "서킷 브레이커 차단으로 보내지 않은 호출 수", ("upstream",))
+
+
+class BudgetExceeded(Exception):
+    def __init__(self, stage: str):
+        super().__init__(f"{stage} 시간 예산 초과")
+        self.stage = stage
+
+
+class CircuitOpenError(Exception):
+    def __init__(self, upstream: str):
+        super().__init__(f"{upstream} 서킷 차단 중")
+        self.upstream = upstream
+
+
+@contextmanager
+def turn_deadline(seconds: float):
+    token = _deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def time_left() -> float | None:
+    """현재 마감까지 남은 시간(초). 마감이 설정되지 않았으면 None."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+async def run_stage(stage: str, budget_seconds: float, awaitable):
+    """awaitable 을 단계 예산 안에서 실행합니다. 단계 안의 외부 호출도 같은 마감을 따릅니다."""
+    left = time_left()
+    timeout = budget_seconds if left is None else min(budget_seconds, left)
+    if timeout <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        BUDGET_OVERRUNS.inc(stage=stage)
+        raise BudgetExceeded(stage)
+    token = _deadline.set(time.monotonic() + timeout)
+    try:
+        return await asyncio.wait_for(awaitable, timeout=timeout)
+    except asyncio.TimeoutError:
+        BUDGET_OVERRUNS.inc(stage=stage)
+        logger.warning("단계 시간 예산 초과", extra={"stage": stage, "budget_ms": round(timeout * 1000)})
+        raise BudgetExceeded(stage)
+    finally:
+        _deadline.reset(token)
+
+
+class CircuitBreaker:
+    """연속 실패가 failure_threshold 에 이르면 open_seconds 동안 호출을 막고,
+    그 뒤 한 번만 시험 호출(half-open)을 보내 성공하면 다시 엽니다."""
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failure_threshold: int, open_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                self.state = self.HALF_OPEN
+            if self.state == self.OPEN or (self.state == self.HALF_OPEN and self._trial_in_flight):
+                CIRCUIT_REJECTED.inc(upstream=self.name)
+                raise CircuitOpenError(self.name)
+            if self.state == self.HALF_OPEN:
+                self._trial_in_flight = True
+
+    def on_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("서킷 브레이커 복구", extra={"upstream": self.name})
+                CIRCUIT_OPEN.set(0, upstream=self.name)
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def on_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning("서킷 브레이커 차단", extra={"upstream": self.name, "failures": self._failures})
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                CIRCUIT_OPEN.set(1, upstream=self.name)
+
+    def on_abandoned(self):
+        """결과를 알 수 없이 취소된 호출 (시험 호출이었다면 다음 호출이 다시 시험하도록 풀어줍니다)"""
+        with self._lock:
+            self._trial_in_flight = False
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker(upstream: str) -> CircuitBreaker:
+    with _breakers_lock:
+        if upstream not in _breakers:
+            _breakers[upstream] = CircuitBreaker(upstream, settings.CIRCUIT_FAILURE_THRESHOLD, settings.CIRCUIT_OPEN_SECONDS)
+        return _breakers[upstream]
+
+
+async def call_upstream(upstream: str, func, *args, timeout_kwarg: str | None = "timeout", **kwargs):
+    """동기 SDK 함수를 스레드에서 실행합니다. 마감이 설정되어 있으면 입장 대기는 남은 시간까지만 하고,
+    남은 시간을 timeout_kwarg 로 넘깁니다. 과부하면 admission.Overloaded 가 발생합니다."""
+    await admission.admit(upstream, time_left())
+    circuit = breaker(upstream)
+    try:
+        circuit.before_call()
+    except CircuitOpenError:
+        admission.release()
+        raise
+    left = time_left()
+    if left is not None and timeout_kwarg:
+        kwargs[timeout_kwarg] = max(left, 0.1)
+
+    def run():
+        # 호출한 쪽이 취소되어도 스레드의 호출은 끝까지 돌기 때문에 입장 슬롯은 여기서 반납합니다.
+        try:
+            return func(*args, **kwargs)
+        finally:
+            admission.release()
+
+    try:
+        result = await asyncio.to_thread(run)
+    except asyncio.CancelledError:
+        # 마감이 지나 취소된 경우는 느린 응답으로 보고 실패로 셉니다.
+        left = time_left()
+        if left is not None and left <= 0:
+            circuit.on_failure()
+        else:
+            circuit.on_abandoned()
+        raise
+    except Exception:
+        circuit.on_failure()
+        raise
+    circuit.on_success()
+    return result
@@ -0,0 +1,112 @@
+import contextvars
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any
+
+import msgpack
+import orjson
+from fastapi.responses import JSONResponse
+
+# 응답 직렬화 공통 모듈
+# - JSON 은 orjson (비ASCII 문자를 이스케이프하지 않음 = json.dumps(ensure_ascii=False) 와 동일한 출력)
+# - Accept: application/msgpack (또는 application/x-msgpack) 요청에는 MessagePack 으로 응답합니다. (모바일 앱용)
+#   날짜/시간은 JSON 과 같게 ISO 문자열로 보냅니다.
+
+FORMAT_JSON = "json"
+FORMAT_MSGPACK = "msgpack"
+MEDIA_TYPES = {FORMAT_JSON: "application/json", FORMAT_MSGPACK: "application/msgpack"}
+_MSGPACK_ACCEPT = ("application/msgpack", "application/x-msgpack")
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+_response_format: contextvars.ContextVar[str] = contextvars.ContextVar("response_format", default=FORMAT_JSON)
+
+
+def _msgpack_default(value: Any):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    raise TypeError(f"MessagePack 으로 직렬화할 수 없는 타입: {type(value).__name__}")
+
+
+def _orjson_default(value: Any):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    raise TypeError(f"JSON 으로 직렬화할 수 없는 타입: {type(value).__name__}")
+
+
+def dumps_json(content: Any) -> bytes:
+    return orjson.dumps(content, default=_orjson_default, option=_ORJSON_OPTIONS)
+
+
+def dumps_msgpack(content: Any) -> bytes:
+    return msgpack.packb(content, default=_msgpack_default, use_bin_type=True)
+
+
+def encode(content: Any, fmt: str = FORMAT_JSON) -> bytes:
+    return dumps_msgpack(content) if fmt == FORMAT_MSGPACK else dumps_json(content)
+
+
+def format_from_accept(accept: str | None) -> str:
+    if accept and any(media in accept.lower() for media in _MSGPACK_ACCEPT):
+        return FORMAT_MSGPACK
+    return FORMAT_JSON
+
+
+def current_format() -> str:
+    """현재 요청이 선택한 응답 형식 (NegotiationMiddleware 가 설정)"""
+    return _response_format.get()
+
+
+class NegotiatedResponse(JSONResponse):
+    """기본 응답 클래스. 요청의 Accept 헤더에 따라 JSON(orjson) 또는 MessagePack 으로 직렬화합니다.
+    (fastapi.responses.ORJSONResponse 는 최신 FastAPI 에서 deprecated 되어 직접 구현합니다)
+    엔드포인트에서 직접 반환하면 FastAPI 의 jsonable_encoder 변환도 건너뜁니다. (큰 목록 응답용)"""
+
+    def __init__(self, content: Any = None, *args, **kwargs):
+        self._format = current_format()
+        self.media_type = MEDIA_TYPES[self._format]
+        super().__init__(content, *args, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        return encode(content, self._format)
+
+
+class NegotiationMiddleware:
+    """요청의 Accept 헤더를 읽어 응답 형식을 contextvar 에 기록하고, 응답에 Vary: Accept 를 추가합니다."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = None
+        for name, value in scope.get("headers", []):
+            if name == b"accept":
+                accept = value.decode("latin-1")
+                break
+        token = _response_format.set(format_from_accept(accept))
+
+        async def send_with_vary(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"vary", b"Accept"))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_vary)
+        finally:
+            _response_format.reset(token)
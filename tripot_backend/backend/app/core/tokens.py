@@ -0,0 +1,213 @@
+import logging
+import math
+import re
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime
+
+from app.core import metrics
+
+try:
+    import tiktoken
+except ImportError:  # 설치되지 않았으면 글자 수로 추정합니다.
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# 모델 호출 토큰 예산과 사용량 집계
+# - 세기: 서버 기동 시 불러 둔 tiktoken 모델 토크나이저로, 없거나 아직 불러오지 못했으면 추정값(한글 한 글자 ≈ 1 토큰, 그 외 4글자 ≈ 1 토큰)으로 셉니다.
+# - 줄이기: truncate 는 앞/뒤/가운데를 남기고, fit_sections 는 프롬프트 구역을 우선순위 낮은 것부터 줄여 예산에 맞춥니다.
+#   chunk_lines 는 긴 입력(하루치 대화)을 줄 단위 조각으로 나눕니다.
+# - 집계: record_usage 가 호출 위치(call_site)/모델별 토큰을 /metrics 에 더하고 메모리에 쌓아 두면,
+#   app/services/llm_usage.py 가 주기적으로 llm_usage 테이블에 더합니다. (비용 조회: GET /api/v1/usage)
+#   응답에 usage 가 있으면 그 값을, 없으면(가짜 클라이언트 등) 위 방식으로 센 값을 씁니다.
+
+DEFAULT_ENCODING = "o200k_base"
+TRUNCATION_MARK = "\n…(중략)…\n"
+
+_HANGUL = re.compile(r"[가-힣ㄱ-ㅎㅏ-ㅣ]")
+
+TOKENS = metrics.counter("tripot_llm_tokens_total", "모델 호출 토큰 수", ("call_site", "model", "kind"))
+CALLS = metrics.counter("tripot_llm_calls_total", "모델 호출 수 (source: api=응답의 usage, estimate=로컬 추정)", ("call_site", "model", "source"))
+TRIMMED = metrics.counter("tripot_llm_prompt_trimmed_total", "토큰 예산에 맞춰 줄인 입력 수", ("call_site", "section"))
+
+# 모델 이름 -> 인코딩 ("" 은 기본 인코딩). 인코딩 파일은 처음 쓸 때 내려받으므로 요청 처리 중에는 불러오지 않고,
+# 서버 기동 시 load_encodings 로 미리 불러 둔 것만 씁니다. (그 전이나 실패하면 추정값)
+_encodings: dict[str, object] = {}
+_encodings_lock = threading.Lock()
+
+
+def load_encodings(models) -> int:
+    """models 와 기본 인코딩을 불러 둡니다. 파일을 내려받을 수 있어 오래 걸리므로 이벤트 루프 밖에서 호출합니다.
+    불러온 인코딩 수를 반환합니다. (실패한 모델은 추정값을 씁니다)"""
+    if tiktoken is None:
+        return 0
+    loaded = 0
+    with _encodings_lock:
+        for model in ["", *models]:
+            if _encodings.get(model) is not None:
+                loaded += 1
+                continue
+            try:
+                try:
+                    encoding = tiktoken.encoding_for_model(model) if model else tiktoken.get_encoding(DEFAULT_ENCODING)
+                except KeyError:
+                    encoding = tiktoken.get_encoding(DEFAULT_ENCODING)
+            except Exception as e:
+                # 네트워크가 막힌 환경에서는 내려받지 못할 수 있습니다. (Dockerfile 은 이미지 빌드 때 받아 둠)
+                logger.warning("토크나이저를 불러오지 못해 추정값을 사용합니다", extra={"model": model, "error": str(e) or type(e).__name__})
+                continue
+            _encodings[model] = encoding
+            loaded += 1
+    return loaded
+
+
+def _encoding(model: str | None):
+    """불러 둔 모델 인코딩. 없으면 기본 인코딩, 그것도 없으면 None (여기서는 내려받지 않음)"""
+    encoding = _encodings.get(model or "")
+    return encoding if encoding is not None else _encodings.get("")
+
+
+def estimate_tokens(text: str) -> int:
+    hangul = len(_HANGUL.findall(text))
+    return hangul + math.ceil((len(text) - hangul) / 4)
+
+
+def count_tokens(text: str | None, model: str | None = None) -> int:
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _cut_chars(text: str, max_tokens: int, keep: str) -> str:
+    """추정값 기준으로 자릅니다. 비율로 한 번 자르고 넘치면 조금씩 더 줄입니다."""
+    total = estimate_tokens(text)
+    length = int(len(text) * max_tokens / total)
+    while length > 0:
+        part = text[:length] if keep == "head" else text[-length:]
+        if estimate_tokens(part) <= max_tokens:
+            return part
+        length = int(length * 0.9)
+    return ""
+
+
+def truncate(text: str | None, max_tokens: int, model: str | None = None, keep: str = "head") -> str:
+    """text 를 max_tokens 이하로 자릅니다. keep: head(앞을 남김) | tail(뒤를 남김) | middle(앞뒤를 남기고 가운데 생략)"""
+    if not text or max_tokens <= 0:
+        return ""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    if keep == "middle":
+        half = max(max_tokens - count_tokens(TRUNCATION_MARK, model), 0) // 2
+        return truncate(text, half, model, "head") + TRUNCATION_MARK + truncate(text, half, model, "tail")
+
+    encoding = _encoding(model)
+    if encoding is None:
+        return _cut_chars(text, max_tokens, keep)
+    ids = encoding.encode(text, disallowed_special=())
+    # 한글 한 글자가 여러 토큰일 수 있어 잘린 자리의 깨진 글자는 버립니다.
+    part = ids[:max_tokens] if keep == "head" else ids[-max_tokens:]
+    return encoding.decode(part).strip("�")
+
+
+@dataclass
+class Section:
+    """프롬프트의 한 구역. 예산을 넘으면 priority 가 낮은 구역부터 min_tokens 까지 줄입니다. (required 는 줄이지 않음)"""
+    name: str
+    text: str
+    priority: int = 0
+    keep: str = "head"
+    min_tokens: int = 0
+    required: bool = False
+
+
+def fit_sections(sections: list[Section], max_tokens: int, model: str | None = None,
+                 call_site: str = "") -> tuple[dict[str, str], int]:
+    """구역들을 합쳐 max_tokens 안에 들도록 줄여 ({이름: 본문}, 합계 토큰 수)를 반환합니다.
+    모두 min_tokens 까지 줄여도 넘치면 그대로 둡니다."""
+    counts = {section.name: count_tokens(section.text, model) for section in sections}
+    texts = {section.name: section.text for section in sections}
+    over = sum(counts.values()) - max_tokens
+    for section in sorted(sections, key=lambda s: s.priority):
+        if over <= 0:
+            break
+        if section.required:
+            continue
+        cut = min(counts[section.name] - section.min_tokens, over)
+        if cut <= 0:
+            continue
+        texts[section.name] = truncate(section.text, counts[section.name] - cut, model, section.keep)
+        trimmed = count_tokens(texts[section.name], model)
+        over -= counts[section.name] - trimmed
+        counts[section.name] = trimmed
+        TRIMMED.inc(call_site=call_site, section=section.name)
+    return texts, sum(counts.values())
+
+
+def chunk_lines(text: str, max_tokens: int, model: str | None = None) -> list[str]:
+    """줄 단위로 max_tokens 이하의 조각들로 나눕니다. 한 줄이 넘치면 그 줄은 잘라서 넣습니다."""
+    chunks, current, size = [], [], 0
+    for line in text.splitlines():
+        line_tokens = count_tokens(line, model) + 1
+        if line_tokens > max_tokens:
+            line = truncate(line, max_tokens - 1, model)
+            line_tokens = max_tokens
+        if current and size + line_tokens > max_tokens:
+            chunks.append("\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += line_tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+# --- 사용량 집계 ---
+
+# (날짜(UTC), call_site, model) -> [호출 수, 프롬프트 토큰, 응답 토큰, 추정으로 센 호출 수]
+_pending: dict[tuple[date, str, str], list[int]] = {}
+_pending_lock = threading.Lock()
+
+
+def _add_pending(key: tuple, values: list[int]):
+    with _pending_lock:
+        row = _pending.setdefault(key, [0, 0, 0, 0])
+        for i, value in enumerate(values):
+            row[i] += value
+
+
+def record_usage(call_site: str, model: str, response=None, prompt_text: str = "", completion_text: str = "") -> tuple[int, int]:
+    """모델 호출 한 번의 토큰 수를 집계하고 (프롬프트, 응답) 토큰 수를 반환합니다."""
+    usage = getattr(response, "usage", None)
+    prompt_tokens = getattr(usage, "prompt_tokens", None)
+    if isinstance(prompt_tokens, int):
+        completion_tokens = getattr(usage, "completion_tokens", None) or 0
+        source = "api"
+    else:
+        prompt_tokens = count_tokens(prompt_text, model)
+        completion_tokens = count_tokens(completion_text, model)
+        source = "estimate"
+
+    CALLS.inc(call_site=call_site, model=model, source=source)
+    TOKENS.inc(prompt_tokens, call_site=call_site, model=model, kind="prompt")
+    if completion_tokens:
+        TOKENS.inc(completion_tokens, call_site=call_site, model=model, kind="completion")
+    _add_pending((datetime.utcnow().date(), call_site, model),
+                 [1, prompt_tokens, completion_tokens, int(source == "estimate")])
+    return prompt_tokens, completion_tokens
+
+
+def drain_usage() -> dict[tuple[date, str, str], list[int]]:
+    """쌓인 사용량을 꺼냅니다. 저장에 실패하면 restore_usage 로 되돌립니다."""
+    global _pending
+    with _pending_lock:
+        pending, _pending = _pending, {}
+    return pending
+
+
+def restore_usage(pending: dict[tuple[date, str, str], list[int]]):
+    for key, values in pending.items():
+        _add_pending(key, values)
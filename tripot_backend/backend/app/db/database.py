@@ -7,9 +7,20 @@ from app.core.config import settings
 # from .models import User, Conversation, Summary
 # 그리고 제가 추가하라고 한 함수들도 모두 삭제하세요!
 
-SQLALCHEMY_DATABASE_URL = f"mysql+pymysql://{settings.MYSQL_USER}:{settings.MYSQL_PASSWORD}@{settings.DB_HOST}/{settings.MYSQL_DATABASE}"
+SQLALCHEMY_DATABASE_URL = settings.SQLALCHEMY_DATABASE_URL or f"mysql+pymysql://{settings.MYSQL_USER}:{settings.MYSQL_PASSWORD}@{settings.DB_HOST}/{settings.MYSQL_DATABASE}"
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+if SQLALCHEMY_DATABASE_URL.startswith("sqlite"):
+    # 벤치마크/로컬 실행용 sqlite (여러 스레드에서 같은 연결을 사용할 수 있도록 허용)
+    connect_args = {"check_same_thread": False}
+else:
+    connect_args = {"connect_timeout": settings.DB_CONNECT_TIMEOUT}
+
+# 엔진 생성 시에는 DB에 접속하지 않습니다. 실제 연결은 첫 쿼리 시점에 이루어집니다.
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    pool_pre_ping=True,
+    connect_args=connect_args,
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -0,0 +1,196 @@
+# app/db/migrations
+# 버전이 매겨진 스키마 마이그레이션
+#
+#   python -m app.db.migrations upgrade   # 최신 리비전까지 적용
+#   python -m app.db.migrations current   # DB 의 현재 버전과 최신(head) 버전 확인
+#
+# 리비전은 versions/rNNNN_*.py 파일이며 REVISION(정수), DESCRIPTION, upgrade(op) 를 정의합니다.
+# 서버는 기동 시 DDL 을 실행하지 않고 버전만 확인합니다. (app/main.py)
+
+import importlib
+import logging
+import pkgutil
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger(__name__)
+
+LOCK_NAME = "tripot_schema_migrations"
+LOCK_TIMEOUT_SECONDS = 60
+
+_version_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _version_metadata,
+    Column("version", Integer, primary_key=True, autoincrement=False),
+    Column("description", String(255), nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+@dataclass
+class Revision:
+    version: int
+    description: str
+    upgrade: Callable
+
+
+class Operations:
+    """리비전에서 사용하는 DDL 도우미.
+
+    리비전 1 은 현재 models.py 기준으로 없는 테이블을 만들기 때문에, 새 DB 에는 이후 리비전의 변경이
+    이미 들어가 있을 수 있습니다. 그래서 모든 작업은 이미 적용된 경우 건너뜁니다.
+    MySQL 에서는 인덱스/컬럼 추가를 온라인 DDL(쓰기 잠금 없이)로 실행합니다.
+    """
+
+    def __init__(self, conn: Connection):
+        self.conn = conn
+        self.dialect = conn.dialect.name
+
+    @property
+    def is_mysql(self) -> bool:
+        return self.dialect == "mysql"
+
+    def execute(self, sql: str, **params):
+        return self.conn.execute(text(sql), params)
+
+    def has_table(self, table: str) -> bool:
+        return inspect(self.conn).has_table(table)
+
+    def has_column(self, table: str, column: str) -> bool:
+        return any(c["name"] == column for c in inspect(self.conn).get_columns(table))
+
+    def column_type(self, table: str, column: str):
+        for c in inspect(self.conn).get_columns(table):
+            if c["name"] == column:
+                return c["type"]
+        return None
+
+    def has_index(self, table: str, name: str) -> bool:
+        inspector = inspect(self.conn)
+        names = {i["name"] for i in inspector.get_indexes(table)}
+        names |= {u["name"] for u in inspector.get_unique_constraints(table)}
+        return name in names
+
+    def has_foreign_key(self, table: str, name: str) -> bool:
+        return any(fk["name"] == name for fk in inspect(self.conn).get_foreign_keys(table))
+
+    def create_tables(self, *tables: str):
+        """models.py 에 정의된 테이블 중 없는 것만 만듭니다. (인자가 없으면 전체)"""
+        from app.db.models import Base
+
+        targets = [Base.metadata.tables[t] for t in tables] if tables else None
+        Base.metadata.create_all(self.conn, tables=targets, checkfirst=True)
+
+    def create_index(self, name: str, table: str, columns: list[str], unique: bool = False):
+        if self.has_index(table, name):
+            logger.info("인덱스가 이미 있어 건너뜀", extra={"index": name, "table": table})
+            return
+        cols = ", ".join(columns)
+        if self.is_mysql:
+            # 인덱스를 만드는 동안에도 읽기/쓰기를 막지 않습니다.
+            kind = "UNIQUE INDEX" if unique else "INDEX"
+            self.execute(f"ALTER TABLE {table} ADD {kind} {name} ({cols}), ALGORITHM=INPLACE, LOCK=NONE")
+        else:
+            self.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX {name} ON {table} ({cols})")
+
+    def drop_index(self, name: str, table: str):
+        if not self.has_index(table, name):
+            return
+        if self.is_mysql:
+            self.execute(f"ALTER TABLE {table} DROP INDEX {name}, ALGORITHM=INPLACE, LOCK=NONE")
+        else:
+            self.execute(f"DROP INDEX {name}")
+
+    def add_column(self, table: str, column: str, ddl: str):
+        """ddl 예: "VARCHAR(512) NULL". MySQL 8 에서는 INSTANT(메타데이터만 변경)로, 안 되면 INPLACE 로 추가합니다."""
+        if self.has_column(table, column):
+            logger.info("컬럼이 이미 있어 건너뜀", extra={"table": table, "column": column})
+            return
+        if not self.is_mysql:
+            self.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+            return
+        try:
+            self.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}, ALGORITHM=INSTANT")
+        except Exception:
+            logger.warning("INSTANT 컬럼 추가 불가, INPLACE 로 재시도", extra={"table": table, "column": column})
+            self.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}, ALGORITHM=INPLACE, LOCK=NONE")
+
+
+def load_revisions() -> list[Revision]:
+    """versions 패키지의 리비전을 버전 순서대로 불러옵니다."""
+    from . import versions
+
+    revisions = []
+    for info in pkgutil.iter_modules(versions.__path__):
+        module = importlib.import_module(f"{versions.__name__}.{info.name}")
+        revisions.append(Revision(module.REVISION, module.DESCRIPTION, module.upgrade))
+    revisions.sort(key=lambda r: r.version)
+
+    expected = list(range(1, len(revisions) + 1))
+    if [r.version for r in revisions] != expected:
+        raise RuntimeError(f"리비전 번호가 1부터 연속되지 않습니다: {[r.version for r in revisions]}")
+    return revisions
+
+
+def head_version() -> int:
+    revisions = load_revisions()
+    return revisions[-1].version if revisions else 0
+
+
+def current_version(conn: Connection) -> int:
+    if not inspect(conn).has_table(schema_migrations.name):
+        return 0
+    return conn.execute(select(func.max(schema_migrations.c.version))).scalar() or 0
+
+
+def check_schema(engine: Engine) -> tuple[int, int]:
+    """(DB 의 현재 버전, 코드의 최신 버전). DDL 은 실행하지 않습니다."""
+    with engine.connect() as conn:
+        return current_version(conn), head_version()
+
+
+@contextmanager
+def _migration_lock(conn: Connection):
+    # 여러 인스턴스가 동시에 배포되어도 마이그레이션은 한 곳에서만 실행되도록 합니다.
+    if conn.dialect.name != "mysql":
+        yield
+        return
+    acquired = conn.execute(text("SELECT GET_LOCK(:name, :timeout)"), {"name": LOCK_NAME, "timeout": LOCK_TIMEOUT_SECONDS}).scalar()
+    if acquired != 1:
+        raise RuntimeError("다른 프로세스가 마이그레이션을 실행 중입니다.")
+    try:
+        yield
+    finally:
+        conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": LOCK_NAME})
+
+
+def upgrade(engine: Engine, target: int | None = None) -> int:
+    """현재 버전 이후의 리비전을 순서대로 적용하고 적용 후 버전을 반환합니다."""
+    revisions = load_revisions()
+    target = target if target is not None else (revisions[-1].version if revisions else 0)
+
+    with engine.connect() as conn:
+        with _migration_lock(conn):
+            _version_metadata.create_all(conn, checkfirst=True)
+            conn.commit()
+            current = current_version(conn)
+            for revision in revisions:
+                if not current < revision.version <= target:
+                    continue
+                logger.info("마이그레이션 적용", extra={"revision": revision.version, "description": revision.description})
+                revision.upgrade(Operations(conn))
+                conn.execute(
+                    schema_migrations.insert().values(
+                        version=revision.version, description=revision.description, applied_at=datetime.utcnow()
+                    )
+                )
+                # MySQL 의 DDL 은 자동 커밋되므로 리비전 단위로 버전을 기록합니다.
+                conn.commit()
+                current = revision.version
+            return current
@@ -0,0 +1,34 @@
+import argparse
+import logging
+import sys
+
+from app.core.logging_config import setup_logging
+from app.db import migrations
+from app.db.database import engine
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m app.db.migrations", description="스키마 마이그레이션")
+    sub = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = sub.add_parser("upgrade", help="최신(또는 지정한) 리비전까지 적용")
+    upgrade_parser.add_argument("--to", type=int, default=None, help="적용할 마지막 리비전 번호")
+    sub.add_parser("current", help="현재 DB 버전과 최신 버전 출력")
+    args = parser.parse_args()
+
+    setup_logging()
+    logging.getLogger("app").setLevel(logging.INFO)
+    try:
+        if args.command == "upgrade":
+            version = migrations.upgrade(engine, target=args.to)
+            print(f"schema version: {version}")
+        else:
+            current, head = migrations.check_schema(engine)
+            print(f"current: {current}, head: {head}")
+            return 0 if current >= head else 1
+        return 0
+    finally:
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
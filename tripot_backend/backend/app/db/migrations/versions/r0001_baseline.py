@@ -0,0 +1,9 @@
+# 기준 스키마: models.py 의 테이블 중 없는 것을 만듭니다.
+# 기존에 create_all 로 만들어진 DB 에서는 아무것도 하지 않고 버전만 기록됩니다.
+
+REVISION = 1
+DESCRIPTION = "baseline tables"
+
+
+def upgrade(op):
+    op.create_tables()
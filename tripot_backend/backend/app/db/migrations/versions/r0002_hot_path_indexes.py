@@ -0,0 +1,37 @@
+# 핫 쿼리용 복합/유니크 인덱스 추가 및 summaries.user_id 타입 수정
+# 적용 후 `python scripts/check_query_plans.py --database-url ...` 로 실행 계획을 확인하세요.
+
+from sqlalchemy import Integer
+
+REVISION = 2
+DESCRIPTION = "hot path indexes, summaries.user_id INT"
+
+
+def _fix_summaries_user_id(op):
+    # VARCHAR -> INT. 타입 변경은 테이블 복사가 필요해 온라인으로 처리되지 않지만,
+    # summaries 는 사용자당 하루 1행이라 작습니다. (sqlite 는 리비전 1 에서 이미 INT 로 만들어짐)
+    if not op.is_mysql or isinstance(op.column_type("summaries", "user_id"), Integer):
+        return
+    # user_id_str 이 들어간 행이 있다면 users.id 로 바꿉니다.
+    op.execute("UPDATE summaries s JOIN users u ON s.user_id = u.user_id_str SET s.user_id = u.id")
+    # 어떤 사용자와도 연결되지 않는 행은 조회 경로(users 조인)에서 보이지 않으므로 정리합니다.
+    op.execute("DELETE s FROM summaries s LEFT JOIN users u ON s.user_id = CAST(u.id AS CHAR) WHERE u.id IS NULL")
+    # (user_id, report_date) 중복은 가장 최근 행만 남깁니다.
+    op.execute(
+        "DELETE s1 FROM summaries s1 "
+        "JOIN summaries s2 ON s1.user_id = s2.user_id AND s1.report_date = s2.report_date AND s1.id < s2.id"
+    )
+    op.execute("ALTER TABLE summaries MODIFY user_id INT NOT NULL")
+    if not op.has_foreign_key("summaries", "fk_summaries_user_id"):
+        op.execute("ALTER TABLE summaries ADD CONSTRAINT fk_summaries_user_id FOREIGN KEY (user_id) REFERENCES users (id)")
+
+
+def upgrade(op):
+    _fix_summaries_user_id(op)
+    op.create_index("uq_summaries_user_report_date", "summaries", ["user_id", "report_date"], unique=True)
+    op.create_index("ix_summaries_user_created", "summaries", ["user_id", "created_at"])
+    op.create_index("ix_family_photos_user_created", "family_photos", ["user_id", "created_at"])
+    op.create_index("ix_photo_comments_photo_created", "photo_comments", ["photo_id", "created_at"])
+    op.create_index("ix_posts_photo_id", "posts", ["photo_id"])
+    op.create_index("ix_conversations_user_created", "conversations", ["user_id", "created_at"])
+    op.create_index("ix_conversations_created", "conversations", ["created_at"])
@@ -0,0 +1,8 @@
+# 백그라운드 작업 상태 테이블 (app/services/job_runner.py)
+
+REVISION = 3
+DESCRIPTION = "jobs table"
+
+
+def upgrade(op):
+    op.create_tables("jobs")
@@ -0,0 +1,8 @@
+# 리포트 재생성 시각 (야간 스케줄러가 이후 대화가 있었는지 판단할 때 사용)
+
+REVISION = 4
+DESCRIPTION = "summaries.updated_at"
+
+
+def upgrade(op):
+    op.add_column("summaries", "updated_at", "DATETIME NULL")
@@ -0,0 +1,9 @@
+# 기억 원문 사본 테이블 (하이브리드 기억 검색의 키워드 색인용)
+# 기존 기억은 다음 기억 정리(memory.compact) 때 Pinecone 에서 읽어 채워집니다.
+
+REVISION = 5
+DESCRIPTION = "memories table"
+
+
+def upgrade(op):
+    op.create_tables("memories")
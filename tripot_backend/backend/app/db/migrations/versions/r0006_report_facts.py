@@ -0,0 +1,19 @@
+# 리포트 주요 항목(report_facts)과 주/월 추이(report_rollups) 테이블
+# 기존 리포트의 facts/rollups 도 여기서 채웁니다. (사용자당 하루 1행이라 한 번에 처리)
+
+from sqlalchemy.orm import Session
+
+REVISION = 6
+DESCRIPTION = "report facts and rollups"
+
+
+def upgrade(op):
+    op.create_tables("report_facts", "report_rollups")
+
+    from app.services import report_facts
+
+    db = Session(bind=op.conn)
+    try:
+        report_facts.backfill(db)
+    finally:
+        db.close()
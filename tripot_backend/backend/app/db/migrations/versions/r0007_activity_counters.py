@@ -0,0 +1,38 @@
+# 홈 화면 통계용 활동 카운터와 어르신 이름 컬럼
+# 기존 데이터의 카운터는 여기서 한 번만 COUNT 로 채우고, 이후로는 쓰기 시점에 더합니다.
+# 답한 질문 수는 직전 AI 메시지가 '?' 로 끝난 사용자 발화 수로 채웁니다. (세션 시작 질문은 DB 에 없어 제외)
+
+REVISION = 7
+DESCRIPTION = "activity counters, users.display_name"
+
+
+def upgrade(op):
+    op.add_column("users", "display_name", "VARCHAR(100) NULL")
+    op.create_tables("activity_counters")
+
+    now = "CURRENT_TIMESTAMP"
+    op.execute("DELETE FROM activity_counters")
+    op.execute(
+        "INSERT INTO activity_counters (user_id, actor, metric, value, updated_at) "
+        f"SELECT user_id, '', 'conversation', COUNT(*), {now} FROM conversations WHERE speaker = 'user' GROUP BY user_id"
+    )
+    op.execute(
+        "INSERT INTO activity_counters (user_id, actor, metric, value, updated_at) "
+        f"SELECT user_id, '', 'question_answered', COUNT(*), {now} FROM ("
+        "  SELECT user_id, speaker,"
+        "         LAG(speaker) OVER (PARTITION BY user_id ORDER BY id) AS prev_speaker,"
+        "         LAG(message) OVER (PARTITION BY user_id ORDER BY id) AS prev_message"
+        "  FROM conversations"
+        ") t WHERE speaker = 'user' AND prev_speaker = 'ai' AND TRIM(prev_message) LIKE '%?' GROUP BY user_id"
+    )
+    op.execute(
+        "INSERT INTO activity_counters (user_id, actor, metric, value, updated_at) "
+        f"SELECT user_id, SUBSTR(COALESCE(uploaded_by, ''), 1, 100), 'photo_upload', COUNT(*), {now} "
+        "FROM family_photos WHERE user_id IS NOT NULL GROUP BY user_id, SUBSTR(COALESCE(uploaded_by, ''), 1, 100)"
+    )
+    op.execute(
+        "INSERT INTO activity_counters (user_id, actor, metric, value, updated_at) "
+        f"SELECT p.user_id, SUBSTR(c.author_name, 1, 100), 'comment', COUNT(*), {now} "
+        "FROM photo_comments c JOIN family_photos p ON c.photo_id = p.id "
+        "WHERE p.user_id IS NOT NULL GROUP BY p.user_id, SUBSTR(c.author_name, 1, 100)"
+    )
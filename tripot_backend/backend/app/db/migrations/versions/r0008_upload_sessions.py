@@ -0,0 +1,8 @@
+# 이어받기 가능한 사진 업로드 세션/조각 테이블
+
+REVISION = 8
+DESCRIPTION = "upload sessions"
+
+
+def upgrade(op):
+    op.create_tables("upload_sessions", "upload_chunks")
@@ -0,0 +1,20 @@
+# 게시글 음성을 파일로 저장하고 경로만 두는 audio_path 컬럼
+# posts.audio_message 에 base64 로 들어 있던 음성은 여기서 uploads/family_audio 로 옮기고 비웁니다. (알림 문구는 그대로)
+
+from sqlalchemy.orm import Session
+
+REVISION = 9
+DESCRIPTION = "posts.audio_path, upload_sessions.audio_path"
+
+
+def upgrade(op):
+    op.add_column("posts", "audio_path", "VARCHAR(512) NULL")
+    op.add_column("upload_sessions", "audio_path", "VARCHAR(512) NULL")
+
+    from app.services import media_store
+
+    db = Session(bind=op.conn)
+    try:
+        media_store.backfill(db)
+    finally:
+        db.close()
@@ -0,0 +1,42 @@
+# 대화 기록 월 파티션(MySQL)과 압축 보관 목록 테이블
+# MySQL 파티션 테이블은 외래 키를 지원하지 않고 파티션 키(created_at)가 기본 키에 들어가야 하므로,
+# users 외래 키를 빼고 기본 키를 (id, created_at) 로 바꾼 뒤 월 RANGE 파티션으로 다시 만듭니다.
+# 테이블 전체를 복사하는 DDL 이라 행이 많으면 오래 걸립니다. 사용량이 적은 시간에 적용하세요.
+
+from datetime import date
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+
+REVISION = 10
+DESCRIPTION = "conversation monthly partitions, conversation_archives"
+
+
+def upgrade(op):
+    op.create_tables("conversation_archives")
+    if not op.is_mysql:
+        return
+
+    from app.core.config import settings
+    from app.services import conversation_archive
+
+    db = Session(bind=op.conn)
+    try:
+        if conversation_archive.list_partitions(db):
+            return
+    finally:
+        db.close()
+
+    for fk in inspect(op.conn).get_foreign_keys("conversations"):
+        op.execute(f"ALTER TABLE conversations DROP FOREIGN KEY {fk['name']}")
+    op.execute("UPDATE conversations SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL")
+    op.execute(
+        "ALTER TABLE conversations MODIFY created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+        "DROP PRIMARY KEY, ADD PRIMARY KEY (id, created_at)"
+    )
+
+    this_month = conversation_archive.month_start(date.today())
+    oldest = op.execute("SELECT MIN(created_at) FROM conversations").scalar()
+    first = conversation_archive.month_start(oldest.date()) if oldest else this_month
+    last = conversation_archive.add_months(this_month, settings.CONVERSATION_PARTITION_MONTHS_AHEAD)
+    op.execute(f"ALTER TABLE conversations {conversation_archive.partition_clause(min(first, this_month), last)}")
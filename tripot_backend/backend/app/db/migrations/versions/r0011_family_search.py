@@ -0,0 +1,21 @@
+# 가족 검색 문서(search_documents)와 sqlite 용 역색인(search_postings)
+# MySQL 은 body 에 ngram FULLTEXT 인덱스를 만들고 역색인은 쓰지 않습니다. 기존 대화/리포트도 여기서 색인합니다.
+
+from sqlalchemy.orm import Session
+
+REVISION = 11
+DESCRIPTION = "family search documents"
+
+
+def upgrade(op):
+    op.create_tables("search_documents", "search_postings")
+    if op.is_mysql and not op.has_index("search_documents", "ft_search_documents_body"):
+        op.execute("ALTER TABLE search_documents ADD FULLTEXT INDEX ft_search_documents_body (body) WITH PARSER ngram")
+
+    from app.services import family_search
+
+    db = Session(bind=op.conn)
+    try:
+        family_search.backfill(db)
+    finally:
+        db.close()
@@ -0,0 +1,8 @@
+# 모델 호출 토큰 사용량 집계 테이블
+
+REVISION = 12
+DESCRIPTION = "llm usage"
+
+
+def upgrade(op):
+    op.create_tables("llm_usage")
@@ -0,0 +1,12 @@
+# 일일 리포트를 만든 입력의 해시/프롬프트 버전/모델/마지막 대화 id
+# 기존 리포트는 비워 두며, 다음 생성 때 한 번 전체를 분석하고 채웁니다.
+
+REVISION = 13
+DESCRIPTION = "summaries input hash"
+
+
+def upgrade(op):
+    op.add_column("summaries", "input_hash", "VARCHAR(64) NULL")
+    op.add_column("summaries", "prompt_version", "VARCHAR(16) NULL")
+    op.add_column("summaries", "model", "VARCHAR(50) NULL")
+    op.add_column("summaries", "last_conversation_id", "INT NULL")
@@ -0,0 +1,9 @@
+# 실행 중인 작업의 임대 만료 시각 (실행기가 주기적으로 연장, 만료된 작업만 다시 대기열에 넣음)
+# 기존 running 작업은 비워 두며, 이때는 started_at 기준으로 만료를 판단합니다.
+
+REVISION = 14
+DESCRIPTION = "jobs.locked_until"
+
+
+def upgrade(op):
+    op.add_column("jobs", "locked_until", "DATETIME NULL")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Date
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, JSON, Date, Float, BigInteger, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -8,11 +8,32 @@ class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, index=True)
     user_id_str = Column(String(255), unique=True, index=True, nullable=False)
+    # 가족 앱 홈 화면에 보이는 어르신 이름 (없으면 "어르신")
+    display_name = Column(String(100))
     
     # ✨ 수정/추가된 부분: 관계 설정 수정
     photos = relationship("FamilyPhoto", back_populates="user")
     comments = relationship("PhotoComment", back_populates="user")
 
+class Conversation(Base):
+    # MySQL 에서는 created_at 기준 월 RANGE 파티션 테이블입니다. (마이그레이션 10)
+    # 파티션 키가 기본 키에 들어가야 해서 DB 의 기본 키는 (id, created_at) 이고, 파티션 테이블은 외래 키를 지원하지 않아
+    # users 외래 키는 DB 에서 빠져 있습니다. (ORM 조인용으로 모델에는 남겨 둠)
+    # 보관 기간이 지난 달은 app/services/conversation_archive.py 가 압축 파일로 옮깁니다.
+    __tablename__ = "conversations"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    speaker = Column(String(10), nullable=False)  # 'user' 또는 'ai'
+    message = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), default=datetime.utcnow)
+
+    __table_args__ = (
+        # 사용자별 일자 범위 조회 (리포트 생성)
+        Index("ix_conversations_user_created", "user_id", "created_at"),
+        # 특정 날짜에 대화한 사용자 목록 조회
+        Index("ix_conversations_created", "created_at"),
+    )
+
 class FamilyPhoto(Base):
     __tablename__ = "family_photos"
     id = Column(Integer, primary_key=True, index=True)
@@ -28,6 +49,9 @@ class FamilyPhoto(Base):
     user = relationship("User", back_populates="photos")
     comments = relationship("PhotoComment", back_populates="photo", cascade="all, delete-orphan")
 
+    # 사용자별 사진 목록 (user_id 필터 + created_at 정렬)
+    __table_args__ = (Index("ix_family_photos_user_created", "user_id", "created_at"),)
+
 # ✨ 수정/추가된 부분: 주석 해제 및 관계 설정 확인
 class PhotoComment(Base):
     __tablename__ = "photo_comments"
@@ -41,6 +65,9 @@ class PhotoComment(Base):
     photo = relationship("FamilyPhoto", back_populates="comments")
     user = relationship("User", back_populates="comments")
 
+    # 사진별 댓글 목록 (photo_id 필터 + created_at 정렬)
+    __table_args__ = (Index("ix_photo_comments_photo_created", "photo_id", "created_at"),)
+
 class Post(Base):
     __tablename__ = "posts"
     id = Column(Integer, primary_key=True, index=True)
@@ -49,19 +76,274 @@ class Post(Base):
     description = Column(Text)
     mentions = Column(Text)
     location = Column(String(255))
+    # 알림용 문구. 음성 자체는 파일로 저장하고 경로만 audio_path 에 둡니다. (app/services/media_store.py)
     audio_message = Column(Text)
+    audio_path = Column(String(512))
     created_at = Column(DateTime(timezone=True), server_default=func.now(), default=datetime.utcnow)
 
     photo = relationship("FamilyPhoto")
     user = relationship("User")
 
+    # 사진 상세 조회 시 family_photos 와 photo_id 로 조인
+    __table_args__ = (Index("ix_posts_photo_id", "photo_id"),)
+
 
 
 class Summary(Base):
     __tablename__ = "summaries"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
-    user_id = Column(String(255), nullable=False)
+    # users.id 와 조인되므로 정수형이어야 인덱스를 탈 수 있습니다. (이전에는 String 이었음)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     summary_json = Column(JSON)  # 👈 이 부분 추가
     report_date = Column(Date)  # 👈 여기 추가
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # 마지막으로 다시 생성한 시각. 이후에 대화가 더 있었다면 야간 재생성 대상입니다.
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # 리포트를 만든 입력 (app/services/report_memo.py). 같은 입력이면 다시 생성하지 않고,
+    # last_conversation_id 이후 대화만 늘었으면 그 대화만 분석해 기존 리포트를 갱신합니다.
+    input_hash = Column(String(64))
+    prompt_version = Column(String(16))
+    model = Column(String(50))
+    last_conversation_id = Column(Integer)
+
+    __table_args__ = (
+        # 사용자별 하루 한 건 (user_id, report_date) 조회/갱신
+        UniqueConstraint("user_id", "report_date", name="uq_summaries_user_report_date"),
+        # 사용자별 최신 리포트 조회 (created_at DESC LIMIT 1)
+        Index("ix_summaries_user_created", "user_id", "created_at"),
+    )
+
+
+class ReportFact(Base):
+    """일일 리포트(summaries.summary_json)에서 뽑아 둔 주요 항목 (app/services/report_facts.py)
+    추이 조회와 홈 화면이 JSON 을 다시 파싱하지 않도록 리포트 저장 시 함께 갱신합니다."""
+    __tablename__ = "report_facts"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    report_date = Column(Date, nullable=False)
+    # positive | neutral | negative (감정 언급이 없으면 NULL)
+    mood = Column(String(10))
+    # positive 1, neutral 0, negative -1
+    mood_score = Column(Integer)
+    health_mention_count = Column(Integer, nullable=False, default=0)
+    item_request_count = Column(Integer, nullable=False, default=0)
+    health_mentions = Column(JSON)
+    requested_items = Column(JSON)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # 사용자별 날짜 범위 조회 / 하루 한 건 갱신
+        UniqueConstraint("user_id", "report_date", name="uq_report_facts_user_date"),
+    )
+
+
+class ReportRollup(Base):
+    """주/월 단위로 미리 합산한 리포트 추이 (report_facts 기준)"""
+    __tablename__ = "report_rollups"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    period = Column(String(10), nullable=False)  # 'week' (월요일 시작) | 'month'
+    period_start = Column(Date, nullable=False)
+    report_days = Column(Integer, nullable=False, default=0)
+    positive_days = Column(Integer, nullable=False, default=0)
+    neutral_days = Column(Integer, nullable=False, default=0)
+    negative_days = Column(Integer, nullable=False, default=0)
+    # 감정 언급이 있었던 날의 mood_score 평균
+    mood_score_avg = Column(Float)
+    health_mention_count = Column(Integer, nullable=False, default=0)
+    item_request_count = Column(Integer, nullable=False, default=0)
+    # [{"name": ..., "count": ...}] 많이 언급된 순
+    top_health_mentions = Column(JSON)
+    top_requested_items = Column(JSON)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "period", "period_start", name="uq_report_rollups_user_period_start"),
+    )
+
+
+class ActivityCounter(Base):
+    """어르신별 활동 누적 수 (app/services/activity_counters.py)
+    대화/사진/댓글을 저장하는 트랜잭션 안에서 더해 두어, 홈 화면이 COUNT(*) 없이 한 번에 읽습니다."""
+    __tablename__ = "activity_counters"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # 어르신 users.id (사진/댓글은 사진 주인 기준)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # 가족 구성원 이름 (uploaded_by / author_name). 어르신 본인의 활동은 빈 문자열
+    actor = Column(String(100), nullable=False, default="")
+    # conversation | question_answered | photo_upload | comment
+    metric = Column(String(30), nullable=False)
+    value = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # 증가(upsert) 대상 행 찾기 / 어르신별 전체 조회
+        UniqueConstraint("user_id", "actor", "metric", name="uq_activity_counters_user_actor_metric"),
+    )
+
+
+class UploadSession(Base):
+    """이어받기 가능한 사진 업로드 (app/services/upload_sessions.py)
+    파일은 생성 시 최종 위치에 만들어 두고 조각(chunk)을 해당 위치에 바로 씁니다."""
+    __tablename__ = "upload_sessions"
+
+    id = Column(String(36), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    uploaded_by = Column(String(50))
+    original_name = Column(String(255))
+    filename = Column(String(255), nullable=False)
+    file_path = Column(String(512), nullable=False)
+    total_size = Column(Integer, nullable=False)
+    chunk_size = Column(Integer, nullable=False)
+    total_chunks = Column(Integer, nullable=False)
+    # 완료 시 Post 로 옮길 게시글 정보
+    description = Column(Text)
+    mentions = Column(Text)
+    location = Column(String(255))
+    audio_message = Column(Text)
+    audio_path = Column(String(512))
+    status = Column(String(20), nullable=False, default="uploading")  # uploading | completed
+    photo_id = Column(Integer, ForeignKey("family_photos.id"))
+    post_id = Column(Integer)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        # 오래된 미완료 업로드 정리
+        Index("ix_upload_sessions_status_updated", "status", "updated_at"),
+    )
+
+
+class UploadChunk(Base):
+    """받은 조각 번호. 같은 조각을 다시 보내도 한 행입니다."""
+    __tablename__ = "upload_chunks"
+
+    upload_id = Column(String(36), ForeignKey("upload_sessions.id"), primary_key=True)
+    chunk_index = Column(Integer, primary_key=True, autoincrement=False)
+    size = Column(Integer, nullable=False)
+    received_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class Job(Base):
+    """백그라운드 작업 상태 (app/services/job_runner.py)"""
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    queue = Column(String(50), nullable=False)
+    name = Column(String(100), nullable=False)
+    payload = Column(JSON)
+    status = Column(String(20), nullable=False, default="queued")  # queued | running | succeeded | failed
+    # 같은 키의 작업이 대기/실행 중이면 새로 만들지 않습니다.
+    dedup_key = Column(String(255))
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    last_error = Column(Text)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    # 실행 중인 작업의 임대 만료 시각. 실행기가 주기적으로 연장하며, 지나면 중단된 작업으로 보고 다시 대기열에 넣습니다.
+    locked_until = Column(DateTime)
+    finished_at = Column(DateTime)
+
+    __table_args__ = (
+        # 큐별 실행 대상 조회 (status='queued' AND run_after <= now)
+        Index("ix_jobs_queue_status_run_after", "queue", "status", "run_after"),
+        Index("ix_jobs_dedup_key", "dedup_key"),
+    )
+
+
+class Memory(Base):
+    """Pinecone 에 저장한 기억의 원문 사본 (app/services/memory_search.py 의 키워드 검색용)"""
+    __tablename__ = "memories"
+
+    # Pinecone 벡터 id
+    id = Column(String(64), primary_key=True)
+    # Pinecone 메타데이터의 user_id 와 같은 값 (users.user_id_str)
+    user_id = Column(String(255), nullable=False)
+    memory_type = Column(String(20), nullable=False)
+    text = Column(Text, nullable=False)
+    # Pinecone 메타데이터의 timestamp (epoch 초)
+    timestamp = Column(Integer, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_memories_user_timestamp", "user_id", "timestamp"),
+    )
+
+
+class ConversationArchive(Base):
+    """conversations 에서 옮긴 달의 압축 파일(JSONL.gz)과 사용자별 위치 색인 파일"""
+    __tablename__ = "conversation_archives"
+
+    # 해당 달 1일
+    month = Column(Date, primary_key=True)
+    file_path = Column(String(512), nullable=False)
+    index_path = Column(String(512), nullable=False)
+    row_count = Column(Integer, nullable=False)
+    user_count = Column(Integer, nullable=False)
+    # 파일에 담긴 가장 큰 conversations.id (이보다 큰 행은 파일 작성 이후에 들어온 것)
+    max_id = Column(Integer, nullable=False)
+    file_size = Column(Integer, nullable=False)
+    sha256 = Column(String(64), nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class SearchDocument(Base):
+    """가족 검색용 문서. 대화 한 턴(어르신 발화 + AI 응답) 또는 일일 리포트 하나 (app/services/family_search.py)
+    MySQL 은 body 에 ngram FULLTEXT 인덱스를 둡니다. (마이그레이션 11, 파티션 테이블인 conversations 에는 둘 수 없음)"""
+    __tablename__ = "search_documents"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    doc_type = Column(String(20), nullable=False)  # conversation | report
+    # conversation: 어르신 발화의 conversations.id, report: summaries.id
+    source_id = Column(Integer, nullable=False)
+    body = Column(Text, nullable=False)
+    report_date = Column(Date)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("doc_type", "source_id", name="uq_search_documents_source"),
+        # 사용자별 최신순 (검색어 없이 최근 문서 / 커서 페이지)
+        Index("ix_search_documents_user_id", "user_id", "id"),
+    )
+
+
+class SearchPosting(Base):
+    """MySQL 이 아닐 때(sqlite) 쓰는 역색인. 사용자별 토큰 → 문서"""
+    __tablename__ = "search_postings"
+
+    user_id = Column(Integer, primary_key=True, autoincrement=False)
+    token = Column(String(64), primary_key=True)
+    document_id = Column(Integer, primary_key=True, autoincrement=False)
+
+    __table_args__ = (
+        # 리포트 재색인 시 문서의 토큰 삭제
+        Index("ix_search_postings_document", "document_id"),
+    )
+
+
+class LlmUsage(Base):
+    """날짜(UTC)/호출 위치/모델별 모델 호출 토큰 합계 (app/services/llm_usage.py)
+    호출마다 쓰지 않고 메모리에 모았다가 LLM_USAGE_FLUSH_SECONDS 마다 더합니다."""
+    __tablename__ = "llm_usage"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    day = Column(Date, nullable=False)
+    # chat_turn | memory_summary | memory_compaction | embedding | memory_query | report | report_chunk ...
+    call_site = Column(String(50), nullable=False)
+    model = Column(String(100), nullable=False)
+    calls = Column(Integer, nullable=False, default=0)
+    prompt_tokens = Column(BigInteger, nullable=False, default=0)
+    completion_tokens = Column(BigInteger, nullable=False, default=0)
+    # 응답에 usage 가 없어 로컬에서 센 호출 수
+    estimated_calls = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("day", "call_site", "model", name="uq_llm_usage_day_site_model"),
+    )
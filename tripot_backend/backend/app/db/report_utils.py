@@ -1,96 +1,120 @@
 # app/db/report_utils.py
 # 리포트 생성을 위한 별도 유틸리티 함수들
 
-from datetime import date, datetime
+from datetime import date, datetime, time, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+def day_range(target_date: date):
+    """해당 날짜의 [00:00, 다음날 00:00) 범위를 반환합니다.
+    func.date(created_at) == 날짜 비교는 인덱스를 탈 수 없으므로 범위 조건으로 바꿔 사용합니다."""
+    start = datetime.combine(target_date, time.min)
+    return start, start + timedelta(days=1)
 
 def get_all_user_ids_for_today():
     """오늘 대화한 모든 사용자 ID를 반환합니다."""
+    return get_user_ids_for_date(date.today())
+
+def get_user_ids_for_date(target_date: date):
+    """해당 날짜에 대화한 모든 사용자 ID를 반환합니다."""
     # 동적 import로 순환 참조 문제 해결
     from .database import SessionLocal
     from .models import User, Conversation
+    from app.services import conversation_archive
     
     db: Session = SessionLocal()
     try:
-        today = date.today()
-        print(f"🔍 {today} 날짜의 대화 사용자를 찾는 중...")
-        
-        # 오늘 날짜에 대화한 사용자들의 ID를 가져옵니다
+        start, end = day_range(target_date)
+        # 해당 날짜에 대화한 사용자들의 ID를 가져옵니다
         user_ids = db.query(User.user_id_str).join(Conversation).filter(
-            func.date(Conversation.created_at) == today
+            Conversation.created_at >= start,
+            Conversation.created_at < end
         ).distinct().all()
         
         # 튜플에서 문자열로 변환
         result = [user_id[0] for user_id in user_ids]
-        print(f"✅ 오늘 대화한 사용자 {len(result)}명 발견: {result}")
+        # 보관 기간이 지나 압축 파일로 옮긴 달이면 파일 색인에서도 찾습니다.
+        archived_ids = conversation_archive.archived_user_ids(db, target_date)
+        if archived_ids:
+            archived = db.query(User.user_id_str).filter(User.id.in_(archived_ids)).all()
+            result += sorted({user_id[0] for user_id in archived} - set(result))
+        logger.info("대화한 사용자 조회 완료", extra={"report_date": str(target_date), "count": len(result)})
         return result
-    except Exception as e:
-        print(f"❌ 사용자 조회 오류: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("사용자 조회 오류")
         return []
     finally:
         db.close()
 
+def format_conversation(turns) -> str:
+    """(id, speaker, message) 목록을 리포트 입력 문자열로 조합합니다."""
+    conversation_text = ""
+    for _, speaker, message in turns:
+        speaker = "사용자" if speaker == "user" else "AI"
+        conversation_text += f"{speaker}: {message}\n"
+    return conversation_text.strip()
+
 def fetch_daily_conversations(user_id_str: str, target_date: date):
     """특정 날짜의 사용자 대화를 가져옵니다."""
+    turns = fetch_daily_turns(user_id_str, target_date)
+    return format_conversation(turns) if turns else None
+
+def fetch_daily_turns(user_id_str: str, target_date: date):
+    """특정 날짜의 사용자 대화를 시간 순서의 (conversations.id, speaker, message) 목록으로 가져옵니다."""
     # 동적 import로 순환 참조 문제 해결
     from .database import SessionLocal
     from .models import User, Conversation
+    from app.services import conversation_archive
     
     db: Session = SessionLocal()
     try:
-        print(f"🔍 {user_id_str} 사용자의 {target_date} 대화를 조회 중...")
-        
         # 사용자 찾기
         user = db.query(User).filter(User.user_id_str == user_id_str).first()
         if not user:
-            print(f"❌ 사용자를 찾을 수 없음: {user_id_str}")
+            logger.warning("사용자를 찾을 수 없음", extra={"user_id": user_id_str})
             return None
         
-        # 해당 날짜의 대화 가져오기
+        # 해당 날짜의 대화 가져오기 (ix_conversations_user_created 사용)
+        start, end = day_range(target_date)
         conversations = db.query(Conversation).filter(
             Conversation.user_id == user.id,
-            func.date(Conversation.created_at) == target_date
+            Conversation.created_at >= start,
+            Conversation.created_at < end
         ).order_by(Conversation.created_at).all()
+        conversations = [(conv.id, conv.speaker, conv.message) for conv in conversations]
+        # 압축 파일로 옮긴 달이면 파일에서 읽어 합칩니다. (app/services/conversation_archive.py)
+        if conversation_archive.get_archive(db, target_date) is not None:
+            archived = conversation_archive.archived_conversations(db, user.id, start, end)
+            conversations = [(record["id"], record["speaker"], record["message"]) for record in archived] + conversations
         
         if not conversations:
-            print(f"❌ {target_date} 날짜의 대화가 없음")
+            logger.info("해당 날짜의 대화가 없음", extra={"user_id": user_id_str, "report_date": str(target_date)})
             return None
         
-        print(f"✅ {len(conversations)}개의 대화 발견")
-        
-        # 대화 내용을 문자열로 조합
-        conversation_text = ""
-        for conv in conversations:
-            speaker = "사용자" if conv.speaker == "user" else "AI"
-            conversation_text += f"{speaker}: {conv.message}\n"
-        
-        return conversation_text.strip()
-    except Exception as e:
-        print(f"❌ 대화 조회 오류: {e}")
-        import traceback
-        traceback.print_exc()
+        return conversations
+    except Exception:
+        logger.exception("대화 조회 오류", extra={"user_id": user_id_str})
         return None
     finally:
         db.close()
 
-def save_summary_to_db(user_id_str: str, target_date: date, summary_data: dict):
-    """요약 데이터를 DB에 저장합니다."""
+def save_summary_to_db(user_id_str: str, target_date: date, summary_data: dict, memo: dict | None = None):
+    """요약 데이터를 DB에 저장합니다.
+    memo 는 리포트를 만든 입력의 해시/프롬프트 버전/모델/마지막 대화 id 입니다. (app/services/report_memo.py)
+    없이 저장하면 입력을 알 수 없으므로 비워 두어 다음 생성 때 전체를 다시 분석합니다."""
     # 동적 import로 순환 참조 문제 해결
     from .database import SessionLocal
     from .models import User, Summary
     
     db: Session = SessionLocal()
     try:
-        print(f"💾 {user_id_str}의 {target_date} 요약을 DB에 저장 중...")
-        
         # 사용자 찾기
         user = db.query(User).filter(User.user_id_str == user_id_str).first()
         if not user:
-            print(f"❌ 사용자를 찾을 수 없습니다: {user_id_str}")
+            logger.warning("사용자를 찾을 수 없습니다", extra={"user_id": user_id_str})
             return False
         
         # 기존 요약이 있는지 확인
@@ -102,7 +126,9 @@ def save_summary_to_db(user_id_str: str, target_date: date, summary_data: dict):
         if existing_summary:
             # 기존 요약 업데이트
             existing_summary.summary_json = summary_data
-            print(f"✅ 기존 요약 업데이트: {user_id_str} - {target_date}")
+            existing_summary.updated_at = datetime.utcnow()
+            summary = existing_summary
+            logger.info("기존 요약 업데이트", extra={"user_id": user_id_str, "report_date": str(target_date)})
         else:
             # 새 요약 생성
             new_summary = Summary(
@@ -111,14 +137,23 @@ def save_summary_to_db(user_id_str: str, target_date: date, summary_data: dict):
                 summary_json=summary_data
             )
             db.add(new_summary)
-            print(f"✅ 새 요약 생성: {user_id_str} - {target_date}")
+            summary = new_summary
+            logger.info("새 요약 생성", extra={"user_id": user_id_str, "report_date": str(target_date)})
+        from app.services import report_memo
+        report_memo.apply(summary, memo)
+
+        # 추이 조회용 주요 항목과 주/월 합계, 가족 검색 색인을 같은 트랜잭션에서 갱신합니다.
+        from app.services import family_search, report_facts
+        report_facts.save_facts(db, user.id, target_date, summary_data)
+        family_search.index_report(db, user.id, summary, summary_data)
         
         db.commit()
+        # 가족 앱에 리포트 갱신 알림
+        from app.services import family_events
+        family_events.publish(user.id, family_events.EVENT_REPORT_UPDATED, report_date=str(target_date))
         return True
-    except Exception as e:
-        print(f"❌ DB 저장 오류: {e}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("DB 저장 오류", extra={"user_id": user_id_str})
         db.rollback()
         return False
     finally:
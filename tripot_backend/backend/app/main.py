@@ -1,28 +1,114 @@
-print("🔥🔥🔥 MAIN.PY 시작! 🔥🔥🔥")
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
+from sqlalchemy import text
 
-print("🔥 IMPORTS 완료")
-from app.db import models
+from app.core import metrics, serialization, tokens
+from app.core.config import settings
+from app.core.logging_config import setup_logging
+from app.db import migrations
 from app.db.database import engine
 from app.api.v1.api import api_router
+from app.services import ai_service, conversation_archive, job_runner, llm_usage, memory_compaction, report_scheduler, upload_sessions, vector_db
 
-print("🔥 API 라우터 임포트 완료")
-from app.db import models
-from app.db.database import engine
-from app.api.v1.api import api_router
+setup_logging()
+logger = logging.getLogger(__name__)
+
+# 서버 준비 상태 (readiness 확인용)
+startup_state = {"schema_ready": False, "schema_error": None, "schema_version": None}
+SCHEMA_RETRY_INTERVAL_SECONDS = 5
+
+
+def _check_schema():
+    # DDL 은 실행하지 않고 DB 의 스키마 버전만 확인합니다. (적용은 python -m app.db.migrations upgrade)
+    current, head = migrations.check_schema(engine)
+    startup_state["schema_version"] = current
+    if current < head:
+        raise RuntimeError(f"스키마 버전이 낮습니다 (현재 {current}, 필요 {head}). 마이그레이션을 먼저 적용하세요.")
+
+
+def _ping_db():
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
 
-import os
 
-# 서버 시작 시 models.py에 정의된 모든 테이블을 DB에 생성합니다.
-models.Base.metadata.create_all(bind=engine)
+async def _schedule_periodic_jobs():
+    # 이미 예약되어 있으면 같은 작업을 그대로 둡니다. (여러 인스턴스가 동시에 기동해도 한 건)
+    periodic = []
+    if settings.REPORT_SCHEDULER_ENABLED:
+        periodic.append(("report.nightly", report_scheduler.schedule_nightly))
+    if settings.MEMORY_COMPACTION_ENABLED:
+        periodic.append(("memory.compact_all", memory_compaction.schedule_compaction))
+    periodic.append(("upload.cleanup", upload_sessions.schedule_cleanup))
+    if settings.CONVERSATION_ARCHIVE_ENABLED:
+        periodic.append(("conversation.archive", conversation_archive.schedule_archive))
+    for name, schedule in periodic:
+        try:
+            job_id = await asyncio.to_thread(schedule)
+            logger.info("주기 작업 예약", extra={"job": name, "job_id": job_id})
+        except Exception as e:
+            logger.error("주기 작업 예약 실패", extra={"job": name, "error": str(e) or type(e).__name__})
+
+
+async def _check_schema_in_background():
+    """DB가 늦게 뜨거나 마이그레이션이 아직 적용되지 않았더라도 서버 기동을 막지 않도록 백그라운드에서 재확인합니다."""
+    while not startup_state["schema_ready"]:
+        try:
+            await asyncio.wait_for(asyncio.to_thread(_check_schema), timeout=settings.STARTUP_SCHEMA_TIMEOUT_SECONDS)
+            startup_state["schema_ready"] = True
+            startup_state["schema_error"] = None
+            logger.info("DB 스키마 확인 완료", extra={"schema_version": startup_state["schema_version"]})
+            if settings.JOB_RUNNER_ENABLED:
+                await _schedule_periodic_jobs()
+        except Exception as e:
+            startup_state["schema_error"] = str(e) or type(e).__name__
+            logger.error("DB 스키마 확인 실패, 재시도 예정", extra={"error": startup_state["schema_error"], "retry_in": SCHEMA_RETRY_INTERVAL_SECONDS})
+            await asyncio.sleep(SCHEMA_RETRY_INTERVAL_SECONDS)
+
+
+async def _load_tokenizers():
+    """토큰 예산에 쓰는 토크나이저를 미리 불러 둡니다. (요청 처리 중에는 내려받지 않고, 불러오기 전에는 추정값 사용)"""
+    models = [settings.CHAT_MODEL_LARGE, settings.CHAT_MODEL_SMALL, ai_service.REPORT_MODEL, ai_service.EMBEDDING_MODEL]
+    loaded = await asyncio.to_thread(tokens.load_encodings, models)
+    logger.info("토크나이저 준비", extra={"loaded": loaded})
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # OpenAI/Pinecone 클라이언트는 처음 사용할 때 생성되므로 여기서는 DB 스키마만 확인합니다.
+    schema_task = asyncio.create_task(_check_schema_in_background())
+    tokenizer_task = asyncio.create_task(_load_tokenizers())
+    # 백그라운드 작업 실행기 (jobs 테이블이 아직 없으면 조회 오류를 기록하며 재시도합니다)
+    if settings.JOB_RUNNER_ENABLED:
+        await job_runner.runner.start()
+    # 모델 호출 토큰 사용량을 주기적으로 llm_usage 에 저장 (종료 시 남은 사용량도 저장)
+    usage_task = asyncio.create_task(llm_usage.flush_periodically())
+    yield
+    if job_runner.runner.started:
+        await job_runner.runner.stop()
+    usage_task.cancel()
+    try:
+        await usage_task
+    except asyncio.CancelledError:
+        pass
+    schema_task.cancel()
+    tokenizer_task.cancel()
+    engine.dispose()
 
 
 app = FastAPI(
     title="Tripot API",
     description="트라이팟 서비스의 통합 API 서버입니다.",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    # dict 응답은 orjson 으로, Accept: application/msgpack 요청은 MessagePack 으로 직렬화합니다.
+    default_response_class=serialization.NegotiatedResponse,
 )
 
 # 현재 파일(main.py)의 경로를 기준으로 uploads 경로 지정
@@ -44,6 +130,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 요청별 응답 형식(JSON/MessagePack) 선택
+app.add_middleware(serialization.NegotiationMiddleware)
+
 # '/api/v1' 경로로 들어오는 모든 요청을 api_router에게 위임합니다.
 app.include_router(api_router, prefix="/api/v1")
 
@@ -52,3 +141,38 @@ app.include_router(api_router, prefix="/api/v1")
 def read_root():
     return {"message": "Welcome to Tripot Integrated Backend!"}
 
+# 프로세스 생존 확인 (liveness) - 외부 의존성을 확인하지 않습니다.
+@app.get("/health", tags=["Default"])
+def liveness():
+    return {"status": "ok"}
+
+# 트래픽 수신 가능 여부 확인 (readiness) - DB 연결과 스키마 준비 상태를 짧은 타임아웃으로 확인합니다.
+@app.get("/ready", tags=["Default"])
+async def readiness():
+    checks = {"schema": startup_state["schema_ready"], "database": False}
+    try:
+        await asyncio.wait_for(asyncio.to_thread(_ping_db), timeout=settings.READINESS_TIMEOUT_SECONDS)
+        checks["database"] = True
+    except Exception as e:
+        logger.warning("readiness DB 확인 실패", extra={"error": str(e) or type(e).__name__})
+
+    ready = checks["schema"] and checks["database"]
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "checks": checks,
+            "schema_error": startup_state["schema_error"],
+            "schema_version": startup_state["schema_version"],
+            # 지연 초기화되는 외부 클라이언트의 현재 상태 (준비 여부 판단에는 사용하지 않음)
+            "lazy_clients": {
+                "openai": ai_service.is_client_initialized(),
+                "pinecone": vector_db.is_initialized(),
+            },
+        },
+    )
+
+# Prometheus 형식의 지표 (단계별 지연 히스토그램 등)
+@app.get("/metrics", tags=["Default"])
+def read_metrics():
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
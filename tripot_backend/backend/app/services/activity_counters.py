@@ -0,0 +1,90 @@
+import logging
+from datetime import datetime
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.db.models import ActivityCounter
+
+logger = logging.getLogger(__name__)
+
+# 홈 화면 통계/랭킹용 활동 카운터
+# 대화, 사진 업로드, 댓글을 저장할 때 같은 트랜잭션에서 (어르신, 가족 구성원, 항목) 행을 더하거나 빼서
+# 조회 시에는 어르신 한 명의 행 몇 개만 읽습니다. 같은 행을 동시에 더해도 잃지 않도록 DB 에서 upsert 로 더합니다.
+
+METRIC_CONVERSATION = "conversation"
+METRIC_QUESTION_ANSWERED = "question_answered"
+METRIC_PHOTO_UPLOAD = "photo_upload"
+METRIC_COMMENT = "comment"
+
+SENIOR_ACTOR = ""
+
+# 가족 랭킹 점수
+RANKING_WEIGHTS = {METRIC_PHOTO_UPLOAD: 10, METRIC_COMMENT: 5}
+RANKING_SIZE = 3
+
+
+def _upsert(db: Session, values: dict, amount: int):
+    table = ActivityCounter.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table).values(**values).on_duplicate_key_update(
+            value=table.c.value + amount, updated_at=values["updated_at"]
+        )
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table).values(**values).on_conflict_do_update(
+            index_elements=["user_id", "actor", "metric"],
+            set_={"value": table.c.value + amount, "updated_at": values["updated_at"]},
+        )
+    else:
+        result = db.execute(
+            update(table)
+            .where(table.c.user_id == values["user_id"], table.c.actor == values["actor"], table.c.metric == values["metric"])
+            .values(value=table.c.value + amount, updated_at=values["updated_at"])
+        )
+        if result.rowcount:
+            return
+        stmt = table.insert().values(**values)
+    db.execute(stmt)
+
+
+def increment(db: Session, user_id: int, metric: str, actor: str = SENIOR_ACTOR, amount: int = 1):
+    """db 의 현재 트랜잭션에 카운터 증가를 더합니다. 커밋은 호출하는 쪽에서 합니다."""
+    values = {
+        "user_id": user_id,
+        "actor": (actor or SENIOR_ACTOR)[:100],
+        "metric": metric,
+        "value": amount,
+        "updated_at": datetime.utcnow(),
+    }
+    _upsert(db, values, amount)
+
+
+def get_counters(db: Session, user_id: int) -> dict[tuple[str, str], int]:
+    """어르신의 전체 카운터 {(actor, metric): value}"""
+    rows = db.query(ActivityCounter.actor, ActivityCounter.metric, ActivityCounter.value)\
+             .filter(ActivityCounter.user_id == user_id)\
+             .all()
+    return {(actor, metric): value for actor, metric, value in rows}
+
+
+def home_stats(counters: dict[tuple[str, str], int]) -> dict:
+    """홈 화면 stats: 어르신 대화 수, 가족 사진 업로드 수, 어르신이 답한 질문 수"""
+    photo_uploads = sum(v for (actor, metric), v in counters.items() if metric == METRIC_PHOTO_UPLOAD)
+    return {
+        "contact": counters.get((SENIOR_ACTOR, METRIC_CONVERSATION), 0),
+        "visit": photo_uploads,
+        "question_answered": counters.get((SENIOR_ACTOR, METRIC_QUESTION_ANSWERED), 0),
+    }
+
+
+def family_ranking(counters: dict[tuple[str, str], int]) -> list[dict]:
+    """가족 구성원별 사진 업로드/댓글 점수 상위 목록"""
+    scores: dict[str, int] = {}
+    for (actor, metric), value in counters.items():
+        if actor != SENIOR_ACTOR and metric in RANKING_WEIGHTS:
+            scores[actor] = scores.get(actor, 0) + value * RANKING_WEIGHTS[metric]
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:RANKING_SIZE]
+    return [{"name": name, "score": score} for name, score in ranked if score > 0]
@@ -1,140 +1,223 @@
 import openai  # 오타 수정
-import asyncio
 import json
+import logging
 import os
 import base64
 import tempfile
+import time
 
+from app.core import admission, resilience, tokens
 from app.core.config import settings
+from app.core.metrics import span
+from app.core.prompts import load_prompt_file
 # 순환 참조(Circular Dependency)를 피하기 위해, 이 파일에서는 다른 서비스 파일을 직접 import하지 않습니다.
 
-# OpenAI 클라이언트 초기화
-client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+logger = logging.getLogger(__name__)
+
+# OpenAI 클라이언트는 처음 사용할 때 생성합니다. (import 시점에는 아무 작업도 하지 않음)
+_client: openai.OpenAI | None = None
+
+def get_client() -> openai.OpenAI:
+    """OpenAI 클라이언트를 최초 사용 시점에 생성하여 반환합니다."""
+    global _client
+    if _client is None:
+        _client = openai.OpenAI(api_key=settings.OPENAI_API_KEY, timeout=settings.OPENAI_TIMEOUT_SECONDS)
+    return _client
+
+def _report_client() -> openai.OpenAI:
+    """일일 리포트 호출용 클라이언트. 입력이 길고 JSON 을 끝까지 생성해야 해서 대화용 OPENAI_TIMEOUT_SECONDS 대신
+    REPORT_TIMEOUT_SECONDS 를 씁니다. (작업 실행기에서 실행되므로 대화 응답을 기다리게 하지 않음)"""
+    return get_client().with_options(timeout=settings.REPORT_TIMEOUT_SECONDS)
+
+def set_client(client):
+    """OpenAI 클라이언트를 교체합니다. (벤치마크에서 가짜 클라이언트를 주입할 때 사용)"""
+    global _client
+    _client = client
+
+def is_client_initialized() -> bool:
+    """OpenAI 클라이언트 생성 여부를 반환합니다."""
+    return _client is not None
 
 # --- 1. Core AI Utilities (기존과 유사) ---
 
-async def get_embedding(text: str) -> list[float]:
-    """텍스트를 받아 임베딩 벡터를 반환합니다."""
-    response = await asyncio.to_thread(
-        client.embeddings.create, input=text, model="text-embedding-3-small"
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+async def get_embedding(text: str, call_site: str = "embedding") -> list[float]:
+    """텍스트를 받아 임베딩 벡터를 반환합니다. 모델 입력 한도를 넘는 텍스트는 앞부분만 씁니다."""
+    text = tokens.truncate(text, settings.EMBEDDING_MAX_TOKENS, EMBEDDING_MODEL)
+    response = await resilience.call_upstream(
+        "openai_embedding", get_client().embeddings.create, input=text, model=EMBEDDING_MODEL
     )
+    tokens.record_usage(call_site, EMBEDDING_MODEL, response, prompt_text=text)
     return response.data[0].embedding
 
 async def get_transcript_from_audio(audio_file_path: str) -> str:
     """오디오 파일 경로를 받아 STT(Speech-to-Text) 결과를 반환합니다."""
     with open(audio_file_path, "rb") as audio_file:
-        transcript_response = await asyncio.to_thread(
-            client.audio.transcriptions.create, model="whisper-1", file=audio_file, language="ko"
+        transcript_response = await resilience.call_upstream(
+            "openai_stt", get_client().audio.transcriptions.create, model="whisper-1", file=audio_file, language="ko"
         )
     return transcript_response.text
 
-async def get_ai_chat_completion(prompt: str, model: str = "gpt-4o", max_tokens: int = 150, temperature: float = 0.7) -> str:
-    """주어진 프롬프트에 대한 AI 챗봇의 응답을 반환합니다."""
+CHAT_SYSTEM_MESSAGE = "당신은 주어진 규칙과 페르소나를 완벽하게 따르는 AI 어시스턴트입니다."
+
+async def get_ai_chat_completion(prompt: str, model: str = "gpt-4o", max_tokens: int = 150, temperature: float = 0.7,
+                                 call_site: str = "chat") -> str:
+    """주어진 프롬프트에 대한 AI 챗봇의 응답을 반환합니다. 토큰 사용량은 call_site 별로 집계합니다."""
     messages = [
-        {"role": "system", "content": "당신은 주어진 규칙과 페르소나를 완벽하게 따르는 AI 어시스턴트입니다."},
+        {"role": "system", "content": CHAT_SYSTEM_MESSAGE},
         {"role": "user", "content": prompt}
     ]
-    chat_response = await asyncio.to_thread(
-        client.chat.completions.create,
+    # 모델별로 장애가 따로 날 수 있어 서킷도 모델별로 둡니다. (큰 모델 차단 시 작은 모델로 대체 가능)
+    chat_response = await resilience.call_upstream(
+        f"openai_chat:{model}",
+        get_client().chat.completions.create,
         model=model,
         messages=messages,
         max_tokens=max_tokens,
         temperature=temperature
     )
-    return chat_response.choices[0].message.content
+    content = chat_response.choices[0].message.content
+    tokens.record_usage(call_site, model, chat_response, prompt_text=CHAT_SYSTEM_MESSAGE + prompt, completion_text=content)
+    return content
 
 # --- 2. Main Real-time Conversation Logic (핵심 로직 이동) ---
 
-def _load_talk_prompt():
-    """prompts/talk_prompts.json 파일을 안전하게 읽어오는 헬퍼 함수"""
-    # 🔧 파일명 수정: talk_prompts.json (s 추가)
-    possible_paths = [
-        '/backend/prompts/talk_prompts.json',
-        os.path.join(os.path.dirname(__file__), '..', '..', 'prompts', 'talk_prompts.json'),
-        './prompts/talk_prompts.json'
-    ]
-    
-    for path in possible_paths:
+def get_prompts_config() -> dict | None:
+    """talk_prompts.json 의 main_chat_prompt 설정을 처음 사용할 때 읽어옵니다."""
+    try:
+        return load_prompt_file('talk_prompts.json')['main_chat_prompt']
+    except Exception:
+        logger.exception("AI 서비스 프롬프트 로드 실패")
+        return None
+
+def _build_chat_prompt(prompts_config: dict, relevant_memories: str, user_message: str) -> str:
+    """페르소나/규칙/예시/기억/현재 발화를 하나의 대화 프롬프트로 조합합니다."""
+    system_message = "\n".join(prompts_config['system_message_base'])
+    core_rules = "\n".join(prompts_config['core_conversation_rules'])
+    guidelines = "\n".join(prompts_config['guidelines_and_reactions'])
+    prohibitions = "\n".join(prompts_config['strict_prohibitions'])
+    examples_text = "\n\n".join([f"상황: {ex['situation']}\n사용자 입력: {ex['user_input']}\nAI 응답: {ex['ai_response']}" for ex in prompts_config['examples']])
+    memories_text = relevant_memories if relevant_memories else "이전 대화 기록이 없습니다."
+
+    # 토큰 예산: 기억은 CHAT_MEMORY_MAX_TOKENS 까지(관련도 순이라 앞부분을 남김), 전체가 CHAT_PROMPT_MAX_TOKENS 를 넘으면
+    # 대화 예시 → 기억 → 사용자 발화 순으로 줄입니다. 페르소나/규칙은 줄이지 않습니다.
+    memories_text = tokens.truncate(memories_text, settings.CHAT_MEMORY_MAX_TOKENS)
+    texts, _ = tokens.fit_sections([
+        tokens.Section("rules", "\n".join((system_message, core_rules, guidelines, prohibitions)), required=True),
+        tokens.Section("user_message", user_message, priority=50, min_tokens=200),
+        tokens.Section("memories", memories_text, priority=20),
+        tokens.Section("examples", examples_text, priority=10),
+    ], settings.CHAT_PROMPT_MAX_TOKENS, call_site="chat_turn")
+    examples_text, memories_text, user_message = texts["examples"], texts["memories"], texts["user_message"]
+
+    return f"""# 페르소나\n{system_message}\n# 핵심 대화 규칙\n{core_rules}\n# 응답 가이드라인\n{guidelines}\n# 절대 금지사항\n{prohibitions}\n# 성공적인 대화 예시\n{examples_text}\n---\n이제 실제 대화를 시작합니다.\n--- 과거 대화 핵심 기억 ---\n{memories_text}\n--------------------\n현재 사용자 메시지: "{user_message}"\nAI 답변:"""
+
+# 시간 예산을 넘기거나 외부 API 가 차단/과부하여서 답을 만들지 못했을 때 보내는 짧은 안내
+HOLDING_REPLY = "죄송해요, 제가 잠깐 생각이 늦어지네요. 다시 한 번 말씀해 주시겠어요?"
+
+async def _search_memories_within_budget(vector_db, user_id: str, user_message: str) -> str:
+    """기억 검색은 예산을 넘기거나 실패하면 건너뜁니다. (기억 없이 응답)"""
+    if not vector_db:
+        return ""
+    try:
+        return await resilience.run_stage(
+            "memory", settings.MEMORY_BUDGET_SECONDS, vector_db.search_memories(user_id, user_message)
+        )
+    except Exception as e:
+        logger.warning("기억 검색 실패 (무시)", extra={"user_id": user_id, "error": str(e) or type(e).__name__})
+        return ""
+
+async def _complete_within_budget(model_router, user_id: str, final_prompt: str, route) -> str:
+    """응답 생성. 예산 초과/실패 시 남은 시간이 충분하면 작은 모델로 한 번 더 시도하고, 아니면 안내 응답을 돌려줍니다."""
+    for stage, decision in (("completion", route), ("completion_fallback", model_router.fallback_for(route))):
+        if decision is None:
+            break
+        if stage == "completion_fallback":
+            left = resilience.time_left()
+            if left is not None and left < settings.COMPLETION_FALLBACK_MIN_SECONDS:
+                break
         try:
-            print(f"🔍 AI 서비스에서 프롬프트 파일 시도: {path}")
-            with open(path, 'r', encoding='utf-8') as f:
-                data = json.load(f)['main_chat_prompt']
-                print(f"✅ AI 서비스 프롬프트 로드 성공: {path}")
-                return data
+            started_at = time.perf_counter()
+            with span(stage, tier=decision.tier):
+                ai_response = await resilience.run_stage(
+                    stage,
+                    settings.COMPLETION_BUDGET_SECONDS,
+                    get_ai_chat_completion(final_prompt, model=decision.model, max_tokens=decision.max_tokens, call_site="chat_turn"),
+                )
+            model_router.record_latency(decision, time.perf_counter() - started_at)
+            return ai_response
         except Exception as e:
-            print(f"❌ AI 서비스 프롬프트 로드 실패 ({path}): {e}")
-            continue
-    
-    print("❌ AI 서비스에서 모든 경로 실패, None 반환")
-    return None
+            logger.error("AI 응답 생성 실패", extra={"user_id": user_id, "model": decision.model, "error": str(e) or type(e).__name__})
+    return HOLDING_REPLY
 
-PROMPTS_CONFIG = _load_talk_prompt()
-
-async def process_user_audio(user_id: str, audio_base64: str):
+async def process_user_audio(user_id: str, audio: str | bytes, on_transcript=None):
     """
     사용자의 음성 데이터를 받아 처리하고, AI의 최종 응답을 생성하는 전체 과정을 담당합니다.
     (기존 main.py의 process_audio_and_get_response 로직을 이곳으로 이동)
+    audio 는 base64 문자열(텍스트 프레임) 또는 원본 바이트(바이너리 프레임)입니다.
+    on_transcript가 주어지면 음성 인식 결과가 확정되는 즉시 호출합니다. (필러 응답용)
+    턴 전체는 TURN_DEADLINE_SECONDS 안에 끝나며, 단계별 예산을 넘기면 기억 검색 생략 → 작은 모델 → 안내 응답 순으로 줄여 응답합니다.
     """
     try:
-        print(f"🎵 AI 서비스 시작: {user_id}")
-        print(f"🎵 받은 오디오 크기: {len(audio_base64)} bytes")
+        logger.debug("AI 서비스 시작", extra={"user_id": user_id, "audio_size": len(audio)})
         
         # 🔧 vector_db 임포트를 try-catch로 안전하게 처리
         try:
-            from . import vector_db_service as vector_db
-            print("✅ vector_db 임포트 성공")
+            from . import vector_db
         except ImportError:
-            print("❌ vector_db 임포트 실패, 기억 검색 없이 진행")
+            logger.warning("vector_db 임포트 실패, 기억 검색 없이 진행")
             vector_db = None
+        from . import model_router
 
         # 🔧 오디오 파일 처리
-        audio_data = base64.b64decode(audio_base64)
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_audio:
-            temp_audio.write(audio_data)
-            temp_audio_path = temp_audio.name
+        with span("decode"):
+            audio_data = audio if isinstance(audio, bytes) else base64.b64decode(audio)
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_audio:
+                temp_audio.write(audio_data)
+                temp_audio_path = temp_audio.name
         
         try:
-            # 🔧 음성 인식 시도
-            try:
-                user_message = await get_transcript_from_audio(temp_audio_path)
-                print(f"✅ 음성 인식 결과: {user_message}")
-            except Exception as e:
-                print(f"❌ 음성 인식 실패: {str(e)}")
-                # 음성 인식 실패 시 임시 메시지 사용
-                user_message = "안녕하세요"
-            
-            if not user_message.strip() or "시청해주셔서 감사합니다" in user_message:
-                return None, "음, 잘 알아듣지 못했어요. 혹시 다시 한번 말씀해주시겠어요?"
-            
-            # 🔧 벡터 DB 기억 검색 (안전하게 처리)
-            relevant_memories = ""
-            if vector_db:
+            with resilience.turn_deadline(settings.TURN_DEADLINE_SECONDS):
+                # 🔧 음성 인식 시도
                 try:
-                    relevant_memories = await vector_db.search_memories(user_id, user_message)
-                    print(f"✅ 기억 검색 완료")
+                    with span("stt"):
+                        user_message = await resilience.run_stage(
+                            "stt", settings.STT_BUDGET_SECONDS, get_transcript_from_audio(temp_audio_path)
+                        )
+                    logger.info("음성 인식 완료", extra={"user_id": user_id, "chars": len(user_message)})
+                except (resilience.BudgetExceeded, resilience.CircuitOpenError, admission.Overloaded) as e:
+                    # 무엇을 말씀하셨는지 모르므로 안내 응답만 보냅니다.
+                    logger.warning("음성 인식 지연/차단", extra={"user_id": user_id, "error": str(e)})
+                    return None, HOLDING_REPLY
                 except Exception as e:
-                    print(f"❌ 기억 검색 실패 (무시): {str(e)}")
-                    relevant_memories = ""
-            
-            # 🔧 프롬프트 구성
-            if not PROMPTS_CONFIG:
-                print("❌ 프롬프트 설정 없음, 기본 응답 사용")
-                return user_message, "대화 프롬프트 설정 파일을 불러올 수 없어 기본 응답을 드립니다."
+                    logger.error("음성 인식 실패", extra={"user_id": user_id, "error": str(e)})
+                    # 음성 인식 실패 시 임시 메시지 사용
+                    user_message = "안녕하세요"
+                
+                if not user_message.strip() or "시청해주셔서 감사합니다" in user_message:
+                    return None, "음, 잘 알아듣지 못했어요. 혹시 다시 한번 말씀해주시겠어요?"
 
-            system_message = "\n".join(PROMPTS_CONFIG['system_message_base'])
-            examples_text = "\n\n".join([f"상황: {ex['situation']}\n사용자 입력: {ex['user_input']}\nAI 응답: {ex['ai_response']}" for ex in PROMPTS_CONFIG['examples']])
-            
-            final_prompt = f"""# 페르소나\n{system_message}\n# 핵심 대화 규칙\n{"\n".join(PROMPTS_CONFIG['core_conversation_rules'])}\n# 응답 가이드라인\n{"\n".join(PROMPTS_CONFIG['guidelines_and_reactions'])}\n# 절대 금지사항\n{"\n".join(PROMPTS_CONFIG['strict_prohibitions'])}\n# 성공적인 대화 예시\n{examples_text}\n---\n이제 실제 대화를 시작합니다.\n--- 과거 대화 핵심 기억 ---\n{relevant_memories if relevant_memories else "이전 대화 기록이 없습니다."}\n--------------------\n현재 사용자 메시지: "{user_message}"\nAI 답변:"""
-            
-            # 🔧 AI 응답 생성
-            try:
-                ai_response = await get_ai_chat_completion(final_prompt)
-                print(f"✅ AI 응답 생성 완료: {ai_response[:50]}...")
-            except Exception as e:
-                print(f"❌ AI 응답 생성 실패: {str(e)}")
-                ai_response = "죄송합니다. 잠시 문제가 있었어요. 다시 말씀해 주세요."
-            
-            return user_message, ai_response
+                if on_transcript:
+                    await on_transcript(user_message)
+                
+                # 🔧 벡터 DB 기억 검색 (예산 초과/실패 시 생략)
+                relevant_memories = await _search_memories_within_budget(vector_db, user_id, user_message)
+                
+                # 🔧 프롬프트 구성
+                prompts_config = get_prompts_config()
+                if not prompts_config:
+                    logger.error("프롬프트 설정 없음, 기본 응답 사용")
+                    return user_message, "대화 프롬프트 설정 파일을 불러올 수 없어 기본 응답을 드립니다."
+
+                with span("prompt_build"):
+                    final_prompt = _build_chat_prompt(prompts_config, relevant_memories, user_message)
+                
+                # 🔧 AI 응답 생성 (발화 복잡도에 따라 모델 티어 선택, 예산 초과 시 작은 모델/안내 응답)
+                route = model_router.route_turn(user_message, relevant_memories)
+                ai_response = await _complete_within_budget(model_router, user_id, final_prompt, route)
+                
+                return user_message, ai_response
             
         finally:
             # 임시 파일 정리
@@ -143,48 +226,102 @@ async def process_user_audio(user_id: str, audio_base64: str):
             except:
                 pass
                 
-    except Exception as e:
-        print(f"❌ AI 서비스 전체 오류: {str(e)}")
-        import traceback
-        print(f"❌ 상세 오류: {traceback.format_exc()}")
+    except Exception:
+        logger.exception("AI 서비스 전체 오류", extra={"user_id": user_id})
         return None, "죄송합니다. 음성 처리 중 문제가 발생했어요. 다시 말씀해 주세요."
 
 # --- 3. Report Generation Logic (for background scripts) ---
 
 def _get_report_prompt():
-    """prompts/report_prompt.json 파일을 읽어오는 헬퍼 함수"""
-    prompt_file_path = os.path.join(os.path.dirname(__file__), '..', '..', 'prompts', 'report_prompt.json')
+    """prompts/report_prompts.json 파일을 읽어오는 헬퍼 함수"""
     try:
-        with open(prompt_file_path, 'r', encoding='utf-8') as f:
-            return json.load(f).get("report_analysis_prompt")
+        return load_prompt_file('report_prompts.json').get("report_analysis_prompt")
     except Exception as e:
-        print(f"❌ report_prompt.json 파일을 불러오는 데 실패했습니다: {e}")
+        logger.error("report_prompts.json 파일을 불러오는 데 실패했습니다", extra={"error": str(e)})
         return None
 
+REPORT_MODEL = "gpt-4o"
+REPORT_CHUNK_PROMPT = """다음은 어르신과 AI 의 하루 대화 중 일부야. 나중에 하루 전체 리포트를 만들 수 있도록 시간 순서대로 간결하게 정리해줘.
+규칙: 감정 표현, 건강/통증/복약 언급, 필요하거나 요청한 물건, 일정, 가족/지인 이름과 장소 같은 고유명사는 빠뜨리지 말고 어르신 표현 그대로 남겨줘.
+
+--- 대화 ---
+{chunk}
+------------
+
+정리:"""
+
+def _fit_report_input(conversation_text: str) -> str:
+    """하루 대화가 REPORT_INPUT_MAX_TOKENS 를 넘으면 조각별로 작은 모델로 먼저 정리해 이어 붙입니다.
+    정리한 결과도 넘치면 앞뒤를 남기고 가운데를 줄입니다."""
+    if tokens.count_tokens(conversation_text, REPORT_MODEL) <= settings.REPORT_INPUT_MAX_TOKENS:
+        return conversation_text
+    chunks = tokens.chunk_lines(conversation_text, settings.REPORT_CHUNK_TOKENS, settings.CHAT_MODEL_SMALL)
+    logger.info("리포트 입력이 길어 나눠서 정리", extra={"chunks": len(chunks)})
+    notes = []
+    for number, chunk in enumerate(chunks, 1):
+        prompt = REPORT_CHUNK_PROMPT.format(chunk=chunk)
+        completion = _report_client().chat.completions.create(
+            model=settings.CHAT_MODEL_SMALL,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=settings.REPORT_CHUNK_NOTE_MAX_TOKENS,
+            temperature=0.2,
+        )
+        note = completion.choices[0].message.content or ""
+        tokens.record_usage("report_chunk", settings.CHAT_MODEL_SMALL, completion, prompt_text=prompt, completion_text=note)
+        notes.append(f"[대화 {number}/{len(chunks)} 정리]\n{note.strip()}")
+    return tokens.truncate("\n\n".join(notes), settings.REPORT_INPUT_MAX_TOKENS, REPORT_MODEL, keep="middle")
+
+def _report_system_prompt(report_prompt_template: dict, update: bool = False) -> str:
+    persona = report_prompt_template.get('persona', '당신은 전문 대화 분석 AI입니다.')
+    instructions = report_prompt_template.get('instructions', [])
+    if update:
+        instructions = instructions + report_prompt_template.get('update_instructions', [])
+    instructions = "\n".join(instructions)
+    output_format_example = json.dumps(report_prompt_template.get('OUTPUT_FORMAT', {}), ensure_ascii=False, indent=2)
+    return f"{persona}\n\n### 지시사항\n{instructions}\n\n### 출력 형식\n모든 결과는 아래와 같은 JSON 형식으로만 출력해야 합니다. 추가 설명이나 인사말 등 JSON 외의 텍스트는 절대 포함하지 마세요.\n{output_format_example}"
+
+def _complete_report(call_site: str, system_prompt: str, user_prompt: str) -> dict:
+    completion = _report_client().chat.completions.create(
+        model=REPORT_MODEL,
+        response_format={"type": "json_object"},
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+    )
+    content = completion.choices[0].message.content
+    tokens.record_usage(call_site, REPORT_MODEL, completion, prompt_text=system_prompt + user_prompt, completion_text=content)
+    return json.loads(content)
+
 def generate_summary_report(conversation_text: str) -> dict | None:
-    """대화 내용을 분석하여 JSON 형식의 리포트를 생성합니다 (동기 방식)."""
+    """대화 내용을 분석하여 JSON 형식의 리포트를 생성합니다 (동기 방식).
+    입력이 REPORT_INPUT_MAX_TOKENS 를 넘으면 나눠서 먼저 정리합니다. (_fit_report_input)"""
     
     report_prompt_template = _get_report_prompt()
     if not conversation_text or not report_prompt_template:
         return None
 
-    persona = report_prompt_template.get('persona', '당신은 전문 대화 분석 AI입니다.')
-    instructions = "\n".join(report_prompt_template.get('instructions', []))
-    output_format_example = json.dumps(report_prompt_template.get('OUTPUT_FORMAT', {}), ensure_ascii=False, indent=2)
+    system_prompt = _report_system_prompt(report_prompt_template)
+    try:
+        conversation_text = _fit_report_input(conversation_text)
+        user_prompt = f"### 분석할 대화 전문\n---\n{conversation_text}\n---"
+        return _complete_report("report", system_prompt, user_prompt)
+    except Exception:
+        logger.exception("AI 리포트 생성 중 오류 발생")
+        return None
 
-    system_prompt = f"{persona}\n\n### 지시사항\n{instructions}\n\n### 출력 형식\n모든 결과는 아래와 같은 JSON 형식으로만 출력해야 합니다. 추가 설명이나 인사말 등 JSON 외의 텍스트는 절대 포함하지 마세요.\n{output_format_example}"
-    user_prompt = f"### 분석할 대화 전문\n---\n{conversation_text}\n---"
+def update_summary_report(previous_report: dict, added_conversation_text: str) -> dict | None:
+    """같은 날 이미 만든 리포트에 이후 추가된 대화만 분석해 반영합니다 (동기 방식). 전체 대화를 다시 보내지 않습니다."""
+    report_prompt_template = _get_report_prompt()
+    if not added_conversation_text or not report_prompt_template:
+        return None
 
+    system_prompt = _report_system_prompt(report_prompt_template, update=True)
     try:
-        completion = client.chat.completions.create(
-            model="gpt-4o", 
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ]
-        )
-        return json.loads(completion.choices[0].message.content)
-    except Exception as e:
-        print(f"AI 리포트 생성 중 오류 발생: {e}")
-        return None
\ No newline at end of file
+        added_conversation_text = _fit_report_input(added_conversation_text)
+        previous_json = json.dumps(previous_report, ensure_ascii=False)
+        user_prompt = f"### 기존 리포트\n{previous_json}\n\n### 추가된 대화\n---\n{added_conversation_text}\n---"
+        return _complete_report("report_update", system_prompt, user_prompt)
+    except Exception:
+        logger.exception("AI 리포트 갱신 중 오류 발생")
+        return None
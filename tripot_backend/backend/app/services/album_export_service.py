@@ -0,0 +1,244 @@
+import hashlib
+import logging
+import os
+import re
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.db.models import FamilyPhoto, User
+
+logger = logging.getLogger(__name__)
+
+# 앨범 ZIP 스트리밍
+# - 사진은 이미 압축된 형식이라 STORED(무압축)로 담습니다. 그래서 파일 크기만으로 전체 ZIP 크기와
+#   각 바이트 위치를 미리 계산할 수 있고, Content-Length / Range(이어받기) 를 지원합니다.
+# - CRC32 는 파일 데이터 뒤의 data descriptor 와 central directory 에만 들어가므로
+#   파일을 보내면서 계산합니다. (임시 ZIP 파일 없이 일정한 메모리로 전송)
+# - 같은 사진 목록이면 항상 같은 바이트열이 나오도록 순서/이름/시각을 고정합니다. (ETag 로 If-Range 확인)
+
+CHUNK_SIZE = 256 * 1024
+# ZIP64 는 지원하지 않으므로 4GB 미만만 허용합니다. (더 크면 기간을 나눠 요청)
+MAX_ARCHIVE_BYTES = 0xFFFFFFFF
+
+_LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+_DATA_DESCRIPTOR = struct.Struct("<IIII")
+_CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+_END_OF_CENTRAL_DIR = struct.Struct("<IHHHHIIH")
+_FLAGS = 0x0008 | 0x0800  # data descriptor 사용, 파일 이름 UTF-8
+_VERSION = 20
+
+EXPORT_BYTES = metrics.counter("tripot_album_export_bytes_total", "앨범 ZIP 으로 전송한 바이트 수")
+
+
+class ArchiveTooLarge(Exception):
+    pass
+
+
+def _dos_datetime(value: datetime | None) -> tuple[int, int]:
+    if value is None or value.year < 1980:
+        return 0, (1 << 5) | 1  # 1980-01-01 00:00
+    dos_time = (value.hour << 11) | (value.minute << 5) | (value.second // 2)
+    dos_date = ((value.year - 1980) << 9) | (value.month << 5) | value.day
+    return dos_time, dos_date
+
+
+def _entry_name(photo: FamilyPhoto) -> str:
+    folder = photo.created_at.strftime("%Y-%m-%d") if photo.created_at else "unknown"
+    original = os.path.basename((photo.original_name or photo.filename).replace("\\", "/"))
+    original = re.sub(r"[\x00-\x1f]", "_", original) or photo.filename
+    return f"{folder}/{photo.id}_{original}"
+
+
+# 이어받기 요청 때 앞부분 파일의 CRC 를 다시 읽지 않도록 (경로, 크기, 수정시각) 기준으로 보관합니다.
+_crc_cache: OrderedDict[tuple, int] = OrderedDict()
+_crc_lock = threading.Lock()
+_CRC_CACHE_MAX = 10_000
+
+
+def _cached_crc(key: tuple) -> int | None:
+    with _crc_lock:
+        return _crc_cache.get(key)
+
+
+def _store_crc(key: tuple, crc: int):
+    with _crc_lock:
+        _crc_cache[key] = crc
+        _crc_cache.move_to_end(key)
+        while len(_crc_cache) > _CRC_CACHE_MAX:
+            _crc_cache.popitem(last=False)
+
+
+@dataclass
+class ArchiveEntry:
+    path: str
+    name: bytes
+    size: int
+    mtime_ns: int
+    dos_time: int
+    dos_date: int
+    header_offset: int = 0
+
+    @property
+    def cache_key(self) -> tuple:
+        return (self.path, self.size, self.mtime_ns)
+
+    def local_header(self) -> bytes:
+        return _LOCAL_HEADER.pack(
+            0x04034B50, _VERSION, _FLAGS, 0, self.dos_time, self.dos_date, 0, self.size, self.size, len(self.name), 0
+        ) + self.name
+
+    def crc(self) -> int:
+        crc = _cached_crc(self.cache_key)
+        if crc is None:
+            crc = 0
+            with open(self.path, "rb") as f:
+                while chunk := f.read(CHUNK_SIZE):
+                    crc = zlib.crc32(chunk, crc)
+            _store_crc(self.cache_key, crc)
+        return crc
+
+
+@dataclass
+class AlbumArchive:
+    entries: list[ArchiveEntry]
+    # (길이, 종류, 항목) 목록. 종류: header | data | descriptor | central | end
+    parts: list[tuple[int, str, ArchiveEntry | None]] = field(default_factory=list)
+    total_size: int = 0
+    etag: str = ""
+
+    def __post_init__(self):
+        offset = 0
+        for entry in self.entries:
+            entry.header_offset = offset
+            for length, kind in (
+                (_LOCAL_HEADER.size + len(entry.name), "header"),
+                (entry.size, "data"),
+                (_DATA_DESCRIPTOR.size, "descriptor"),
+            ):
+                self.parts.append((length, kind, entry))
+                offset += length
+        self.central_offset = offset
+        for entry in self.entries:
+            length = _CENTRAL_HEADER.size + len(entry.name)
+            self.parts.append((length, "central", entry))
+            offset += length
+        self.central_size = offset - self.central_offset
+        self.parts.append((_END_OF_CENTRAL_DIR.size, "end", None))
+        self.total_size = offset + _END_OF_CENTRAL_DIR.size
+        if self.total_size > MAX_ARCHIVE_BYTES or len(self.entries) > 0xFFFF:
+            raise ArchiveTooLarge()
+
+        digest = hashlib.blake2b(digest_size=12)
+        for entry in self.entries:
+            digest.update(entry.name + b"\0" + f"{entry.size}:{entry.mtime_ns}".encode() + b"\0")
+        self.etag = f'"{digest.hexdigest()}"'
+
+    def _render(self, kind: str, entry: ArchiveEntry | None) -> bytes:
+        if kind == "header":
+            return entry.local_header()
+        if kind == "descriptor":
+            return _DATA_DESCRIPTOR.pack(0x08074B50, entry.crc(), entry.size, entry.size)
+        if kind == "central":
+            return _CENTRAL_HEADER.pack(
+                0x02014B50, _VERSION, _VERSION, _FLAGS, 0, entry.dos_time, entry.dos_date,
+                entry.crc(), entry.size, entry.size, len(entry.name), 0, 0, 0, 0, 0, entry.header_offset,
+            ) + entry.name
+        return _END_OF_CENTRAL_DIR.pack(
+            0x06054B50, 0, 0, len(self.entries), len(self.entries), self.central_size, self.central_offset, 0
+        )
+
+    def _iter_file(self, entry: ArchiveEntry, start: int, end: int):
+        """파일의 [start, end) 구간을 pread 로 나눠 읽습니다. 파일 전체를 보내는 경우 CRC 도 함께 계산합니다."""
+        compute_crc = start == 0 and end == entry.size and _cached_crc(entry.cache_key) is None
+        crc = 0
+        fd = os.open(entry.path, os.O_RDONLY)
+        try:
+            position = start
+            while position < end:
+                chunk = os.pread(fd, min(CHUNK_SIZE, end - position), position)
+                if not chunk:
+                    raise IOError(f"파일이 전송 중 짧아졌습니다: {entry.path}")
+                if compute_crc:
+                    crc = zlib.crc32(chunk, crc)
+                position += len(chunk)
+                yield chunk
+        finally:
+            os.close(fd)
+        if compute_crc:
+            _store_crc(entry.cache_key, crc)
+
+    def iter_bytes(self, start: int = 0, end: int | None = None):
+        """ZIP 바이트열의 [start, end] (양 끝 포함) 구간을 생성합니다."""
+        end = self.total_size - 1 if end is None else end
+        offset = 0
+        for length, kind, entry in self.parts:
+            part_start, part_end = offset, offset + length
+            offset = part_end
+            if part_end <= start or length == 0:
+                continue
+            if part_start > end:
+                break
+            lo, hi = max(start, part_start) - part_start, min(end + 1, part_end) - part_start
+            if kind == "data":
+                for chunk in self._iter_file(entry, lo, hi):
+                    EXPORT_BYTES.inc(len(chunk))
+                    yield chunk
+            else:
+                chunk = self._render(kind, entry)[lo:hi]
+                EXPORT_BYTES.inc(len(chunk))
+                yield chunk
+
+
+def build_album(db: Session, user: User, start: date | None = None, end: date | None = None) -> AlbumArchive:
+    """기간(양 끝 포함) 안의 사진으로 ZIP 배치를 계산합니다. 디스크에 없는 파일은 제외합니다."""
+    query = db.query(FamilyPhoto).filter(FamilyPhoto.user_id == user.id)
+    if start:
+        query = query.filter(FamilyPhoto.created_at >= datetime.combine(start, datetime.min.time()))
+    if end:
+        query = query.filter(FamilyPhoto.created_at < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+    photos = query.order_by(FamilyPhoto.created_at.asc(), FamilyPhoto.id.asc()).all()
+
+    entries = []
+    for photo in photos:
+        try:
+            stat = os.stat(photo.file_path)
+        except OSError:
+            logger.warning("앨범 내보내기: 파일 없음", extra={"photo_id": photo.id, "path": photo.file_path})
+            continue
+        dos_time, dos_date = _dos_datetime(photo.created_at)
+        entries.append(ArchiveEntry(
+            path=photo.file_path,
+            name=_entry_name(photo).encode("utf-8"),
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            dos_time=dos_time,
+            dos_date=dos_date,
+        ))
+    return AlbumArchive(entries)
+
+
+def parse_range(header: str | None, total_size: int) -> tuple[int, int] | None:
+    """단일 'bytes=' 범위만 지원합니다. 없거나 여러 구간이면 None(전체 전송), 만족할 수 없으면 ValueError."""
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first == "":
+            length = int(last)
+            if length <= 0:
+                raise ValueError(header)
+            return max(total_size - length, 0), total_size - 1
+        start = int(first)
+        end = int(last) if last else total_size - 1
+    except ValueError:
+        raise ValueError(header)
+    if start >= total_size or end < start:
+        raise ValueError(header)
+    return start, min(end, total_size - 1)
@@ -1,7 +1,11 @@
+import logging
 from sqlalchemy.orm import Session
 from app.db import models
+from app.services import activity_counters, family_events, photo_view_service
 from fastapi import HTTPException
 
+logger = logging.getLogger(__name__)
+
 class CommentService:
     @staticmethod
     def create_comment(db: Session, photo_id: int, user_id: int, author_name: str, comment_text: str) -> models.PhotoComment:
@@ -20,9 +24,14 @@ class CommentService:
             comment_text=comment_text
         )
         db.add(db_comment)
+        # 랭킹은 사진 주인(어르신) 기준으로 집계합니다.
+        if db_photo.user_id is not None:
+            activity_counters.increment(db, db_photo.user_id, activity_counters.METRIC_COMMENT, actor=author_name)
         db.commit()
         db.refresh(db_comment)
-        print(f"✅ 댓글 DB 저장 완료: comment_id={db_comment.id} on photo_id={photo_id}")
+        photo_view_service.invalidate(photo_id)
+        family_events.publish(db_photo.user_id, family_events.EVENT_COMMENTS_CHANGED, photo_id=photo_id)
+        logger.info("댓글 DB 저장 완료", extra={"comment_id": db_comment.id, "photo_id": photo_id})
         return db_comment
 
     @staticmethod
@@ -36,7 +45,7 @@ class CommentService:
             raise HTTPException(status_code=404, detail="사진을 찾을 수 없습니다.")
         
         comments = db.query(models.PhotoComment).filter(models.PhotoComment.photo_id == photo_id).order_by(models.PhotoComment.created_at.asc()).all()
-        print(f"✅ photo_id={photo_id}의 댓글 {len(comments)}개 조회 완료")
+        logger.debug("댓글 조회 완료", extra={"photo_id": photo_id, "count": len(comments)})
         return comments
 
     @staticmethod
@@ -58,7 +67,9 @@ class CommentService:
         db_comment.comment_text = new_comment_text
         db.commit()
         db.refresh(db_comment)
-        print(f"✅ 댓글 수정 완료: comment_id={comment_id}")
+        photo_view_service.invalidate(db_comment.photo_id)
+        family_events.publish(db_comment.photo.user_id, family_events.EVENT_COMMENTS_CHANGED, photo_id=db_comment.photo_id)
+        logger.info("댓글 수정 완료", extra={"comment_id": comment_id})
         return db_comment
 
     @staticmethod
@@ -77,7 +88,13 @@ class CommentService:
             raise HTTPException(status_code=403, detail="본인이 작성한 댓글만 삭제할 수 있습니다.")
         
         # 댓글 삭제
+        photo_id = db_comment.photo_id
+        family_id = db_comment.photo.user_id
+        if family_id is not None:
+            activity_counters.increment(db, family_id, activity_counters.METRIC_COMMENT, actor=db_comment.author_name, amount=-1)
         db.delete(db_comment)
         db.commit()
-        print(f"✅ 댓글 삭제 완료: comment_id={comment_id}")
+        photo_view_service.invalidate(photo_id)
+        family_events.publish(family_id, family_events.EVENT_COMMENTS_CHANGED, photo_id=photo_id)
+        logger.info("댓글 삭제 완료", extra={"comment_id": comment_id})
         return True
\ No newline at end of file
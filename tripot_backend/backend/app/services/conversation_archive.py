@@ -0,0 +1,318 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.db.models import Conversation, ConversationArchive
+from app.services import job_runner
+
+logger = logging.getLogger(__name__)
+
+# 대화 기록 월 단위 보관
+# conversations 는 음성 대화 한 턴마다 두 행씩 쌓입니다. 최근 CONVERSATION_RETENTION_MONTHS 개월만 테이블에 두고,
+# 그 이전 달은 매일 새벽 작업이 압축 파일로 옮긴 뒤 지웁니다.
+#  - MySQL: created_at 기준 월 RANGE 파티션 (마이그레이션 10). 옮긴 달은 DROP PARTITION 으로 한 번에 지우고,
+#    앞으로 쓸 달의 파티션은 CONVERSATION_PARTITION_MONTHS_AHEAD 개월 앞까지 미리 만들어 둡니다.
+#  - 그 외(sqlite 등): 같은 월 단위로 나눠 배치 DELETE
+# 압축 파일: {CONVERSATION_ARCHIVE_DIR}/YYYY-MM.jsonl.gz
+#  - 사용자별로 gzip 멤버를 나눠 이어 붙였습니다. (zcat 으로 전체를 읽을 수 있는 일반 JSONL.gz)
+#  - YYYY-MM.index.json 에 사용자별 (위치, 길이, 행 수, 대화한 날짜)를 두어, 한 사용자의 하루를 읽을 때 그 멤버만 풉니다.
+# report_utils 의 날짜별 조회는 옮긴 달이면 이 파일에서 읽어 합칩니다.
+
+JOB_ARCHIVE = "conversation.archive"
+
+TABLE = "conversations"
+MAX_PARTITION = "pmax"
+DELETE_BATCH_SIZE = 5000
+EXPORT_BATCH_SIZE = 5000
+
+ARCHIVED_ROWS = metrics.counter("tripot_conversation_archived_rows_total", "압축 파일로 옮긴 대화 행 수")
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_range(month: date) -> tuple[datetime, datetime]:
+    """해당 달의 [1일 00:00, 다음 달 1일 00:00)"""
+    return datetime.combine(month, datetime.min.time()), datetime.combine(add_months(month, 1), datetime.min.time())
+
+
+def retention_start(today: date | None = None) -> date | None:
+    """테이블에 남기는 가장 오래된 달. 이보다 이전 달을 옮깁니다. (보관 개월 수가 0 이하면 옮기지 않음)"""
+    if settings.CONVERSATION_RETENTION_MONTHS <= 0:
+        return None
+    return add_months(month_start(today or date.today()), -(settings.CONVERSATION_RETENTION_MONTHS - 1))
+
+
+# --- MySQL 월 파티션 ---
+
+def partition_name(month: date) -> str:
+    return f"p{month:%Y%m}"
+
+
+def _partition_definition(month: date) -> str:
+    return f"PARTITION {partition_name(month)} VALUES LESS THAN ('{add_months(month, 1):%Y-%m-%d} 00:00:00')"
+
+
+def partition_clause(first_month: date, last_month: date) -> str:
+    """first_month ~ last_month 의 월 파티션과 그 이후를 받는 pmax 파티션 정의 (마이그레이션 10)"""
+    definitions = []
+    month = first_month
+    while month <= last_month:
+        definitions.append(_partition_definition(month))
+        month = add_months(month, 1)
+    definitions.append(f"PARTITION {MAX_PARTITION} VALUES LESS THAN (MAXVALUE)")
+    return f"PARTITION BY RANGE COLUMNS(created_at) ({', '.join(definitions)})"
+
+
+def list_partitions(db: Session) -> list[str]:
+    """conversations 의 파티션 이름. 파티션 테이블이 아니면 빈 목록입니다."""
+    if db.get_bind().dialect.name != "mysql":
+        return []
+    rows = db.execute(text(
+        "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_NAME IS NOT NULL "
+        "ORDER BY PARTITION_ORDINAL_POSITION"
+    ), {"table": TABLE}).all()
+    return [row[0] for row in rows]
+
+
+def ensure_partitions(db: Session, today: date | None = None) -> int:
+    """앞으로 쓸 달의 파티션을 미리 만듭니다. 비어 있는 pmax 를 나누므로 데이터 이동이 없습니다. 만든 개수를 반환합니다."""
+    partitions = list_partitions(db)
+    months = [datetime.strptime(name[1:], "%Y%m").date() for name in partitions if name != MAX_PARTITION]
+    if not months:
+        return 0
+    target = add_months(month_start(today or date.today()), settings.CONVERSATION_PARTITION_MONTHS_AHEAD)
+    new_months = []
+    month = add_months(max(months), 1)
+    while month <= target:
+        new_months.append(month)
+        month = add_months(month, 1)
+    if not new_months:
+        return 0
+    definitions = [_partition_definition(m) for m in new_months]
+    definitions.append(f"PARTITION {MAX_PARTITION} VALUES LESS THAN (MAXVALUE)")
+    db.execute(text(f"ALTER TABLE {TABLE} REORGANIZE PARTITION {MAX_PARTITION} INTO ({', '.join(definitions)})"))
+    logger.info("대화 월 파티션 추가", extra={"partitions": [partition_name(m) for m in new_months]})
+    return len(new_months)
+
+
+# --- 압축 파일로 옮기기 ---
+
+def _archive_paths(month: date) -> tuple[str, str]:
+    base = os.path.join(settings.CONVERSATION_ARCHIVE_DIR, f"{month:%Y-%m}")
+    return f"{base}.jsonl.gz", f"{base}.index.json"
+
+
+def _write_atomic(path: str, write):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _export(db: Session, month: date) -> ConversationArchive | None:
+    """해당 달의 대화를 사용자별 gzip 멤버로 씁니다. 대화가 없으면 None."""
+    start, end = month_range(month)
+    rows = db.query(Conversation.id, Conversation.user_id, Conversation.speaker, Conversation.message, Conversation.created_at)\
+             .filter(Conversation.created_at >= start, Conversation.created_at < end)\
+             .order_by(Conversation.user_id, Conversation.created_at, Conversation.id)\
+             .yield_per(EXPORT_BATCH_SIZE)
+
+    file_path, index_path = _archive_paths(month)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    index: dict[str, dict] = {}
+    totals = {"rows": 0, "max_id": 0, "bytes": 0}
+    digest = hashlib.sha256()
+
+    def write(f):
+        current_user, lines, days = None, [], set()
+
+        def flush():
+            member = gzip.compress("".join(lines).encode("utf-8"), mtime=0)
+            index[str(current_user)] = {"offset": totals["bytes"], "length": len(member), "rows": len(lines), "days": sorted(days)}
+            f.write(member)
+            digest.update(member)
+            totals["bytes"] += len(member)
+
+        for row_id, user_id, speaker, message, created_at in rows:
+            if user_id != current_user:
+                if lines:
+                    flush()
+                current_user, lines, days = user_id, [], set()
+            record = {"id": row_id, "user_id": user_id, "speaker": speaker, "message": message, "created_at": created_at.isoformat()}
+            lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+            days.add(created_at.date().isoformat())
+            totals["rows"] += 1
+            totals["max_id"] = max(totals["max_id"], row_id)
+        if lines:
+            flush()
+
+    _write_atomic(file_path, write)
+    if not totals["rows"]:
+        os.remove(file_path)
+        return None
+    index_bytes = json.dumps(index, ensure_ascii=False).encode("utf-8")
+    _write_atomic(index_path, lambda f: f.write(index_bytes))
+    return ConversationArchive(
+        month=month,
+        file_path=file_path,
+        index_path=index_path,
+        row_count=totals["rows"],
+        user_count=len(index),
+        max_id=totals["max_id"],
+        file_size=totals["bytes"],
+        sha256=digest.hexdigest(),
+    )
+
+
+def _purge(db: Session, month: date, max_id: int) -> int:
+    """파일로 옮긴 행을 테이블에서 지웁니다. 파티션이 있으면 통째로 버립니다."""
+    start, end = month_range(month)
+    in_month = (Conversation.created_at >= start, Conversation.created_at < end)
+    if partition_name(month) in list_partitions(db):
+        newer = db.query(func.count(Conversation.id)).filter(*in_month, Conversation.id > max_id).scalar()
+        if not newer:
+            count = db.query(func.count(Conversation.id)).filter(*in_month).scalar()
+            db.execute(text(f"ALTER TABLE {TABLE} DROP PARTITION {partition_name(month)}"))
+            return count
+
+    deleted = 0
+    while True:
+        ids = [row[0] for row in db.query(Conversation.id)
+                                   .filter(*in_month, Conversation.id <= max_id)
+                                   .limit(DELETE_BATCH_SIZE)]
+        if not ids:
+            return deleted
+        db.query(Conversation).filter(Conversation.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        deleted += len(ids)
+
+
+def archive_month(db: Session, month: date) -> int:
+    """한 달을 파일로 옮기고 테이블에서 지웁니다. 중간에 멈췄어도 다시 실행하면 이어서 처리합니다. 지운 행 수를 반환합니다."""
+    archive = db.get(ConversationArchive, month)
+    if archive is None:
+        archive = _export(db, month)
+        if archive is None:
+            # 대화가 없는 달은 빈 파티션만 정리합니다.
+            if partition_name(month) in list_partitions(db):
+                db.execute(text(f"ALTER TABLE {TABLE} DROP PARTITION {partition_name(month)}"))
+            return 0
+        db.add(archive)
+        db.commit()
+        logger.info("대화 압축 파일 작성", extra={"month": str(month), "rows": archive.row_count, "bytes": archive.file_size})
+    deleted = _purge(db, month, archive.max_id)
+    db.commit()
+    ARCHIVED_ROWS.inc(deleted)
+    return deleted
+
+
+def months_to_archive(db: Session, today: date | None = None) -> list[date]:
+    """보관 기간이 지난 달 중 테이블에 행이나 파티션이 남아 있는 달"""
+    boundary = retention_start(today)
+    if boundary is None:
+        return []
+    months = set()
+    oldest = db.query(func.min(Conversation.created_at)).scalar()
+    if oldest is not None:
+        month = month_start(oldest.date())
+        while month < boundary:
+            months.add(month)
+            month = add_months(month, 1)
+    # 대화가 없어 비어 있는 오래된 파티션도 정리합니다.
+    for name in list_partitions(db):
+        if name != MAX_PARTITION and datetime.strptime(name[1:], "%Y%m").date() < boundary:
+            months.add(datetime.strptime(name[1:], "%Y%m").date())
+    return sorted(months)
+
+
+def run_archive(today: date | None = None) -> int:
+    db = SessionLocal()
+    try:
+        ensure_partitions(db, today)
+        total = 0
+        for month in months_to_archive(db, today):
+            total += archive_month(db, month)
+    finally:
+        db.close()
+    if total:
+        logger.info("대화 보관 완료", extra={"rows": total})
+    return total
+
+
+def schedule_archive(reschedule: bool = False) -> int:
+    """다음 보관 작업을 등록합니다. (report_scheduler.schedule_nightly 와 같은 방식)"""
+    run_at = job_runner.next_local_run(settings.CONVERSATION_ARCHIVE_HOUR)
+    return job_runner.enqueue(JOB_ARCHIVE, {}, dedup_key=JOB_ARCHIVE, run_after=job_runner.to_run_after(run_at), debounce=reschedule)
+
+
+@job_runner.job(JOB_ARCHIVE, queue="default")
+def archive_job(payload: dict):
+    schedule_archive(reschedule=True)
+    run_archive()
+
+
+# --- 옮긴 달 읽기 ---
+
+@lru_cache(maxsize=32)
+def _load_index(index_path: str) -> dict:
+    with open(index_path, "rb") as f:
+        return json.loads(f.read())
+
+
+def _read_member(archive: ConversationArchive, user_id: int) -> list[dict]:
+    entry = _load_index(archive.index_path).get(str(user_id))
+    if entry is None:
+        return []
+    with open(archive.file_path, "rb") as f:
+        f.seek(entry["offset"])
+        member = f.read(entry["length"])
+    records = [json.loads(line) for line in gzip.decompress(member).decode("utf-8").splitlines()]
+    for record in records:
+        record["created_at"] = datetime.fromisoformat(record["created_at"])
+    return records
+
+
+def get_archive(db: Session, day: date) -> ConversationArchive | None:
+    return db.get(ConversationArchive, month_start(day))
+
+
+def archived_conversations(db: Session, user_id: int, start: datetime, end: datetime) -> list[dict]:
+    """[start, end) 기간 중 파일로 옮긴 대화 (created_at, id 순)"""
+    records = []
+    month, last = month_start(start.date()), month_start((end - timedelta(microseconds=1)).date())
+    while month <= last:
+        archive = db.get(ConversationArchive, month)
+        if archive is not None:
+            records.extend(r for r in _read_member(archive, user_id) if start <= r["created_at"] < end)
+        month = add_months(month, 1)
+    records.sort(key=lambda r: (r["created_at"], r["id"]))
+    return records
+
+
+def archived_user_ids(db: Session, day: date) -> list[int]:
+    """파일로 옮긴 달에서 해당 날짜에 대화한 users.id"""
+    archive = get_archive(db, day)
+    if archive is None:
+        return []
+    day_str = day.isoformat()
+    return [int(user_id) for user_id, entry in _load_index(archive.index_path).items() if day_str in entry["days"]]
@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
 from app.db import models
+from app.services import activity_counters, family_search
 
 def get_or_create_user(db: Session, user_id_str: str) -> models.User:
     """
@@ -16,8 +17,9 @@ def get_or_create_user(db: Session, user_id_str: str) -> models.User:
         db.refresh(user) # 생성된 사용자의 최신 정보(예: id)를 가져옵니다.
     return user
 
-def save_conversation(db: Session, user: models.User, user_message: str, ai_message: str):
-    """사용자와 AI의 대화 내용을 DB에 저장합니다."""
+def save_conversation(db: Session, user: models.User, user_message: str, ai_message: str, answered_question: bool = False):
+    """사용자와 AI의 대화 내용을 DB에 저장합니다.
+    answered_question: 직전 AI 메시지가 질문이었는지 (홈 화면 '답한 질문' 수)"""
     
     # 사용자 대화 저장
     db_user_conv = models.Conversation(
@@ -34,6 +36,13 @@ def save_conversation(db: Session, user: models.User, user_message: str, ai_mess
         message=ai_message
     )
     db.add(db_ai_conv)
+    db.flush()
+    # 가족 검색 색인 (같은 트랜잭션)
+    family_search.index_turn(db, user.id, db_user_conv.id, user_message, ai_message, db_user_conv.created_at)
+
+    activity_counters.increment(db, user.id, activity_counters.METRIC_CONVERSATION)
+    if answered_question:
+        activity_counters.increment(db, user.id, activity_counters.METRIC_QUESTION_ANSWERED)
     
     # 변경사항을 데이터베이스에 최종 반영합니다.
     db.commit()
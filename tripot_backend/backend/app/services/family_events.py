@@ -0,0 +1,150 @@
+import asyncio
+import itertools
+import logging
+import threading
+from collections import OrderedDict
+
+from app.core import metrics
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 가족 앱 실시간 알림 (가족 = users.id 기준 채널)
+# 사진 업로드/댓글 변경/리포트 저장 시 publish 하면 구독 중인 연결(SSE)로 전달됩니다.
+#
+# - 합치기(coalescing): 아직 보내지 못한 이벤트는 같은 대상끼리 하나로 합칩니다.
+#   (같은 사진의 댓글 변경 여러 번 → comments_changed 1건, 사진 업로드 여러 번 → photos_added 1건)
+# - 역압(backpressure): 느린 연결의 대기 이벤트가 FAMILY_EVENTS_MAX_PENDING 을 넘으면 모두 버리고
+#   resync 1건만 보냅니다. 클라이언트는 resync 를 받으면 목록/리포트를 다시 조회합니다.
+# - 이벤트는 프로세스 메모리에서만 전달됩니다. (다른 프로세스의 변경은 클라이언트 재조회에 맡김)
+
+EVENT_PHOTOS_ADDED = "photos_added"
+EVENT_COMMENTS_CHANGED = "comments_changed"
+EVENT_REPORT_UPDATED = "report_updated"
+EVENT_RESYNC = "resync"
+
+SUBSCRIBERS = metrics.gauge("tripot_family_event_subscribers", "가족 알림 구독 연결 수")
+EVENTS = metrics.counter(
+    "tripot_family_events_total", "가족 알림 이벤트 처리 수 (published/coalesced/delivered/overflow)", ("type", "result")
+)
+
+
+def _coalesce_key(event_type: str, data: dict) -> tuple:
+    if event_type == EVENT_COMMENTS_CHANGED:
+        return (event_type, data.get("photo_id"))
+    return (event_type,)
+
+
+def _merge(previous: dict, data: dict) -> dict:
+    """같은 키의 대기 이벤트를 합칩니다. 사진 id 목록은 합치고 나머지는 최신 값을 사용합니다."""
+    merged = {**previous, **data}
+    if "photo_ids" in previous or "photo_ids" in data:
+        merged["photo_ids"] = list(dict.fromkeys(previous.get("photo_ids", []) + data.get("photo_ids", [])))
+    return merged
+
+
+class Subscription:
+    """연결 하나의 대기 이벤트 큐 (이벤트 루프 스레드에서만 접근)"""
+
+    def __init__(self, family_id: int, max_pending: int):
+        self.family_id = family_id
+        self.max_pending = max_pending
+        self._pending: OrderedDict[tuple, tuple[str, dict]] = OrderedDict()
+        self._overflowed = False
+        self._wakeup = asyncio.Event()
+
+    def offer(self, event_type: str, data: dict):
+        if self._overflowed:
+            return
+        key = _coalesce_key(event_type, data)
+        if key in self._pending:
+            self._pending[key] = (event_type, _merge(self._pending[key][1], data))
+            EVENTS.inc(type=event_type, result="coalesced")
+        elif len(self._pending) >= self.max_pending:
+            self._pending.clear()
+            self._overflowed = True
+            EVENTS.inc(type=event_type, result="overflow")
+            logger.warning("가족 알림 대기열 초과, resync 전송", extra={"family_id": self.family_id})
+        else:
+            self._pending[key] = (event_type, data)
+        self._wakeup.set()
+
+    async def next_batch(self, timeout: float) -> list[tuple[str, dict]]:
+        """대기 이벤트를 모두 꺼냅니다. timeout 동안 없으면 빈 목록 (하트비트용)"""
+        if not self._pending and not self._overflowed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return []
+        self._wakeup.clear()
+        if self._overflowed:
+            self._overflowed = False
+            return [(EVENT_RESYNC, {})]
+        batch = list(self._pending.values())
+        self._pending.clear()
+        return batch
+
+
+class FamilyEventHub:
+    def __init__(self):
+        self._subscriptions: dict[int, set[Subscription]] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    def subscribe(self, family_id: int) -> Subscription:
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(family_id, settings.FAMILY_EVENTS_MAX_PENDING)
+        with self._lock:
+            self._subscriptions.setdefault(family_id, set()).add(subscription)
+        SUBSCRIBERS.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.family_id)
+            if subscriptions and subscription in subscriptions:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.family_id]
+                SUBSCRIBERS.dec()
+
+    def next_event_id(self) -> int:
+        return next(self._ids)
+
+    def publish(self, family_id: int, event_type: str, data: dict):
+        """어느 스레드에서나 호출할 수 있습니다. (동기 엔드포인트는 스레드풀에서 실행됨)"""
+        with self._lock:
+            if family_id not in self._subscriptions:
+                return
+        EVENTS.inc(type=event_type, result="published")
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._deliver(family_id, event_type, data)
+        else:
+            loop.call_soon_threadsafe(self._deliver, family_id, event_type, data)
+
+    def _deliver(self, family_id: int, event_type: str, data: dict):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(family_id, ()))
+        for subscription in subscriptions:
+            subscription.offer(event_type, dict(data))
+
+
+hub = FamilyEventHub()
+
+
+def publish(family_id: int | None, event_type: str, **data):
+    """알림 전송 실패가 원래 작업(업로드/댓글/리포트 저장)을 실패시키지 않도록 예외를 삼킵니다."""
+    if family_id is None:
+        return
+    try:
+        hub.publish(family_id, event_type, data)
+    except Exception as e:
+        logger.warning("가족 알림 전송 실패 (무시)", extra={"family_id": family_id, "event": event_type, "error": str(e)})
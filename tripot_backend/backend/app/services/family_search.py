@@ -0,0 +1,297 @@
+import logging
+import re
+import time
+from datetime import date, datetime
+
+from fastapi import HTTPException
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.db.models import Conversation, SearchDocument, SearchPosting, Summary
+from app.services import memory_search, report_facts
+
+logger = logging.getLogger(__name__)
+
+# 가족 검색 ("엄마가 병원 얘기한 게 언제였지?")
+# 대화 한 턴(어르신 발화 + AI 응답)과 일일 리포트를 search_documents 에 한 행씩 색인하고, 최근 색인된 것부터 찾습니다.
+#  - MySQL: body 의 ngram FULLTEXT 인덱스 (마이그레이션 11). 검색어의 각 단어를 구절(+"단어")로 찾습니다.
+#  - 그 외(sqlite): search_postings 역색인. 기억 검색과 같은 토큰화(한글 어절은 글자 2-gram)로 모든 토큰이 있는 문서를 찾습니다.
+# 두 방식 모두 글자 2-gram 으로 찾으므로 "병원" 으로 "병원에서" 가 찾아집니다.
+# 한 글자 단어("약", "눈")는 2-gram 이 없으므로 그 글자로 시작하는 토큰을 찾습니다. (MySQL: +약*, sqlite: 토큰 범위 조회)
+# 후보는 단어가 실제로 들어 있는지 한 번 더 확인합니다.
+# 대화가 보관 파일로 옮겨져도(conversation_archive) 검색 문서는 남아 있어 오래된 대화도 찾을 수 있습니다.
+# 페이지: 결과는 문서 id 내림차순이고, next_cursor 는 마지막 결과의 id 입니다.
+
+DOC_CONVERSATION = "conversation"
+DOC_REPORT = "report"
+DOC_TYPES = (DOC_CONVERSATION, DOC_REPORT)
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+MAX_QUERY_WORDS = 8
+# 일치 위치 주변으로 보여 줄 글자 수
+SNIPPET_CHARS = 80
+# 단어 확인에서 걸러질 수 있어 한 번에 요청 수보다 넉넉히 후보를 읽습니다.
+CANDIDATE_FACTOR = 3
+MAX_TOKEN_LENGTH = 64
+
+_WORD_RE = re.compile(r"[가-힣]+|[0-9a-z]+")
+_HANGUL_RE = re.compile(r"[가-힣]")
+
+SEARCH_SECONDS = metrics.histogram("tripot_family_search_seconds", "가족 검색 소요 시간(초)", ("backend",))
+
+
+def _is_mysql(db: Session) -> bool:
+    return db.get_bind().dialect.name == "mysql"
+
+
+def query_words(query: str) -> list[str]:
+    words = []
+    for word in _WORD_RE.findall((query or "").lower()):
+        if word not in words:
+            words.append(word)
+    return words[:MAX_QUERY_WORDS]
+
+
+# --- 색인 ---
+
+def add_document(db: Session, user_id: int, doc_type: str, source_id: int, body: str,
+                 created_at: datetime | None = None, report_date: date | None = None) -> SearchDocument:
+    """문서를 추가하거나 (같은 원본이면) 내용을 바꿉니다. 커밋은 호출하는 쪽에서 합니다."""
+    doc = db.query(SearchDocument)\
+            .filter(SearchDocument.doc_type == doc_type, SearchDocument.source_id == source_id)\
+            .first()
+    if doc is None:
+        doc = SearchDocument(user_id=user_id, doc_type=doc_type, source_id=source_id)
+        db.add(doc)
+    elif not _is_mysql(db):
+        db.query(SearchPosting).filter(SearchPosting.document_id == doc.id).delete(synchronize_session=False)
+    doc.body = body
+    doc.report_date = report_date
+    doc.created_at = created_at or datetime.utcnow()
+    db.flush()
+
+    if not _is_mysql(db):
+        tokens = {token[:MAX_TOKEN_LENGTH] for token in memory_search.tokenize(body)}
+        if tokens:
+            db.execute(insert(SearchPosting), [{"user_id": user_id, "token": token, "document_id": doc.id} for token in tokens])
+    return doc
+
+
+def index_turn(db: Session, user_id: int, source_id: int, user_message: str, ai_message: str,
+               created_at: datetime | None = None) -> SearchDocument:
+    """대화 한 턴을 색인합니다. source_id 는 어르신 발화의 conversations.id 입니다."""
+    body = f"{user_message}\n{ai_message}" if ai_message else user_message
+    return add_document(db, user_id, DOC_CONVERSATION, source_id, body, created_at=created_at)
+
+
+def report_text(summary_data: dict) -> str:
+    """리포트 JSON 의 값(문자열)만 이어 붙입니다."""
+    values = []
+
+    def collect(value):
+        if isinstance(value, dict):
+            for item in value.values():
+                collect(item)
+        elif isinstance(value, list):
+            for item in value:
+                collect(item)
+        elif isinstance(value, str) and value.strip():
+            values.append(value.strip())
+
+    collect(summary_data)
+    return "\n".join(values)
+
+
+def index_report(db: Session, user_id: int, summary, summary_data: dict) -> SearchDocument | None:
+    """리포트를 색인합니다. (report_utils.save_summary_to_db, summary 는 flush 된 상태)
+    summary 는 id, report_date 만 쓰므로 Summary 객체 또는 조회한 행이면 됩니다."""
+    body = report_text(summary_data)
+    if not body:
+        return None
+    report_day = summary.report_date
+    created_at = datetime.combine(report_day, datetime.min.time()) if report_day else None
+    return add_document(db, user_id, DOC_REPORT, summary.id, body, created_at=created_at, report_date=report_day)
+
+
+def backfill(db: Session, batch_size: int = 1000) -> int:
+    """기존 대화/리포트를 색인합니다. (마이그레이션 11) 색인한 문서 수를 반환합니다."""
+    count, last_id = 0, 0
+    # 사용자별로 아직 AI 응답을 만나지 못한 어르신 발화 (id, message, created_at)
+    pending: dict[int, tuple] = {}
+    while True:
+        rows = db.query(Conversation.id, Conversation.user_id, Conversation.speaker, Conversation.message, Conversation.created_at)\
+                 .filter(Conversation.id > last_id)\
+                 .order_by(Conversation.id)\
+                 .limit(batch_size)\
+                 .all()
+        if not rows:
+            break
+        for row_id, user_id, speaker, message, created_at in rows:
+            last_id = row_id
+            if speaker == "user":
+                if user_id in pending:
+                    source_id, user_message, spoken_at = pending.pop(user_id)
+                    index_turn(db, user_id, source_id, user_message, "", spoken_at)
+                    count += 1
+                pending[user_id] = (row_id, message, created_at)
+            elif user_id in pending:
+                source_id, user_message, spoken_at = pending.pop(user_id)
+                index_turn(db, user_id, source_id, user_message, message, spoken_at)
+                count += 1
+        db.commit()
+        logger.info("대화 검색 색인 중", extra={"count": count})
+    for user_id, (source_id, user_message, spoken_at) in pending.items():
+        index_turn(db, user_id, source_id, user_message, "", spoken_at)
+        count += 1
+
+    # 마이그레이션 중에는 이후 리비전이 추가한 컬럼이 아직 없을 수 있어 필요한 컬럼만 읽습니다. (모델 전체 조회 금지)
+    last_id = 0
+    while True:
+        summaries = db.query(Summary.id, Summary.user_id, Summary.report_date, Summary.summary_json)\
+                      .filter(Summary.id > last_id, Summary.report_date.isnot(None))\
+                      .order_by(Summary.id)\
+                      .limit(batch_size)\
+                      .all()
+        if not summaries:
+            db.commit()
+            return count
+        for summary in summaries:
+            last_id = summary.id
+            if index_report(db, summary.user_id, summary, report_facts.parse_summary(summary.summary_json)):
+                count += 1
+        db.commit()
+
+
+# --- 검색 ---
+
+def _is_syllable(word: str) -> bool:
+    """2-gram 으로 찾을 수 없는 한 글자 한글 단어"""
+    return len(word) == 1 and bool(_HANGUL_RE.fullmatch(word))
+
+
+def _token_prefix(prefix: str):
+    """prefix 로 시작하는 토큰 (LIKE 대신 범위 조건이라 (user_id, token) 인덱스를 탑니다)"""
+    return SearchPosting.token >= prefix, SearchPosting.token < chr(ord(prefix) + 1)
+
+
+def _candidate_ids(db: Session, user_id: int, words: list[str], before_id: int | None, size: int) -> list[int]:
+    if _is_mysql(db):
+        # ngram 파서는 토큰 크기(2)보다 짧은 접두어 검색이면 그 글자로 시작하는 2-gram 을 모두 찾습니다.
+        boolean_query = " ".join(f"+{word}*" if _is_syllable(word) else f'+"{word}"' for word in words)
+        query = db.query(SearchDocument.id)\
+                  .filter(SearchDocument.body.match(boolean_query), SearchDocument.user_id == user_id)
+        if before_id is not None:
+            query = query.filter(SearchDocument.id < before_id)
+        return [row[0] for row in query.order_by(SearchDocument.id.desc()).limit(size)]
+
+    prefixes = [word for word in words if _is_syllable(word)]
+    tokens = {token[:MAX_TOKEN_LENGTH] for token in memory_search.tokenize(" ".join(w for w in words if not _is_syllable(w)))}
+    query = db.query(SearchPosting.document_id).filter(SearchPosting.user_id == user_id)
+    if tokens:
+        query = query.filter(SearchPosting.token.in_(tokens))
+    else:
+        query = query.filter(*_token_prefix(prefixes.pop(0)))
+    # 나머지 한 글자 단어는 그 글자로 시작하는 토큰이 있는 문서로 좁힙니다.
+    for prefix in prefixes:
+        query = query.filter(SearchPosting.document_id.in_(
+            db.query(SearchPosting.document_id).filter(SearchPosting.user_id == user_id, *_token_prefix(prefix))
+        ))
+    if before_id is not None:
+        query = query.filter(SearchPosting.document_id < before_id)
+    query = query.group_by(SearchPosting.document_id)
+    if tokens:
+        query = query.having(func.count() == len(tokens))
+    query = query.order_by(SearchPosting.document_id.desc()).limit(size)
+    return [row[0] for row in query]
+
+
+def highlight(body: str, words: list[str]) -> tuple[str, list[list[int]]]:
+    """일치 위치 주변을 잘라 (스니펫, 스니펫 안의 [시작, 끝) 위치 목록) 을 반환합니다."""
+    lower = body.lower()
+    spans = []
+    for word in words:
+        start = lower.find(word)
+        while start >= 0:
+            spans.append((start, start + len(word)))
+            start = lower.find(word, start + len(word))
+    spans.sort()
+    merged = []
+    for start, end in spans:
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    if not merged:
+        return body[:SNIPPET_CHARS], []
+
+    window_start = max(0, merged[0][0] - SNIPPET_CHARS // 4)
+    window_end = min(len(body), window_start + SNIPPET_CHARS)
+    prefix = "…" if window_start > 0 else ""
+    suffix = "…" if window_end < len(body) else ""
+    snippet = prefix + body[window_start:window_end] + suffix
+    shift = len(prefix) - window_start
+    highlights = [[start + shift, min(end, window_end) + shift] for start, end in merged if start < window_end]
+    return snippet, highlights
+
+
+def parse_cursor(cursor: str | None) -> int | None:
+    if not cursor:
+        return None
+    try:
+        return int(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="잘못된 cursor 입니다.")
+
+
+def search(db: Session, user_id: int, query: str, doc_type: str | None = None,
+           limit: int = DEFAULT_LIMIT, cursor: str | None = None) -> dict:
+    words = query_words(query)
+    if not words:
+        raise HTTPException(status_code=400, detail="검색어를 입력해주세요.")
+    if doc_type is not None and doc_type not in DOC_TYPES:
+        raise HTTPException(status_code=400, detail=f"type 은 {' | '.join(DOC_TYPES)} 중 하나여야 합니다.")
+    limit = min(max(limit, 1), MAX_LIMIT)
+    before_id = parse_cursor(cursor)
+
+    started = time.perf_counter()
+    matches: list[SearchDocument] = []
+    batch = (limit + 1) * CANDIDATE_FACTOR
+    while len(matches) <= limit:
+        ids = _candidate_ids(db, user_id, words, before_id, batch)
+        if not ids:
+            break
+        docs = {doc.id: doc for doc in db.query(SearchDocument).filter(SearchDocument.id.in_(ids))}
+        for doc_id in ids:
+            doc = docs.get(doc_id)
+            if doc is None or (doc_type and doc.doc_type != doc_type):
+                continue
+            body = doc.body.lower()
+            if all(word in body for word in words):
+                matches.append(doc)
+                if len(matches) > limit:
+                    break
+        if len(ids) < batch:
+            break
+        before_id = ids[-1]
+    SEARCH_SECONDS.observe(time.perf_counter() - started, backend="fulltext" if _is_mysql(db) else "postings")
+
+    results = []
+    for doc in matches[:limit]:
+        snippet, highlights = highlight(doc.body, words)
+        results.append({
+            "id": doc.id,
+            "type": doc.doc_type,
+            "source_id": doc.source_id,
+            "created_at": doc.created_at,
+            "report_date": str(doc.report_date) if doc.report_date else None,
+            "snippet": snippet,
+            "highlights": highlights,
+        })
+    return {
+        "query": query,
+        "words": words,
+        "results": results,
+        "next_cursor": str(matches[limit - 1].id) if len(matches) > limit else None,
+    }
@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import random
+import re
+
+from app.core.config import settings
+from . import ai_service
+
+logger = logging.getLogger(__name__)
+
+# 필러(짧은 맞장구) 취소 규칙
+# 1. 불분명한 입력/재요청 턴에는 필러를 보내지 않습니다. (전사 결과가 확정된 턴에서만 시작)
+# 2. 필러는 사실이나 질문을 담지 않는 중립적인 맞장구만 사용합니다. (talk_prompts.json 의 filler_reactions)
+# 3. 본 응답이 FILLER_DELAY_MS 안에 준비되면 필러는 보내지 않고 취소합니다.
+# 4. 필러가 이미 나간 뒤 본 응답이 같은 맞장구로 시작하면 중복된 앞부분을 잘라냅니다.
+# 5. 필러는 세션 기록과 DB 대화 기록에 남기지 않습니다.
+
+_DEFAULT_CATEGORY = "기본"
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"[\s,.!?~]+", "", text)
+
+
+def pick_filler(user_message: str) -> str | None:
+    """guidelines_and_reactions 의 상황 분류에 맞춰 짧은 맞장구를 로컬에서 고릅니다."""
+    reactions = (ai_service.get_prompts_config() or {}).get("filler_reactions")
+    if not reactions or not user_message.strip():
+        return None
+
+    category = _DEFAULT_CATEGORY
+    for name, reaction in reactions.items():
+        if any(keyword in user_message for keyword in reaction.get("keywords", [])):
+            category = name
+            break
+
+    fillers = reactions.get(category, reactions.get(_DEFAULT_CATEGORY, {})).get("fillers", [])
+    return random.choice(fillers) if fillers else None
+
+
+def strip_duplicate_ack(filler: str, ai_response: str) -> str:
+    """본 응답이 이미 보낸 필러와 같은 문장으로 시작하면 그 부분을 제거합니다."""
+    first_sentence, separator, rest = ai_response.partition(".")
+    if separator and rest.strip() and _normalize(first_sentence) == _normalize(filler):
+        return rest.strip()
+    return ai_response
+
+
+class SpeculativeFiller:
+    """한 번의 대화 턴 동안 필러 전송과 취소를 관리합니다."""
+
+    def __init__(self, send, delay_ms: int | None = None):
+        self._send = send
+        self._delay = (settings.FILLER_DELAY_MS if delay_ms is None else delay_ms) / 1000
+        self._task: asyncio.Task | None = None
+        self._filler: str | None = None
+        self._sent = False
+
+    def start(self, user_message: str):
+        """전사 결과가 확정되면 호출되어 지연 후 필러를 보내도록 예약합니다."""
+        self._filler = pick_filler(user_message)
+        if self._filler:
+            self._task = asyncio.create_task(self._send_later())
+
+    async def _send_later(self):
+        await asyncio.sleep(self._delay)
+        self._sent = True
+        await self._send({"type": "ai_filler", "content": self._filler})
+
+    def cancel(self):
+        """아직 나가지 않은 필러를 취소합니다."""
+        if self._task and not self._task.done():
+            self._task.cancel()
+
+    async def settle(self, ai_response: str) -> str:
+        """본 응답 직전에 호출되어 필러를 정리하고, 본 응답을 필러와 모순되지 않게 다듬습니다."""
+        if self._task and self._sent and not self._task.done():
+            # 전송 중인 필러가 본 응답보다 먼저 도착하도록 기다립니다.
+            try:
+                await asyncio.shield(self._task)
+            except Exception as e:
+                logger.warning("필러 전송 실패 (무시)", extra={"error": str(e)})
+        self.cancel()
+        if self._sent and self._filler:
+            return strip_duplicate_ack(self._filler, ai_response)
+        return ai_response
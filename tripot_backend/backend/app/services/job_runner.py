@@ -0,0 +1,439 @@
+import asyncio
+import inspect
+import logging
+import time
+import zlib
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, time as dt_time, timedelta, timezone
+from typing import Callable
+
+from sqlalchemy import and_, or_, update
+
+from app.core import metrics
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.db.models import Job
+
+logger = logging.getLogger(__name__)
+
+# 서비스 내부 백그라운드 작업 실행기
+# - 작업 상태는 DB(jobs 테이블)에 저장되어 재시작 후에도 이어서 처리됩니다.
+# - 큐마다 동시 실행 수가 정해져 있고, I/O 작업은 스레드, CPU 작업은 프로세스 풀에서 실행합니다.
+#   (async 핸들러는 이벤트 루프에서 바로 실행)
+# - 실패하면 지수 백오프로 재시도하고, dedup_key 가 같은 작업이 대기/실행 중이면 새로 만들지 않습니다.
+# - 실행 중인 작업은 임대(locked_until)를 주기적으로 연장하고, 임대가 만료된 작업만 중단된 것으로 보고 다시 실행합니다.
+#
+# 핸들러 등록:
+#   @job_runner.job("memory.create", queue="memory")
+#   async def create_memory_job(payload: dict): ...
+# 작업 등록 (동기 함수이므로 async 코드에서는 asyncio.to_thread 로 호출):
+#   job_runner.enqueue("memory.create", {"user_id": ...})
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_FAILED = "failed"
+ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+
+@dataclass(frozen=True)
+class QueueSpec:
+    workers: int
+    executor: str = "thread"  # thread | process
+
+
+QUEUES = {
+    "default": QueueSpec(workers=2),
+    # 세션 종료 후 기억 생성 (OpenAI/Pinecone 호출)
+    "memory": QueueSpec(workers=2),
+    # 리포트 생성 (대화 모델 호출이 길어 동시 실행을 제한)
+    "reports": QueueSpec(workers=1),
+    # CPU 위주 계산. 핸들러는 모듈 최상위의 동기 함수여야 합니다. (프로세스로 전달)
+    "cpu": QueueSpec(workers=1, executor="process"),
+}
+
+
+@dataclass
+class JobHandler:
+    name: str
+    queue: str
+    func: Callable
+    max_attempts: int
+
+
+_handlers: dict[str, JobHandler] = {}
+
+JOBS = metrics.counter(
+    "tripot_jobs_total", "백그라운드 작업 처리 결과 수 (enqueued/deduplicated/succeeded/retried/failed)", ("name", "result")
+)
+JOB_SECONDS = metrics.histogram("tripot_job_seconds", "백그라운드 작업 실행 시간(초)", ("name",))
+JOBS_RUNNING = metrics.gauge("tripot_jobs_running", "큐별 실행 중인 작업 수", ("queue",))
+
+
+def job(name: str, queue: str = "default", max_attempts: int = 3):
+    """작업 핸들러를 등록합니다. 핸들러는 payload(dict) 하나를 인자로 받습니다."""
+    if queue not in QUEUES:
+        raise ValueError(f"알 수 없는 큐: {queue}")
+
+    def decorator(func):
+        if QUEUES[queue].executor == "process" and inspect.iscoroutinefunction(func):
+            raise ValueError("프로세스 큐의 핸들러는 동기 함수여야 합니다.")
+        _handlers[name] = JobHandler(name, queue, func, max_attempts)
+        return func
+
+    return decorator
+
+
+def describe(job_row: Job) -> dict:
+    return {
+        "id": job_row.id,
+        "queue": job_row.queue,
+        "name": job_row.name,
+        "status": job_row.status,
+        "dedup_key": job_row.dedup_key,
+        "attempts": job_row.attempts,
+        "max_attempts": job_row.max_attempts,
+        "last_error": job_row.last_error,
+        "run_after": job_row.run_after,
+        "created_at": job_row.created_at,
+        "started_at": job_row.started_at,
+        "locked_until": job_row.locked_until,
+        "finished_at": job_row.finished_at,
+    }
+
+
+def enqueue(name: str, payload: dict | None = None, dedup_key: str | None = None,
+            run_after: datetime | None = None, max_attempts: int | None = None, debounce: bool = False) -> int:
+    """작업을 등록하고 id 를 반환합니다. 같은 dedup_key 의 작업이 대기/실행 중이면 그 id 를 반환합니다.
+
+    debounce=True 이면 대기 중인 작업만 같은 작업으로 보고, 실행 시각(run_after)을 더 늦은 쪽으로 미룹니다.
+    이미 실행 중이면 그 실행은 새 변경을 반영하지 못할 수 있으므로 새 작업을 등록합니다."""
+    handler = _handlers.get(name)
+    if handler is None:
+        raise ValueError(f"등록되지 않은 작업: {name}")
+
+    db = SessionLocal()
+    try:
+        if dedup_key:
+            statuses = (STATUS_QUEUED,) if debounce else ACTIVE_STATUSES
+            existing = db.query(Job.id, Job.run_after)\
+                         .filter(Job.dedup_key == dedup_key, Job.status.in_(statuses))\
+                         .first()
+            if existing and debounce and run_after and existing.run_after < run_after:
+                # 그 사이 실행이 시작됐다면(rowcount 0) 새 작업으로 등록합니다.
+                postponed = db.execute(
+                    update(Job)
+                    .where(Job.id == existing.id, Job.status == STATUS_QUEUED)
+                    .values(run_after=run_after, payload=payload or {})
+                ).rowcount
+                db.commit()
+                if not postponed:
+                    existing = None
+            if existing:
+                JOBS.inc(name=name, result="deduplicated")
+                return existing.id
+        job_row = Job(
+            queue=handler.queue,
+            name=name,
+            payload=payload or {},
+            status=STATUS_QUEUED,
+            dedup_key=dedup_key,
+            attempts=0,
+            max_attempts=max_attempts or handler.max_attempts,
+            run_after=run_after or datetime.utcnow(),
+            created_at=datetime.utcnow(),
+        )
+        db.add(job_row)
+        db.commit()
+        JOBS.inc(name=name, result="enqueued")
+        logger.debug("작업 등록", extra={"job_id": job_row.id, "job": name, "queue": handler.queue})
+        runner.notify(handler.queue)
+        return job_row.id
+    finally:
+        db.close()
+
+
+def next_local_run(hour: int, every_days: int = 1, now: datetime | None = None) -> datetime:
+    """서버 현지 시각 기준으로 다음 hour 시를 반환합니다. 주기 작업이 스스로를 다시 예약할 때 사용합니다.
+    every_days 가 1 보다 크면 가장 가까운 hour 시에서 (every_days - 1)일을 더 미룹니다."""
+    now = now or datetime.now()
+    run_at = datetime.combine(now.date(), dt_time(hour=hour))
+    if run_at <= now:
+        run_at += timedelta(days=1)
+    return run_at + timedelta(days=max(every_days, 1) - 1)
+
+
+def to_run_after(local_dt: datetime) -> datetime:
+    """서버 현지 시각을 jobs.run_after 기준(UTC, naive)으로 바꿉니다."""
+    return local_dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def stagger(key: str, window_seconds: float) -> float:
+    """여러 작업을 window_seconds 안에 흩어 놓기 위한 지연(초). 같은 key 는 항상 같은 위치에 배치됩니다."""
+    if window_seconds <= 0:
+        return 0.0
+    return float(zlib.crc32(key.encode("utf-8")) % int(window_seconds))
+
+
+async def run_cpu(func: Callable, *args):
+    """CPU 위주 계산을 cpu 큐의 프로세스 풀에서 실행합니다. (func 는 모듈 최상위 함수)
+    실행기가 시작되지 않은 경우(스크립트 등)에는 스레드에서 실행합니다."""
+    executor = runner._executors.get("cpu")
+    if executor is None:
+        return await asyncio.to_thread(func, *args)
+    return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+
+def get_job(job_id: int) -> dict | None:
+    db = SessionLocal()
+    try:
+        job_row = db.query(Job).filter(Job.id == job_id).first()
+        return describe(job_row) if job_row else None
+    finally:
+        db.close()
+
+
+def list_jobs(status: str | None = None, queue: str | None = None, name: str | None = None, limit: int = 50) -> list[dict]:
+    db = SessionLocal()
+    try:
+        query = db.query(Job)
+        if status:
+            query = query.filter(Job.status == status)
+        if queue:
+            query = query.filter(Job.queue == queue)
+        if name:
+            query = query.filter(Job.name == name)
+        return [describe(j) for j in query.order_by(Job.id.desc()).limit(limit).all()]
+    finally:
+        db.close()
+
+
+class JobRunner:
+    def __init__(self):
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeups: dict[str, asyncio.Event] = {}
+        self._inflight: dict[str, dict[int, asyncio.Task]] = {queue: {} for queue in QUEUES}
+        self._executors: dict[str, Executor] = {}
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def started(self) -> bool:
+        return self._loop is not None
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        for queue, spec in QUEUES.items():
+            if spec.executor == "process":
+                self._executors[queue] = ProcessPoolExecutor(max_workers=spec.workers)
+            else:
+                self._executors[queue] = ThreadPoolExecutor(max_workers=spec.workers, thread_name_prefix=f"job-{queue}")
+            self._wakeups[queue] = asyncio.Event()
+            self._tasks.append(asyncio.create_task(self._dispatch(queue)))
+        self._tasks.append(asyncio.create_task(self._maintain()))
+        logger.info("작업 실행기 시작", extra={"queues": list(QUEUES)})
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        inflight_ids = [job_id for jobs in self._inflight.values() for job_id in jobs]
+        for jobs in self._inflight.values():
+            for task in jobs.values():
+                task.cancel()
+        if inflight_ids:
+            # 종료로 중단된 작업은 다음 기동 때 바로 다시 실행되도록 대기 상태로 돌립니다.
+            try:
+                await asyncio.to_thread(self._release, inflight_ids)
+            except Exception:
+                logger.exception("중단된 작업 상태 복구 실패")
+        for executor in self._executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._tasks.clear()
+        self._executors.clear()
+        self._loop = None
+
+    def notify(self, queue: str):
+        """새 작업이 등록되었음을 디스패처에 알립니다. (어느 스레드에서나 호출 가능)"""
+        loop, wakeup = self._loop, self._wakeups.get(queue)
+        if loop is None or wakeup is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(wakeup.set)
+
+    async def _dispatch(self, queue: str):
+        spec = QUEUES[queue]
+        wakeup = self._wakeups[queue]
+        while True:
+            wakeup.clear()
+            free = spec.workers - len(self._inflight[queue])
+            if free > 0:
+                try:
+                    claimed = await asyncio.to_thread(self._claim, queue, free)
+                except Exception as e:
+                    claimed = []
+                    logger.error("작업 조회 실패", extra={"queue": queue, "error": str(e) or type(e).__name__})
+                for job_id, name, payload, attempts, max_attempts in claimed:
+                    task = asyncio.create_task(self._run(queue, job_id, name, payload, attempts, max_attempts))
+                    self._inflight[queue][job_id] = task
+                    JOBS_RUNNING.inc(queue=queue)
+                    task.add_done_callback(lambda _, job_id=job_id: self._on_done(queue, job_id))
+                if claimed and len(claimed) == free:
+                    # 꽉 채워 가져왔다면 더 남아 있을 수 있으므로, 자리가 나면 바로 다시 조회합니다.
+                    await wakeup.wait()
+                    continue
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=settings.JOB_POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    def _on_done(self, queue: str, job_id: int):
+        if self._inflight[queue].pop(job_id, None) is not None:
+            JOBS_RUNNING.dec(queue=queue)
+        self._wakeups[queue].set()
+
+    async def _run(self, queue: str, job_id: int, name: str, payload: dict, attempts: int, max_attempts: int):
+        handler = _handlers.get(name)
+        started_at = time.perf_counter()
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, name))
+        try:
+            if handler is None:
+                raise RuntimeError(f"등록되지 않은 작업: {name}")
+            if inspect.iscoroutinefunction(handler.func):
+                await handler.func(payload)
+            else:
+                await self._loop.run_in_executor(self._executors[queue], handler.func, payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            retry = attempts < max_attempts
+            await asyncio.to_thread(self._fail, job_id, attempts, error, retry)
+            JOBS.inc(name=name, result="retried" if retry else "failed")
+            log = logger.warning if retry else logger.error
+            log("작업 실패", extra={"job_id": job_id, "job": name, "attempts": attempts, "retry": retry, "error": error})
+        else:
+            await asyncio.to_thread(self._succeed, job_id)
+            JOBS.inc(name=name, result="succeeded")
+            logger.debug("작업 완료", extra={"job_id": job_id, "job": name})
+        finally:
+            heartbeat.cancel()
+            JOB_SECONDS.observe(time.perf_counter() - started_at, name=name)
+
+    async def _heartbeat(self, job_id: int, name: str):
+        """핸들러가 실행되는 동안 임대를 연장합니다. (오래 걸리는 작업이 다른 곳에서 다시 실행되지 않도록)"""
+        while True:
+            await asyncio.sleep(settings.JOB_LEASE_SECONDS / 3)
+            try:
+                renewed = await asyncio.to_thread(self._renew, job_id)
+            except Exception as e:
+                logger.warning("작업 임대 연장 실패", extra={"job_id": job_id, "job": name, "error": str(e) or type(e).__name__})
+                continue
+            if not renewed:
+                logger.warning("작업 임대를 잃었습니다", extra={"job_id": job_id, "job": name})
+
+    async def _maintain(self):
+        """임대가 만료된 running 작업 복구, 오래된 완료 작업 정리"""
+        interval = max(settings.JOB_LEASE_SECONDS / 3, 5.0)
+        while True:
+            # 이 프로세스가 실행 중인 작업은 임대 연장이 밀렸더라도 복구 대상에서 뺍니다.
+            inflight_ids = [job_id for jobs in self._inflight.values() for job_id in jobs]
+            try:
+                await asyncio.to_thread(self._recover_stale, inflight_ids)
+            except Exception as e:
+                logger.error("작업 정리 실패", extra={"error": str(e) or type(e).__name__})
+            await asyncio.sleep(interval)
+
+    # --- DB 처리 (스레드에서 실행) ---
+
+    def _claim(self, queue: str, limit: int) -> list[tuple]:
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            candidates = db.query(Job.id)\
+                           .filter(Job.queue == queue, Job.status == STATUS_QUEUED, Job.run_after <= now)\
+                           .order_by(Job.run_after, Job.id)\
+                           .limit(limit)\
+                           .all()
+            claimed_ids = []
+            for (job_id,) in candidates:
+                # 여러 인스턴스가 동시에 가져가지 않도록 상태 조건부 UPDATE 로 선점합니다.
+                result = db.execute(
+                    update(Job)
+                    .where(Job.id == job_id, Job.status == STATUS_QUEUED)
+                    .values(status=STATUS_RUNNING, started_at=now, attempts=Job.attempts + 1,
+                            locked_until=now + timedelta(seconds=settings.JOB_LEASE_SECONDS))
+                )
+                if result.rowcount == 1:
+                    claimed_ids.append(job_id)
+            db.commit()
+            if not claimed_ids:
+                return []
+            rows = db.query(Job).filter(Job.id.in_(claimed_ids)).order_by(Job.id).all()
+            return [(j.id, j.name, j.payload or {}, j.attempts, j.max_attempts) for j in rows]
+        finally:
+            db.close()
+
+    def _succeed(self, job_id: int):
+        self._update(job_id, status=STATUS_SUCCEEDED, finished_at=datetime.utcnow(), last_error=None, locked_until=None)
+
+    def _fail(self, job_id: int, attempts: int, error: str, retry: bool):
+        if retry:
+            delay = settings.JOB_RETRY_BASE_SECONDS * (2 ** (attempts - 1))
+            self._update(job_id, status=STATUS_QUEUED, last_error=error, locked_until=None,
+                         run_after=datetime.utcnow() + timedelta(seconds=delay))
+        else:
+            self._update(job_id, status=STATUS_FAILED, last_error=error, finished_at=datetime.utcnow(), locked_until=None)
+
+    def _release(self, job_ids: list[int]):
+        db = SessionLocal()
+        try:
+            db.execute(update(Job).where(Job.id.in_(job_ids), Job.status == STATUS_RUNNING).values(status=STATUS_QUEUED, locked_until=None))
+            db.commit()
+        finally:
+            db.close()
+
+    def _renew(self, job_id: int) -> bool:
+        lease = datetime.utcnow() + timedelta(seconds=settings.JOB_LEASE_SECONDS)
+        db = SessionLocal()
+        try:
+            renewed = db.execute(
+                update(Job).where(Job.id == job_id, Job.status == STATUS_RUNNING).values(locked_until=lease)
+            ).rowcount
+            db.commit()
+            return renewed == 1
+        finally:
+            db.close()
+
+    def _recover_stale(self, exclude_ids: list[int] | None = None):
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            expired = or_(
+                Job.locked_until < now,
+                # 임대 기록 전(리비전 14 이전)에 시작한 작업
+                and_(Job.locked_until.is_(None), Job.started_at < now - timedelta(seconds=settings.JOB_LEASE_SECONDS)),
+            )
+            query = update(Job).where(Job.status == STATUS_RUNNING, expired)
+            if exclude_ids:
+                query = query.where(Job.id.notin_(exclude_ids))
+            stale = db.execute(
+                query.values(status=STATUS_QUEUED, locked_until=None, last_error="중단된 작업 복구")
+            ).rowcount
+            purged = db.query(Job)\
+                       .filter(Job.status == STATUS_SUCCEEDED, Job.finished_at < now - timedelta(days=settings.JOB_RETENTION_DAYS))\
+                       .delete(synchronize_session=False)
+            db.commit()
+            if stale or purged:
+                logger.info("작업 정리", extra={"recovered": stale, "purged": purged})
+        finally:
+            db.close()
+
+    def _update(self, job_id: int, **values):
+        db = SessionLocal()
+        try:
+            db.execute(update(Job).where(Job.id == job_id).values(**values))
+            db.commit()
+        finally:
+            db.close()
+
+
+runner = JobRunner()
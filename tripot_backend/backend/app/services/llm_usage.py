@@ -0,0 +1,153 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core import tokens
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.db.models import LlmUsage
+
+logger = logging.getLogger(__name__)
+
+# 모델 호출 토큰 사용량 저장과 비용 조회
+# app/core/tokens.record_usage 가 메모리에 모은 (날짜, 호출 위치, 모델) 합계를 LLM_USAGE_FLUSH_SECONDS 마다
+# llm_usage 행에 더합니다. 여러 인스턴스가 같은 행을 더해도 잃지 않도록 activity_counters 와 같은 upsert 를 씁니다.
+# 비용은 조회할 때 LLM_PRICES_PER_MTOK 로 계산하므로 가격을 바꾸면 지난 기간에도 새 가격이 적용됩니다.
+
+MAX_DAYS = 90
+
+
+def _upsert(db: Session, values: dict):
+    table = LlmUsage.__table__
+    added = {column: table.c[column] + values[column]
+             for column in ("calls", "prompt_tokens", "completion_tokens", "estimated_calls")}
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table).values(**values).on_duplicate_key_update(updated_at=values["updated_at"], **added)
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(table).values(**values).on_conflict_do_update(
+            index_elements=["day", "call_site", "model"],
+            set_={"updated_at": values["updated_at"], **added},
+        )
+    else:
+        result = db.execute(
+            update(table)
+            .where(table.c.day == values["day"], table.c.call_site == values["call_site"], table.c.model == values["model"])
+            .values(updated_at=values["updated_at"], **added)
+        )
+        if result.rowcount:
+            return
+        stmt = table.insert().values(**values)
+    db.execute(stmt)
+
+
+def flush() -> int:
+    """쌓인 사용량을 DB 에 더하고 더한 행 수를 반환합니다. 실패하면 다음 번에 다시 더하도록 되돌려 둡니다."""
+    pending = tokens.drain_usage()
+    if not pending:
+        return 0
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        for (day, call_site, model), (calls, prompt_tokens, completion_tokens, estimated_calls) in pending.items():
+            _upsert(db, {
+                "day": day,
+                "call_site": call_site[:50],
+                "model": model[:100],
+                "calls": calls,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "estimated_calls": estimated_calls,
+                "updated_at": now,
+            })
+        db.commit()
+        return len(pending)
+    except Exception as e:
+        db.rollback()
+        tokens.restore_usage(pending)
+        logger.warning("토큰 사용량 저장 실패, 다음 주기에 다시 저장", extra={"rows": len(pending), "error": str(e) or type(e).__name__})
+        return 0
+    finally:
+        db.close()
+
+
+async def flush_periodically():
+    """서버가 떠 있는 동안 주기적으로 저장합니다. 취소되면(종료 시) 남은 사용량을 한 번 더 저장합니다."""
+    try:
+        while True:
+            await asyncio.sleep(settings.LLM_USAGE_FLUSH_SECONDS)
+            await asyncio.to_thread(flush)
+    finally:
+        await asyncio.to_thread(flush)
+
+
+def cost_usd(model: str, prompt_tokens: int, completion_tokens: int) -> float | None:
+    """가격표에 없는 모델은 None"""
+    price = settings.LLM_PRICES_PER_MTOK.get(model)
+    if price is None:
+        return None
+    return (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+
+
+def _summarize(key: dict, calls: int, prompt_tokens: int, completion_tokens: int, cost: float | None) -> dict:
+    return {
+        **key,
+        "calls": calls,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        # 호출당 평균 입력 토큰: 예산을 조정할 호출 위치를 찾는 데 씁니다.
+        "avg_prompt_tokens": round(prompt_tokens / calls) if calls else 0,
+        "cost_usd": round(cost, 6) if cost is not None else None,
+    }
+
+
+def get_usage(db: Session, days: int = 7, call_site: str | None = None) -> dict:
+    """최근 days 일(오늘 포함, UTC)의 호출 위치/모델별 토큰과 비용"""
+    days = min(max(days, 1), MAX_DAYS)
+    since = datetime.utcnow().date() - timedelta(days=days - 1)
+    query = db.query(LlmUsage).filter(LlmUsage.day >= since)
+    if call_site:
+        query = query.filter(LlmUsage.call_site == call_site)
+    rows = query.order_by(LlmUsage.day, LlmUsage.call_site, LlmUsage.model).all()
+
+    daily, by_site, by_model = [], {}, {}
+    total = [0, 0, 0, 0.0]
+    unpriced = set()
+    for row in rows:
+        cost = cost_usd(row.model, row.prompt_tokens, row.completion_tokens)
+        if cost is None:
+            unpriced.add(row.model)
+        daily.append(_summarize(
+            {"day": str(row.day), "call_site": row.call_site, "model": row.model},
+            row.calls, row.prompt_tokens, row.completion_tokens, cost,
+        ) | {"estimated_calls": row.estimated_calls})
+        for groups, key in ((by_site, (row.call_site, row.model)), (by_model, row.model)):
+            acc = groups.setdefault(key, [0, 0, 0, 0.0])
+            acc[0] += row.calls
+            acc[1] += row.prompt_tokens
+            acc[2] += row.completion_tokens
+            acc[3] += cost or 0.0
+        total[0] += row.calls
+        total[1] += row.prompt_tokens
+        total[2] += row.completion_tokens
+        total[3] += cost or 0.0
+
+    call_sites = [_summarize({"call_site": site, "model": model}, *acc) for (site, model), acc in by_site.items()]
+    call_sites.sort(key=lambda item: item["cost_usd"] or 0, reverse=True)
+    models = [_summarize({"model": model}, *acc) for model, acc in by_model.items()]
+    models.sort(key=lambda item: item["cost_usd"] or 0, reverse=True)
+    return {
+        "from": str(since),
+        "days": days,
+        "total": _summarize({}, *total),
+        "by_call_site": call_sites,
+        "by_model": models,
+        "daily": daily,
+        # 가격표(LLM_PRICES_PER_MTOK)에 없어 비용에서 빠진 모델
+        "unpriced_models": sorted(unpriced),
+    }
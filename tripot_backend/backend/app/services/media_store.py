@@ -0,0 +1,178 @@
+import base64
+import binascii
+import logging
+import os
+import re
+import shutil
+from typing import BinaryIO
+
+from fastapi import HTTPException
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import Post
+from app.services.photo_service import PhotoService
+
+logger = logging.getLogger(__name__)
+
+# 게시글 음성 메시지 저장소
+# 음성은 사진과 같은 방식으로 uploads/family_audio/YYYY/MM/DD 에 파일로 저장하고, posts 에는 경로(audio_path)만 둡니다.
+# posts.audio_message 는 알림용 짧은 문구로만 쓰므로, 사진 상세 조회의 posts JOIN 이 음성 데이터를 읽지 않습니다.
+# 예전 앱처럼 audio_message 에 음성을 base64(data URI 포함)로 넣어 보내면 받는 시점에 파일로 옮깁니다.
+# 재생은 GET /family/family-yard/photo/{photo_id}/audio 에서 Range 요청으로 필요한 만큼만 받습니다.
+
+AUDIO_DIR = "uploads/family_audio"
+
+MEDIA_TYPES = {
+    ".m4a": "audio/mp4",
+    ".aac": "audio/aac",
+    ".mp3": "audio/mpeg",
+    ".wav": "audio/wav",
+    ".ogg": "audio/ogg",
+    ".webm": "audio/webm",
+    ".3gp": "audio/3gpp",
+    ".amr": "audio/amr",
+}
+_EXTENSIONS = {media_type: ext for ext, media_type in MEDIA_TYPES.items()}
+_EXTENSIONS.update({"audio/x-m4a": ".m4a", "audio/m4a": ".m4a", "audio/mp3": ".mp3", "audio/x-wav": ".wav", "audio/wave": ".wav"})
+
+# data URI 가 아닌 base64 는 이 길이 이상이고 음성 파일 시그니처가 있을 때만 음성으로 봅니다. (짧은 문구 오인 방지)
+INLINE_AUDIO_MIN_CHARS = 1024
+_DATA_URI = re.compile(r"^data:(audio/[\w.+-]+)(?:;[\w=.+-]+)*;base64,", re.IGNORECASE)
+_BASE64 = re.compile(r"^[A-Za-z0-9+/\s]+={0,2}\s*$")
+
+
+def media_type_for(path: str) -> str:
+    return MEDIA_TYPES.get(os.path.splitext(path)[1].lower(), "application/octet-stream")
+
+
+def sniff_extension(data: bytes) -> str | None:
+    """파일 앞부분으로 음성 형식을 추정합니다."""
+    if data[4:8] == b"ftyp":
+        return ".3gp" if data[8:11] == b"3gp" else ".m4a"
+    if data.startswith(b"ID3") or data[:2] in (b"\xff\xfb", b"\xff\xf3", b"\xff\xf2"):
+        return ".mp3"
+    if data[:2] in (b"\xff\xf1", b"\xff\xf9"):
+        return ".aac"
+    if data.startswith(b"RIFF") and data[8:12] == b"WAVE":
+        return ".wav"
+    if data.startswith(b"OggS"):
+        return ".ogg"
+    if data.startswith(b"\x1a\x45\xdf\xa3"):
+        return ".webm"
+    if data.startswith(b"#!AMR"):
+        return ".amr"
+    return None
+
+
+def decode_inline_audio(value: str | None) -> tuple[bytes, str] | None:
+    """audio_message 에 들어온 음성(base64/data URI)을 (바이트, 확장자)로 돌려줍니다. 일반 문구면 None."""
+    if not value:
+        return None
+    match = _DATA_URI.match(value)
+    if match:
+        payload = value[match.end():]
+    elif len(value) >= INLINE_AUDIO_MIN_CHARS and _BASE64.match(value):
+        payload = value
+    else:
+        return None
+    try:
+        data = base64.b64decode("".join(payload.split()), validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    ext = sniff_extension(data) or (_EXTENSIONS.get(match.group(1).lower()) if match else None)
+    if not data or ext is None:
+        return None
+    return data, ext
+
+
+def _new_path(ext: str) -> str:
+    upload_path, unique_filename_base = PhotoService.generate_file_path(base_dir=AUDIO_DIR)
+    return os.path.join(upload_path, f"{unique_filename_base}{ext}")
+
+
+def save_audio(data: bytes, ext: str) -> str:
+    """음성 바이트를 파일로 저장하고 경로를 반환합니다. (파일 쓰기가 있으므로 스레드에서 호출)"""
+    path = _new_path(ext)
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def save_audio_stream(source: BinaryIO, file_name: str | None) -> str:
+    """업로드된 음성 파일을 메모리에 모두 올리지 않고 조금씩 복사합니다. (스레드에서 호출)"""
+    ext = os.path.splitext(file_name or "")[1].lower()
+    if ext not in MEDIA_TYPES:
+        head = source.read(16)
+        source.seek(0)
+        ext = sniff_extension(head)
+        if ext is None:
+            raise HTTPException(status_code=400, detail="지원하지 않는 음성 파일 형식입니다.")
+    path = _new_path(ext)
+    with open(path, "wb") as f:
+        shutil.copyfileobj(source, f, 1024 * 1024)
+        size = f.tell()
+    if size > settings.AUDIO_MAX_FILE_BYTES:
+        remove(path)
+        raise HTTPException(status_code=413, detail=f"음성 파일은 {settings.AUDIO_MAX_FILE_BYTES} 바이트 이하여야 합니다.")
+    return path
+
+
+def extract_inline_audio(audio_message: str) -> tuple[str, str | None]:
+    """audio_message 가 음성이면 파일로 옮기고 ("", 경로)를, 문구면 (문구, None)을 반환합니다. (스레드에서 호출)"""
+    inline = decode_inline_audio(audio_message)
+    if inline is None:
+        return audio_message, None
+    if len(inline[0]) > settings.AUDIO_MAX_FILE_BYTES:
+        raise HTTPException(status_code=413, detail=f"음성 파일은 {settings.AUDIO_MAX_FILE_BYTES} 바이트 이하여야 합니다.")
+    return "", save_audio(*inline)
+
+
+def remove(path: str | None):
+    if not path:
+        return
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def audio_url(photo_id: int) -> str:
+    """가족 앱이 음성을 재생할 때 쓰는 스트리밍 주소"""
+    return f"{settings.PUBLIC_BASE_URL.rstrip('/')}/api/v1/family/family-yard/photo/{photo_id}/audio"
+
+
+def get_audio_path(db: Session, photo_id: int) -> str | None:
+    row = db.query(Post.audio_path)\
+            .filter(Post.photo_id == photo_id, Post.audio_path.isnot(None))\
+            .order_by(Post.id.desc())\
+            .first()
+    return row[0] if row else None
+
+
+def backfill(db: Session, batch_size: int = 100) -> int:
+    """posts.audio_message 에 들어 있던 음성을 파일로 옮깁니다. (마이그레이션 9) 옮긴 게시글 수를 반환합니다.
+    마이그레이션 중에는 이후 리비전이 추가한 컬럼이 아직 없을 수 있어 필요한 컬럼만 읽고 id 로 갱신합니다."""
+    count, last_id = 0, 0
+    while True:
+        rows = db.query(Post.id, Post.audio_message)\
+                 .filter(Post.id > last_id,
+                         or_(Post.audio_message.like("data:audio%"),
+                             func.length(Post.audio_message) >= INLINE_AUDIO_MIN_CHARS))\
+                 .order_by(Post.id)\
+                 .limit(batch_size)\
+                 .all()
+        if not rows:
+            return count
+        for post_id, audio_message in rows:
+            last_id = post_id
+            inline = decode_inline_audio(audio_message)
+            if inline is None:
+                continue
+            db.query(Post)\
+              .filter(Post.id == post_id)\
+              .update({Post.audio_path: save_audio(*inline), Post.audio_message: ""}, synchronize_session=False)
+            count += 1
+        db.commit()
+        logger.info("게시글 음성 파일로 옮기는 중", extra={"count": count, "last_post_id": last_id})
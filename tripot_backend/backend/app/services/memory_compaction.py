@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import math
+import operator
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from app.core import metrics, tokens
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.db.models import User
+from app.services import ai_service, job_runner, memory_search, vector_db
+
+logger = logging.getLogger(__name__)
+
+# 장기 사용자의 기억 정리
+# create_memory_for_pinecone 은 세션마다 기억을 하나씩 추가하므로, 오래 쓴 사용자일수록 search_memories 가
+# 훑는 후보가 늘고 비슷한 옛 기억이 상위를 차지합니다. 주기적으로 사용자별로
+# - 같은 기간(MEMORY_CLUSTER_PERIOD_DAYS) 안의 비슷한 기억을 묶어 요약 기억(consolidated) 하나로 합치고,
+# - 어디에도 묶이지 않은 오래된 발화(utterance) 기억은 만료시킵니다.
+# 최근 MEMORY_COMPACTION_MIN_AGE_DAYS 이내의 기억과 이미 합쳐진 기억은 건드리지 않습니다.
+# 군집화는 순수 파이썬 계산이라 cpu 큐의 프로세스 풀에서 실행합니다.
+
+MEMORY_TYPE_CONSOLIDATED = "consolidated"
+MEMORY_TYPE_UTTERANCE = "utterance"
+
+JOB_COMPACT_USER = "memory.compact"
+JOB_COMPACT_ALL = "memory.compact_all"
+
+_DELETE_BATCH = 1000
+
+COMPACTION = metrics.counter(
+    "tripot_memory_compaction_total", "기억 정리 결과 수 (merged: 합쳐진 원본, consolidated: 새 요약 기억, expired: 만료)", ("result",)
+)
+
+
+def _normalize(values: list[float]) -> list[float]:
+    norm = math.sqrt(sum(v * v for v in values)) or 1.0
+    return [v / norm for v in values]
+
+
+def _dot(a: list[float], b: list[float]) -> float:
+    return sum(map(operator.mul, a, b))
+
+
+def cluster_memories(items: list[tuple[str, list[float], int]], period_seconds: int, threshold: float) -> list[list[str]]:
+    """(id, 벡터, timestamp) 목록을 기간별로 나눈 뒤, 기간 안에서 군집 중심과의 코사인 유사도가 threshold 이상이면
+    같은 군집으로 묶습니다. (오래된 것부터 한 번씩 보는 탐욕적 방식) 군집별 id 목록을 반환합니다."""
+    periods: dict[int, list[tuple[int, str, list[float]]]] = defaultdict(list)
+    for memory_id, values, timestamp in items:
+        periods[timestamp // period_seconds].append((timestamp, memory_id, _normalize(values)))
+
+    clusters = []
+    for period in sorted(periods):
+        # 군집별 [벡터 합, 벡터 합의 크기, id 목록]
+        groups: list[list] = []
+        for _, memory_id, vector in sorted(periods[period]):
+            best, best_score = None, threshold
+            for group in groups:
+                score = _dot(vector, group[0]) / group[1]
+                if score >= best_score:
+                    best, best_score = group, score
+            if best is None:
+                groups.append([list(vector), 1.0, [memory_id]])
+                continue
+            best[0] = [a + b for a, b in zip(best[0], vector)]
+            best[1] = math.sqrt(_dot(best[0], best[0])) or 1.0
+            best[2].append(memory_id)
+        clusters.extend(group[2] for group in groups)
+    return clusters
+
+
+async def _fetch_user_memories(index, user_id: str) -> list[dict]:
+    # 서버리스 인덱스는 메타데이터 조건으로 목록을 뽑을 수 없어, 사용자 필터를 건 query 로 한 번에 가져옵니다.
+    probe = [1.0 / math.sqrt(vector_db.EMBEDDING_DIMENSION)] * vector_db.EMBEDDING_DIMENSION
+    results = await asyncio.to_thread(
+        index.query,
+        vector=probe,
+        top_k=settings.MEMORY_COMPACTION_FETCH_LIMIT,
+        filter={'user_id': user_id},
+        include_metadata=True,
+        include_values=True,
+    )
+    return [
+        {'id': match['id'], 'values': list(match['values']), 'metadata': dict(match.get('metadata') or {})}
+        for match in results['matches'] or []
+    ]
+
+
+async def _consolidate(index, user_id: str, members: list[dict]):
+    members = sorted(members, key=lambda m: m['metadata'].get('timestamp', 0))
+    # 큰 묶음은 오래된 기억부터 예산(MEMORY_SUMMARY_INPUT_MAX_TOKENS)만큼만 넣습니다.
+    memory_lines = tokens.truncate(
+        "\n".join(f"- {m['metadata'].get('text', '')}" for m in members),
+        settings.MEMORY_SUMMARY_INPUT_MAX_TOKENS, settings.CHAT_MODEL_LARGE,
+    )
+    prompt = f"""다음은 같은 시기에 나눈 비슷한 주제의 대화 기억들이야. 이 기억들을 1~3 문장의 하나의 기억으로 합쳐줘. 규칙: 지명, 인명 등 모든 고유명사와 날짜/건강 관련 정보는 반드시 포함시켜야 해.
+
+--- 기억 목록 ---
+{memory_lines}
+-----------------
+
+합친 기억:"""
+    memory_text = await ai_service.get_ai_chat_completion(prompt, max_tokens=300, temperature=0.3, call_site="memory_compaction")
+    embedding = await ai_service.get_embedding(memory_text, call_site="memory_compaction")
+    timestamps = [m['metadata'].get('timestamp', 0) for m in members]
+
+    vector_to_upsert = {
+        'id': str(uuid.uuid4()),
+        'values': embedding,
+        'metadata': {
+            'user_id': user_id,
+            'text': memory_text,
+            # 검색 시 최신성 점수는 묶인 기억 중 가장 최근 시각을 따릅니다.
+            'timestamp': max(timestamps),
+            'memory_type': MEMORY_TYPE_CONSOLIDATED,
+            'source_count': len(members),
+            'period_start': min(timestamps),
+        }
+    }
+    # 새 기억을 먼저 저장한 뒤 원본을 지웁니다. (중간에 실패해도 기억이 사라지지 않음)
+    await asyncio.to_thread(index.upsert, vectors=[vector_to_upsert])
+    await asyncio.to_thread(
+        memory_search.record_memory, user_id, vector_to_upsert['id'], memory_text, max(timestamps), MEMORY_TYPE_CONSOLIDATED
+    )
+    await _delete(index, user_id, [m['id'] for m in members])
+
+
+async def _delete(index, user_id: str, ids: list[str]):
+    for start in range(0, len(ids), _DELETE_BATCH):
+        await asyncio.to_thread(index.delete, ids=ids[start:start + _DELETE_BATCH])
+    await asyncio.to_thread(memory_search.forget_memories, user_id, ids)
+
+
+async def compact_user_memories(user_id: str) -> dict:
+    """사용자 한 명의 기억을 정리하고 결과 수를 반환합니다."""
+    index = await vector_db.get_index()
+    if index is None:
+        raise RuntimeError("Pinecone 인덱스에 연결할 수 없습니다.")
+
+    memories = await _fetch_user_memories(index, user_id)
+    # 키워드 검색용 원문 사본이 없는 기억(사본 테이블 도입 이전 기억 등)을 채웁니다.
+    synced = await asyncio.to_thread(memory_search.sync_memories, user_id, memories)
+    result = {"memories": len(memories), "synced": synced, "merged": 0, "consolidated": 0, "expired": 0}
+    if len(memories) < settings.MEMORY_COMPACTION_MIN_MEMORIES:
+        return result
+
+    now = int(time.time())
+    min_age_cutoff = now - settings.MEMORY_COMPACTION_MIN_AGE_DAYS * 86400
+    candidates = [
+        m for m in memories
+        if m['metadata'].get('memory_type') != MEMORY_TYPE_CONSOLIDATED
+        and m['metadata'].get('timestamp', now) < min_age_cutoff
+    ]
+    clusters = await job_runner.run_cpu(
+        cluster_memories,
+        [(m['id'], m['values'], int(m['metadata'].get('timestamp', now))) for m in candidates],
+        settings.MEMORY_CLUSTER_PERIOD_DAYS * 86400,
+        settings.MEMORY_CLUSTER_SIMILARITY,
+    )
+
+    by_id = {m['id']: m for m in candidates}
+    expire_cutoff = now - settings.MEMORY_UTTERANCE_TTL_DAYS * 86400
+    expired = []
+    for ids in clusters:
+        if len(ids) > 1:
+            await _consolidate(index, user_id, [by_id[i] for i in ids])
+            result["merged"] += len(ids)
+            result["consolidated"] += 1
+            continue
+        memory = by_id[ids[0]]
+        if memory['metadata'].get('memory_type') == MEMORY_TYPE_UTTERANCE and memory['metadata'].get('timestamp', now) < expire_cutoff:
+            expired.append(memory['id'])
+    if expired:
+        await _delete(index, user_id, expired)
+        result["expired"] = len(expired)
+
+    for key in ("merged", "consolidated", "expired"):
+        if result[key]:
+            COMPACTION.inc(result[key], result=key)
+    logger.info("기억 정리 완료", extra={"user_id": user_id, **result})
+    return result
+
+
+def schedule_compaction(reschedule: bool = False) -> int:
+    """다음 전체 정리 작업을 등록합니다. (report_scheduler.schedule_nightly 와 같은 방식)"""
+    run_at = job_runner.next_local_run(settings.MEMORY_COMPACTION_HOUR, settings.MEMORY_COMPACTION_INTERVAL_DAYS)
+    return job_runner.enqueue(
+        JOB_COMPACT_ALL, {}, dedup_key=JOB_COMPACT_ALL, run_after=job_runner.to_run_after(run_at), debounce=reschedule
+    )
+
+
+@job_runner.job(JOB_COMPACT_USER, queue="memory")
+async def compact_user_job(payload: dict):
+    await compact_user_memories(payload["user_id"])
+
+
+@job_runner.job(JOB_COMPACT_ALL, queue="default")
+def compact_all_job(payload: dict):
+    schedule_compaction(reschedule=True)
+
+    db = SessionLocal()
+    try:
+        user_ids = [row.user_id_str for row in db.query(User.user_id_str).all()]
+    finally:
+        db.close()
+    window_seconds = settings.MEMORY_COMPACTION_WINDOW_MINUTES * 60
+    now = datetime.utcnow()
+    for user_id in user_ids:
+        job_runner.enqueue(
+            JOB_COMPACT_USER,
+            {"user_id": user_id},
+            dedup_key=f"memory-compact:{user_id}",
+            run_after=now + timedelta(seconds=job_runner.stagger(user_id, window_seconds)),
+        )
+    logger.info("기억 정리 예약", extra={"count": len(user_ids)})
@@ -0,0 +1,226 @@
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+
+from app.core import metrics
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.db.models import Memory
+
+logger = logging.getLogger(__name__)
+
+# 기억 키워드 검색 (BM25)
+# 기억 요약은 지명/인명 같은 고유명사를 반드시 포함하도록 만들지만, 임베딩 유사도만으로는 정확한 이름 일치를
+# 자주 놓칩니다. 기억 원문을 memories 테이블에 함께 저장해 두고, 사용자별 역색인을 메모리에 만들어
+# vector_db.search_memories 에서 벡터 유사도와 가중합으로 합칩니다.
+#
+# 토큰화: 한글은 조사가 붙어 형태가 바뀌므로 어절을 글자 2-gram 으로 나눕니다. ("부산에서" → 부산, 산에, 에서)
+# 기억을 색인할 때는 어절의 첫 글자도 넣어 한 글자 검색어("약")가 "약을" 같은 어절을 찾게 합니다.
+# 영문/숫자는 단어 그대로 사용합니다.
+
+_WORD_RE = re.compile(r"[가-힣]+|[0-9a-z]+")
+_HANGUL_RE = re.compile(r"[가-힣]+")
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+LEXICAL_CACHE = metrics.counter("tripot_memory_lexical_cache_total", "사용자별 기억 역색인 캐시 조회 수", ("result",))
+
+
+def tokenize(text: str, first_syllable: bool = False) -> list[str]:
+    """first_syllable=True 이면 여러 글자 한글 어절의 첫 글자도 토큰으로 넣습니다. (색인용, 검색어에는 쓰지 않음)"""
+    tokens = []
+    for word in _WORD_RE.findall((text or "").lower()):
+        if len(word) > 1 and _HANGUL_RE.fullmatch(word):
+            if first_syllable:
+                tokens.append(word[0])
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+@dataclass
+class LexicalHit:
+    id: str
+    score: float
+    text: str
+    timestamp: int
+
+
+@dataclass
+class UserLexicalIndex:
+    """사용자 한 명의 기억 역색인"""
+    # 기억 id → (토큰 빈도, 문서 길이, 원문, timestamp)
+    docs: dict[str, tuple[Counter, int, str, int]] = field(default_factory=dict)
+    # 토큰 → 포함한 기억 id 집합
+    postings: dict[str, set[str]] = field(default_factory=dict)
+    total_length: int = 0
+    built_at: float = field(default_factory=time.monotonic)
+
+    def add(self, memory_id: str, text: str, timestamp: int):
+        if memory_id in self.docs:
+            self.remove(memory_id)
+        tf = Counter(tokenize(text, first_syllable=True))
+        length = sum(tf.values())
+        self.docs[memory_id] = (tf, length, text, timestamp)
+        self.total_length += length
+        for token in tf:
+            self.postings.setdefault(token, set()).add(memory_id)
+
+    def remove(self, memory_id: str):
+        doc = self.docs.pop(memory_id, None)
+        if doc is None:
+            return
+        tf, length, _, _ = doc
+        self.total_length -= length
+        for token in tf:
+            ids = self.postings.get(token)
+            if ids is not None:
+                ids.discard(memory_id)
+                if not ids:
+                    del self.postings[token]
+
+    def search(self, query: str, limit: int) -> list[LexicalHit]:
+        if not self.docs:
+            return []
+        query_tokens = set(tokenize(query))
+        n_docs = len(self.docs)
+        avg_length = (self.total_length / n_docs) or 1.0
+        scores: dict[str, float] = {}
+        for token in query_tokens:
+            ids = self.postings.get(token)
+            if not ids:
+                continue
+            idf = math.log(1 + (n_docs - len(ids) + 0.5) / (len(ids) + 0.5))
+            for memory_id in ids:
+                tf, length, _, _ = self.docs[memory_id]
+                freq = tf[token]
+                norm = freq * (BM25_K1 + 1) / (freq + BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length))
+                scores[memory_id] = scores.get(memory_id, 0.0) + idf * norm
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [LexicalHit(memory_id, score, self.docs[memory_id][2], self.docs[memory_id][3]) for memory_id, score in ranked]
+
+
+class LexicalIndexCache:
+    """사용자별 역색인 LRU. 이 프로세스에서 저장/삭제한 기억은 바로 반영하고,
+    다른 인스턴스의 변경은 TTL 이 지나 다시 만들 때 반영됩니다."""
+
+    def __init__(self, max_users: int, ttl_seconds: float):
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self._indexes: OrderedDict[str, UserLexicalIndex] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str) -> UserLexicalIndex:
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is not None and time.monotonic() - index.built_at <= self.ttl_seconds:
+                self._indexes.move_to_end(user_id)
+                LEXICAL_CACHE.inc(result="hit")
+                return index
+        LEXICAL_CACHE.inc(result="miss")
+        index = self._build(user_id)
+        with self._lock:
+            self._indexes[user_id] = index
+            self._indexes.move_to_end(user_id)
+            while len(self._indexes) > self.max_users:
+                self._indexes.popitem(last=False)
+        return index
+
+    def _build(self, user_id: str) -> UserLexicalIndex:
+        db = SessionLocal()
+        try:
+            rows = db.query(Memory.id, Memory.text, Memory.timestamp)\
+                     .filter(Memory.user_id == user_id)\
+                     .all()
+        finally:
+            db.close()
+        index = UserLexicalIndex()
+        for memory_id, text, timestamp in rows:
+            index.add(memory_id, text, timestamp)
+        return index
+
+    def search(self, user_id: str, query: str, limit: int) -> list[LexicalHit]:
+        index = self.get(user_id)
+        # 같은 역색인을 다른 스레드가 고치는 중일 수 있어 잠금 안에서 검색합니다. (사용자당 기억 수백 건 규모)
+        with self._lock:
+            return index.search(query, limit)
+
+    def add(self, user_id: str, memory_id: str, text: str, timestamp: int):
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is not None:
+                index.add(memory_id, text, timestamp)
+
+    def remove(self, user_id: str, memory_ids: list[str]):
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is not None:
+                for memory_id in memory_ids:
+                    index.remove(memory_id)
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+
+_cache = LexicalIndexCache(settings.MEMORY_LEXICAL_CACHE_USERS, settings.MEMORY_LEXICAL_CACHE_TTL_SECONDS)
+
+
+def search(user_id: str, query: str, limit: int = 5) -> list[LexicalHit]:
+    """사용자 기억을 BM25 로 검색합니다. (캐시가 없으면 DB 를 읽으므로 스레드에서 호출)"""
+    return _cache.search(user_id, query, limit)
+
+
+def record_memory(user_id: str, memory_id: str, text: str, timestamp: int, memory_type: str):
+    """Pinecone 에 저장한 기억의 원문을 함께 저장합니다."""
+    db = SessionLocal()
+    try:
+        db.merge(Memory(id=memory_id, user_id=user_id, text=text, timestamp=timestamp, memory_type=memory_type))
+        db.commit()
+    finally:
+        db.close()
+    _cache.add(user_id, memory_id, text, timestamp)
+
+
+def forget_memories(user_id: str, memory_ids: list[str]):
+    if not memory_ids:
+        return
+    db = SessionLocal()
+    try:
+        db.query(Memory).filter(Memory.id.in_(memory_ids)).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+    _cache.remove(user_id, memory_ids)
+
+
+def sync_memories(user_id: str, memories: list[dict]) -> int:
+    """Pinecone 에서 읽은 기억 중 사본이 없는 것을 채웁니다. (사본 테이블 도입 이전 기억) 채운 수를 반환합니다."""
+    ids = [m['id'] for m in memories]
+    if not ids:
+        return 0
+    db = SessionLocal()
+    try:
+        existing = {row.id for row in db.query(Memory.id).filter(Memory.id.in_(ids)).all()}
+        missing = [m for m in memories if m['id'] not in existing and m['metadata'].get('text')]
+        for m in missing:
+            db.add(Memory(
+                id=m['id'],
+                user_id=user_id,
+                text=m['metadata']['text'],
+                timestamp=int(m['metadata'].get('timestamp', 0)),
+                memory_type=m['metadata'].get('memory_type', 'utterance'),
+            ))
+        db.commit()
+    finally:
+        db.close()
+    if missing:
+        for m in missing:
+            _cache.add(user_id, m['id'], m['metadata']['text'], int(m['metadata'].get('timestamp', 0)))
+    return len(missing)
@@ -0,0 +1,87 @@
+import logging
+import re
+from dataclasses import dataclass
+
+from app.core import metrics
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 라우팅 판단에 사용하는 간단한 로컬 휴리스틱입니다. (네트워크 호출 없음)
+# 건강/감정/가족 등 guidelines_and_reactions 에서 별도 대응을 요구하는 주제는 큰 모델로 보냅니다.
+_COMPLEX_KEYWORDS = (
+    "아파", "아프", "병원", "약", "어지러", "수술", "다쳤", "넘어졌", "잠이 안",
+    "속상", "우울", "외로", "슬퍼", "슬프", "힘들", "무서", "걱정",
+    "아들", "딸", "손주", "손자", "손녀", "며느리", "사위", "남편", "아내", "가족",
+)
+# 과거 기억을 되짚는 표현 (기억 검색 결과가 있을 때만 의미가 있음)
+_RECALL_KEYWORDS = ("전에", "지난번", "저번", "기억", "그때", "예전", "아까")
+# 질문으로 끝나는 발화 (의문형 어미)
+_QUESTION_PATTERN = re.compile(r"(\?|까|나요|가요|니|냐|어때|뭐|왜|언제|어디|누구|어떻게)\s*$")
+
+TIER_SMALL = "small"
+TIER_LARGE = "large"
+
+
+@dataclass
+class RouteDecision:
+    tier: str
+    model: str
+    max_tokens: int
+    reason: str
+
+
+ROUTE_DECISIONS = metrics.counter(
+    "tripot_model_route_total", "대화 턴의 모델 티어 라우팅 결정 수", ("tier", "reason")
+)
+COMPLETION_SECONDS = metrics.histogram(
+    "tripot_chat_completion_seconds", "티어별 대화 응답 생성 소요 시간(초)", ("tier", "model")
+)
+
+
+def _decision(tier: str, reason: str) -> RouteDecision:
+    if tier == TIER_SMALL:
+        return RouteDecision(tier, settings.CHAT_MODEL_SMALL, settings.CHAT_MAX_TOKENS_SMALL, reason)
+    return RouteDecision(tier, settings.CHAT_MODEL_LARGE, settings.CHAT_MAX_TOKENS_LARGE, reason)
+
+
+def route_turn(user_message: str, relevant_memories: str = "") -> RouteDecision:
+    """발화의 복잡도를 로컬 휴리스틱으로 판단해 사용할 모델 티어를 결정합니다."""
+    if not settings.MODEL_ROUTING_ENABLED:
+        return _decision(TIER_LARGE, "routing_disabled")
+
+    text = user_message.strip()
+    compact = re.sub(r"\s+", "", text)
+
+    if any(keyword in text for keyword in _COMPLEX_KEYWORDS):
+        return _decision(TIER_LARGE, "sensitive_topic")
+    if relevant_memories and any(keyword in text for keyword in _RECALL_KEYWORDS):
+        return _decision(TIER_LARGE, "memory_recall")
+    if _QUESTION_PATTERN.search(text):
+        return _decision(TIER_LARGE, "question")
+    if len(compact) > settings.ROUTING_SMALL_MAX_CHARS:
+        return _decision(TIER_LARGE, "long_utterance")
+
+    return _decision(TIER_SMALL, "short_utterance")
+
+
+def fallback_for(decision: RouteDecision) -> RouteDecision | None:
+    """큰 모델이 시간 예산을 넘기거나 차단되었을 때 대신 쓸 작은 모델 (이미 작은 모델이면 None)"""
+    if decision.tier == TIER_SMALL:
+        return None
+    return _decision(TIER_SMALL, "budget_fallback")
+
+
+def record_latency(decision: RouteDecision, elapsed_seconds: float):
+    """티어별 응답 지연 시간을 지표로 기록하고 라우팅 결과를 로그로 남깁니다."""
+    ROUTE_DECISIONS.inc(tier=decision.tier, reason=decision.reason)
+    COMPLETION_SECONDS.observe(elapsed_seconds, tier=decision.tier, model=decision.model)
+    logger.info(
+        "모델 라우팅",
+        extra={
+            "tier": decision.tier,
+            "model": decision.model,
+            "reason": decision.reason,
+            "latency_ms": round(elapsed_seconds * 1000),
+        },
+    )
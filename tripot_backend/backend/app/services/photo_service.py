@@ -1,9 +1,13 @@
+import logging
 import os
 import uuid
 from datetime import datetime, timezone
 from typing import List, Dict, Optional
 from sqlalchemy.orm import Session, joinedload
 from app.db.models import FamilyPhoto, User, PhotoComment # ✨ PhotoComment 임포트
+from app.services import activity_counters
+
+logger = logging.getLogger(__name__)
 
 class PhotoService:
     @staticmethod
@@ -16,7 +20,8 @@ class PhotoService:
         return upload_path, unique_filename
 
     @staticmethod
-    def save_photo_metadata(db: Session, user: User, filename: str, original_name: str, file_path: str, file_size: int, uploaded_by: str) -> FamilyPhoto:
+    def save_photo_metadata(db: Session, user: User, filename: str, original_name: str, file_path: str, file_size: int, uploaded_by: str, commit: bool = True) -> FamilyPhoto:
+        """commit=False 이면 flush 만 해서 id 를 받고, 커밋은 호출한 쪽에서 한 번에 합니다. (여러 장 업로드)"""
         current_time = datetime.now(timezone.utc)
         
         photo = FamilyPhoto(
@@ -29,11 +34,12 @@ class PhotoService:
             created_at=current_time
         )
         db.add(photo)
+        activity_counters.increment(db, user.id, activity_counters.METRIC_PHOTO_UPLOAD, actor=uploaded_by)
+        if not commit:
+            db.flush()
+            return photo
         db.commit()
         db.refresh(photo)
-        
-        print(f"✅ 사진 저장 완료 - ID: {photo.id}, created_at: {photo.created_at}")
-        
         return photo
 
     @staticmethod
@@ -45,11 +51,7 @@ class PhotoService:
                  .order_by(FamilyPhoto.created_at.desc())\
                  .limit(limit)\
                  .all()
-        
-        print(f"📷 조회된 사진 개수: {len(photos)}")
-        for photo in photos:
-            print(f"  - ID: {photo.id}, created_at: {photo.created_at}, comments: {len(photo.comments)}개")
-        
+        logger.debug("사진 목록 조회", extra={"user_id": user.id, "count": len(photos)})
         return photos
 
     @staticmethod
@@ -66,7 +68,7 @@ class PhotoService:
         
         for photo in photos:
             if photo.created_at is None:
-                print(f"⚠️ 경고: photo.id={photo.id}의 created_at이 NULL입니다")
+                logger.warning("created_at이 NULL인 사진", extra={"photo_id": photo.id})
                 date_key = datetime.now().strftime('%Y-%m-%d')
             else:
                 date_key = photo.created_at.strftime('%Y-%m-%d')
@@ -91,6 +93,5 @@ class PhotoService:
                 "file_url": f"/api/v1/family/family-yard/photo/{photo.id}",
                 "comments": comments_data # ✨ 주석 해제 및 데이터 추가
             })
-        
-        print(f"📅 날짜별 그룹화 결과: {list(photos_by_date.keys())}")
+
         return photos_by_date
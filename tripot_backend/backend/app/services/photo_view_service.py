@@ -0,0 +1,203 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from sqlalchemy.orm import Session
+
+from app.core import metrics, serialization
+from app.core.config import settings
+from app.db.models import FamilyPhoto, PhotoComment, Post
+from app.services import media_store
+
+logger = logging.getLogger(__name__)
+
+# 사진 상세 화면용 응답 (meta, detail, metadata) 을 사진 id 별로 캐시합니다.
+# 응답은 형식(JSON/MessagePack)별로 한 번만 직렬화해 bytes 와 ETag 로 보관하고, 댓글/게시글이 바뀌면 invalidate(photo_id) 로 지웁니다.
+VIEW_META = "meta"
+VIEW_DETAIL = "detail"
+VIEW_METADATA = "metadata"
+
+CACHE_LOOKUPS = metrics.counter(
+    "tripot_photo_view_cache_total", "사진 상세 응답 캐시 조회 수", ("view", "result")
+)
+
+
+@dataclass
+class CachedView:
+    body: bytes
+    media_type: str
+    etag: str
+    cached_at: float
+
+
+class PhotoViewCache:
+    """LRU + TTL 캐시. 무효화와 동시에 진행 중이던 조회 결과는 저장하지 않습니다."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[tuple, CachedView] = OrderedDict()
+        # 사진별 무효화 세대. 조회 시작 시점의 세대와 다르면 저장하지 않습니다.
+        self._generations: dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, view: str, photo_id: int, fmt: str) -> CachedView | None:
+        key = (view, photo_id, fmt)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry.cached_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def generation(self, photo_id: int) -> int:
+        with self._lock:
+            return self._generations.get(photo_id, 0)
+
+    def put(self, view: str, photo_id: int, fmt: str, entry: CachedView, generation: int):
+        key = (view, photo_id, fmt)
+        with self._lock:
+            if self._generations.get(photo_id, 0) != generation:
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, photo_id: int):
+        with self._lock:
+            self._generations[photo_id] = self._generations.get(photo_id, 0) + 1
+            for view in (VIEW_META, VIEW_DETAIL, VIEW_METADATA):
+                for fmt in serialization.MEDIA_TYPES:
+                    self._entries.pop((view, photo_id, fmt), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+
+_cache = PhotoViewCache(settings.PHOTO_VIEW_CACHE_MAX_ENTRIES, settings.PHOTO_VIEW_CACHE_TTL_SECONDS)
+
+
+def invalidate(photo_id: int):
+    """사진에 딸린 댓글/게시글이 바뀌었을 때 호출합니다."""
+    _cache.invalidate(photo_id)
+    logger.debug("사진 응답 캐시 무효화", extra={"photo_id": photo_id})
+
+
+def public_url(file_path: str | None) -> str | None:
+    """저장 경로(uploads/...)를 가족 앱에서 접근할 수 있는 URL 로 바꿉니다."""
+    if not file_path:
+        return None
+    relative_url = file_path.replace("\\", "/").split("uploads")[-1]  # → /family_photos/...
+    return f"{settings.PUBLIC_BASE_URL.rstrip('/')}/uploads{relative_url}"
+
+
+def _load_photo_with_post(db: Session, photo_id: int):
+    return db.query(FamilyPhoto, Post)\
+             .outerjoin(Post, FamilyPhoto.id == Post.photo_id)\
+             .filter(FamilyPhoto.id == photo_id)\
+             .first()
+
+
+def _build_meta(db: Session, photo_id: int) -> dict | None:
+    row = _load_photo_with_post(db, photo_id)
+    if not row:
+        return None
+    photo, post = row
+    return {
+        "id": photo.id,
+        "user_id": photo.user_id,
+        "file_url": public_url(photo.file_path),
+        "created_at": photo.created_at,
+        "uploaded_by": photo.uploaded_by,
+        "description": (post.description if post else None) or "",
+        "mentions": (post.mentions if post else None) or "",
+        "location": (post.location if post else None) or "",
+        "audio_message": (post.audio_message if post else None) or "",
+        "audio_url": media_store.audio_url(photo.id) if post and post.audio_path else None,
+    }
+
+
+def _build_detail(db: Session, photo_id: int) -> dict | None:
+    row = _load_photo_with_post(db, photo_id)
+    if not row:
+        return None
+    photo, post = row
+    return {
+        "id": photo.id,
+        "user_id": photo.user_id,
+        "file_url": public_url(photo.file_path),
+        "created_at": photo.created_at,
+        "uploaded_by": photo.uploaded_by,
+        "description": post.description if post else None,
+        "mentions": post.mentions if post else None,
+        "location": post.location if post else None,
+        "audio_message": post.audio_message if post else None,
+        "audio_url": media_store.audio_url(photo.id) if post and post.audio_path else None,
+    }
+
+
+def _build_metadata(db: Session, photo_id: int) -> dict | None:
+    row = _load_photo_with_post(db, photo_id)
+    if not row:
+        return None
+    photo, post = row
+    comments = db.query(PhotoComment)\
+                 .filter(PhotoComment.photo_id == photo_id)\
+                 .order_by(PhotoComment.created_at.asc())\
+                 .all()
+    return {
+        "id": photo.id,
+        "description": (post.description if post else None) or "",
+        "mentions": (post.mentions if post else None) or "",
+        "location": (post.location if post else None) or "",
+        "uploaded_by": photo.uploaded_by or "",
+        "created_at": photo.created_at,
+        "file_url": public_url(photo.file_path),
+        "comments": [
+            {"id": c.id, "author_name": c.author_name, "comment": c.comment_text, "created_at": c.created_at}
+            for c in comments
+        ],
+    }
+
+
+_BUILDERS = {VIEW_META: _build_meta, VIEW_DETAIL: _build_detail, VIEW_METADATA: _build_metadata}
+
+
+def get_photo_view(db: Session, view: str, photo_id: int, fmt: str = serialization.FORMAT_JSON) -> CachedView | None:
+    """캐시된 응답을 반환하고, 없으면 DB 에서 읽어 직렬화한 뒤 캐시합니다. 사진이 없으면 None."""
+    entry = _cache.get(view, photo_id, fmt)
+    if entry is not None:
+        CACHE_LOOKUPS.inc(view=view, result="hit")
+        return entry
+
+    CACHE_LOOKUPS.inc(view=view, result="miss")
+    generation = _cache.generation(photo_id)
+    payload = _BUILDERS[view](db, photo_id)
+    if payload is None:
+        return None
+    body = serialization.encode(payload, fmt)
+    entry = CachedView(
+        body=body,
+        media_type=serialization.MEDIA_TYPES[fmt],
+        etag=f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"',
+        cached_at=time.monotonic(),
+    )
+    _cache.put(view, photo_id, fmt, entry, generation)
+    return entry
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """If-None-Match 헤더(여러 값, W/ 접두사 포함)가 현재 ETag 와 일치하는지 확인합니다."""
+    if not if_none_match:
+        return False
+    candidates = [value.strip() for value in if_none_match.split(",")]
+    return "*" in candidates or any(value.removeprefix("W/") == etag for value in candidates)
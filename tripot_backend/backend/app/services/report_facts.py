@@ -0,0 +1,213 @@
+import json
+import logging
+from collections import Counter
+from datetime import date, timedelta
+
+from sqlalchemy.orm import Session
+
+from app.db.models import ReportFact, ReportRollup, Summary
+
+logger = logging.getLogger(__name__)
+
+# 일일 리포트의 주요 항목과 주/월 추이
+# summary_json 은 AI 가 만든 JSON 이라, 읽을 때마다 파싱하고 문자열 검사로 감정/건강/요청 물품을 뽑았습니다.
+# 리포트를 저장할 때 report_facts 에 한 번 뽑아 두고, 그 날짜가 속한 주/월의 report_rollups 를 다시 합산합니다.
+# (주/월 하나는 최대 31일치 facts 라 저장 시 바로 다시 계산합니다)
+
+MOOD_POSITIVE = "positive"
+MOOD_NEUTRAL = "neutral"
+MOOD_NEGATIVE = "negative"
+MOOD_SCORES = {MOOD_POSITIVE: 1, MOOD_NEUTRAL: 0, MOOD_NEGATIVE: -1}
+
+PERIOD_DAY = "day"
+PERIOD_WEEK = "week"
+PERIOD_MONTH = "month"
+ROLLUP_PERIODS = (PERIOD_WEEK, PERIOD_MONTH)
+
+TOP_N = 5
+
+
+def parse_summary(summary_json) -> dict:
+    """summaries.summary_json 을 dict 로 돌려줍니다. (이전 데이터 중 JSON 문자열로 저장된 경우 포함)"""
+    if isinstance(summary_json, str):
+        try:
+            summary_json = json.loads(summary_json)
+        except json.JSONDecodeError:
+            return {}
+    return summary_json if isinstance(summary_json, dict) else {}
+
+
+def classify_mood(emotion: str) -> str:
+    if "긍정" in emotion or "좋" in emotion:
+        return MOOD_POSITIVE
+    if "부정" in emotion or "우울" in emotion or "슬픔" in emotion:
+        return MOOD_NEGATIVE
+    return MOOD_NEUTRAL
+
+
+def _as_list(value) -> list:
+    """목록 항목 값. 모델이 문자열 하나로 답했으면 항목 하나로 보고, 그 외 형태는 버립니다."""
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str):
+        return [value]
+    return []
+
+
+def extract_facts(summary_data: dict) -> dict:
+    """리포트 JSON 에서 감정, 건강 언급, 요청 물품을 뽑습니다.
+    리포트 저장과 마이그레이션 6 에서 실행되므로 모델이 형식과 다르게 답한 항목은 예외 없이 건너뜁니다."""
+    emotion_status = summary_data.get("감정_신체_상태") or {}
+    if isinstance(emotion_status, str):
+        # 감정 상태를 문장 하나로 답한 경우
+        emotion_status = {"전반적_감정": emotion_status}
+    elif not isinstance(emotion_status, dict):
+        emotion_status = {}
+    mood = classify_mood(str(emotion_status.get("전반적_감정") or "")) if emotion_status else None
+    health_mentions = [m.strip() for m in _as_list(emotion_status.get("건강_언급")) if isinstance(m, str) and m.strip()]
+    requested_items = []
+    for item in _as_list(summary_data.get("요청_물품")):
+        name = item.get("물품") if isinstance(item, dict) else item
+        if isinstance(name, str) and name.strip():
+            requested_items.append(name.strip())
+    return {
+        "mood": mood,
+        "mood_score": MOOD_SCORES.get(mood),
+        "health_mentions": health_mentions,
+        "requested_items": requested_items,
+    }
+
+
+def period_start(period: str, day: date) -> date:
+    if period == PERIOD_WEEK:
+        return day - timedelta(days=day.weekday())
+    if period == PERIOD_MONTH:
+        return day.replace(day=1)
+    return day
+
+
+def period_end(period: str, start: date) -> date:
+    """[start, end) 의 end"""
+    if period == PERIOD_WEEK:
+        return start + timedelta(days=7)
+    if period == PERIOD_MONTH:
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def save_facts(db: Session, user_id: int, report_date: date, summary_data: dict):
+    """리포트의 facts 를 저장하고 해당 주/월 합계를 다시 계산합니다. 커밋은 호출하는 쪽에서 합니다."""
+    facts = extract_facts(summary_data)
+    row = db.query(ReportFact).filter(ReportFact.user_id == user_id, ReportFact.report_date == report_date).first()
+    if row is None:
+        row = ReportFact(user_id=user_id, report_date=report_date)
+        db.add(row)
+    row.mood = facts["mood"]
+    row.mood_score = facts["mood_score"]
+    row.health_mentions = facts["health_mentions"]
+    row.requested_items = facts["requested_items"]
+    row.health_mention_count = len(facts["health_mentions"])
+    row.item_request_count = len(facts["requested_items"])
+    db.flush()
+    for period in ROLLUP_PERIODS:
+        refresh_rollup(db, user_id, period, period_start(period, report_date))
+
+
+def _top(counter: Counter) -> list[dict]:
+    return [{"name": name, "count": count} for name, count in counter.most_common(TOP_N)]
+
+
+def refresh_rollup(db: Session, user_id: int, period: str, start: date):
+    facts = db.query(ReportFact)\
+              .filter(ReportFact.user_id == user_id,
+                      ReportFact.report_date >= start,
+                      ReportFact.report_date < period_end(period, start))\
+              .all()
+    rollup = db.query(ReportRollup)\
+               .filter(ReportRollup.user_id == user_id, ReportRollup.period == period, ReportRollup.period_start == start)\
+               .first()
+    if not facts:
+        if rollup is not None:
+            db.delete(rollup)
+        return
+    if rollup is None:
+        rollup = ReportRollup(user_id=user_id, period=period, period_start=start)
+        db.add(rollup)
+
+    moods = Counter(f.mood for f in facts if f.mood)
+    scores = [f.mood_score for f in facts if f.mood_score is not None]
+    health, items = Counter(), Counter()
+    for f in facts:
+        health.update(f.health_mentions or [])
+        items.update(f.requested_items or [])
+
+    rollup.report_days = len(facts)
+    rollup.positive_days = moods[MOOD_POSITIVE]
+    rollup.neutral_days = moods[MOOD_NEUTRAL]
+    rollup.negative_days = moods[MOOD_NEGATIVE]
+    rollup.mood_score_avg = round(sum(scores) / len(scores), 3) if scores else None
+    rollup.health_mention_count = sum(f.health_mention_count for f in facts)
+    rollup.item_request_count = sum(f.item_request_count for f in facts)
+    rollup.top_health_mentions = _top(health)
+    rollup.top_requested_items = _top(items)
+
+
+def get_trends(db: Session, user_id: int, start: date, end: date, granularity: str) -> list[dict]:
+    """[start, end] 기간의 추이. day 는 facts 를, week/month 는 미리 합산한 rollups 를 그대로 읽습니다."""
+    if granularity == PERIOD_DAY:
+        facts = db.query(ReportFact)\
+                  .filter(ReportFact.user_id == user_id, ReportFact.report_date >= start, ReportFact.report_date <= end)\
+                  .order_by(ReportFact.report_date)\
+                  .all()
+        return [
+            {
+                "period_start": str(f.report_date),
+                "mood": f.mood,
+                "mood_score": f.mood_score,
+                "health_mention_count": f.health_mention_count,
+                "item_request_count": f.item_request_count,
+                "health_mentions": f.health_mentions or [],
+                "requested_items": f.requested_items or [],
+            }
+            for f in facts
+        ]
+
+    rollups = db.query(ReportRollup)\
+                .filter(ReportRollup.user_id == user_id,
+                        ReportRollup.period == granularity,
+                        ReportRollup.period_start >= period_start(granularity, start),
+                        ReportRollup.period_start <= end)\
+                .order_by(ReportRollup.period_start)\
+                .all()
+    return [
+        {
+            "period_start": str(r.period_start),
+            "report_days": r.report_days,
+            "moods": {MOOD_POSITIVE: r.positive_days, MOOD_NEUTRAL: r.neutral_days, MOOD_NEGATIVE: r.negative_days},
+            "mood_score_avg": r.mood_score_avg,
+            "health_mention_count": r.health_mention_count,
+            "item_request_count": r.item_request_count,
+            "top_health_mentions": r.top_health_mentions or [],
+            "top_requested_items": r.top_requested_items or [],
+        }
+        for r in rollups
+    ]
+
+
+def backfill(db: Session, batch_size: int = 500) -> int:
+    """기존 summaries 전체의 facts/rollups 를 채웁니다. (마이그레이션 6) 처리한 리포트 수를 반환합니다."""
+    count, last_id = 0, 0
+    while True:
+        summaries = db.query(Summary.id, Summary.user_id, Summary.report_date, Summary.summary_json)\
+                      .filter(Summary.id > last_id, Summary.report_date.isnot(None))\
+                      .order_by(Summary.id)\
+                      .limit(batch_size)\
+                      .all()
+        if not summaries:
+            return count
+        for summary_id, user_id, report_date, summary_json in summaries:
+            save_facts(db, user_id, report_date, parse_summary(summary_json))
+            last_id = summary_id
+        db.commit()
+        count += len(summaries)
+        logger.info("리포트 facts 채우는 중", extra={"count": count})
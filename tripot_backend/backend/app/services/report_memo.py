@@ -0,0 +1,126 @@
+import hashlib
+import json
+import logging
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from functools import lru_cache
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.prompts import load_prompt_file
+from app.db.database import SessionLocal
+from app.db.models import Summary, User
+from app.services import ai_service, report_facts
+
+logger = logging.getLogger(__name__)
+
+# 일일 리포트 입력 기억 (같은 입력은 다시 분석하지 않기)
+# 리포트마다 만든 입력의 해시(프롬프트 버전 + 모델 + 대화 (id, 화자, 내용))와 마지막 conversations.id 를 summaries 에 둡니다.
+#  - skip: 해시가 같으면 모델을 부르지 않고 기존 리포트를 그대로 씁니다. (updated_at 만 갱신해 야간 보완 대상에서 빠짐)
+#  - incremental: 마지막 대화 id 까지의 해시가 같고 그 뒤 대화만 늘었으면 늘어난 대화만 분석해 기존 리포트를 갱신합니다.
+#  - full: 처음이거나, 프롬프트/모델이 바뀌었거나, 앞선 대화가 바뀌었으면 하루 전체를 다시 분석합니다.
+# 프롬프트 버전은 report_prompts.json 과 조각 정리 프롬프트의 해시라 프롬프트를 고치면 저절로 전체 재생성됩니다.
+
+ACTION_SKIP = "skip"
+ACTION_INCREMENTAL = "incremental"
+ACTION_FULL = "full"
+
+# 리포트 본문이 아니라 저장 시 붙이는 키 (갱신 입력에서는 뺍니다)
+REPORT_META_KEYS = ("리포트_날짜", "어르신_ID")
+
+RUNS = metrics.counter("tripot_report_runs_total", "일일 리포트 생성 요청 수 (action: skip | incremental | full)", ("action",))
+
+
+@lru_cache()
+def prompt_version() -> str:
+    prompts = json.dumps(load_prompt_file('report_prompts.json'), ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256((prompts + ai_service.REPORT_CHUNK_PROMPT).encode("utf-8")).hexdigest()[:16]
+
+
+def input_hash(turns, version: str, model: str) -> str:
+    digest = hashlib.sha256(f"{version}\n{model}\n".encode("utf-8"))
+    for turn_id, speaker, message in turns:
+        digest.update(f"{turn_id}\t{speaker}\t{message}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+@dataclass
+class Previous:
+    """이전에 저장한 리포트와 그 입력 정보"""
+    report: dict
+    input_hash: str | None
+    prompt_version: str | None
+    model: str | None
+    last_conversation_id: int | None
+
+
+@dataclass
+class Plan:
+    action: str
+    # 분석할 대화 (incremental 이면 늘어난 대화만)
+    turns: list = field(default_factory=list)
+    # 저장할 입력 정보 (summaries 컬럼)
+    memo: dict = field(default_factory=dict)
+
+
+def load_previous(user_id_str: str, target_date: date) -> Previous | None:
+    db = SessionLocal()
+    try:
+        summary = db.query(Summary)\
+                    .join(User, Summary.user_id == User.id)\
+                    .filter(User.user_id_str == user_id_str, Summary.report_date == target_date)\
+                    .first()
+        if summary is None:
+            return None
+        report = report_facts.parse_summary(summary.summary_json)
+        if not report:
+            return None
+        return Previous(report, summary.input_hash, summary.prompt_version, summary.model, summary.last_conversation_id)
+    finally:
+        db.close()
+
+
+def plan(previous: Previous | None, turns: list, version: str | None = None, model: str | None = None) -> Plan:
+    """turns 는 해당 날짜 대화 전체 (id, speaker, message) 목록입니다."""
+    version = version or prompt_version()
+    model = model or ai_service.REPORT_MODEL
+    memo = {
+        "input_hash": input_hash(turns, version, model),
+        "prompt_version": version,
+        "model": model,
+        "last_conversation_id": max(turn[0] for turn in turns),
+    }
+    if previous is None or not previous.input_hash or (previous.prompt_version, previous.model) != (version, model):
+        return Plan(ACTION_FULL, turns, memo)
+    if previous.input_hash == memo["input_hash"]:
+        return Plan(ACTION_SKIP, [], memo)
+
+    last_id = previous.last_conversation_id
+    if settings.REPORT_INCREMENTAL_ENABLED and last_id is not None:
+        covered = [turn for turn in turns if turn[0] <= last_id]
+        added = [turn for turn in turns if turn[0] > last_id]
+        if covered and added and input_hash(covered, version, model) == previous.input_hash:
+            return Plan(ACTION_INCREMENTAL, added, memo)
+    return Plan(ACTION_FULL, turns, memo)
+
+
+def apply(summary: Summary, memo: dict | None):
+    """저장하는 리포트에 입력 정보를 기록합니다. (report_utils.save_summary_to_db)"""
+    memo = memo or {}
+    summary.input_hash = memo.get("input_hash")
+    summary.prompt_version = memo.get("prompt_version")
+    summary.model = memo.get("model")
+    summary.last_conversation_id = memo.get("last_conversation_id")
+
+
+def touch(user_id_str: str, target_date: date):
+    """건너뛴 리포트의 updated_at 을 갱신합니다. (야간 보완이 같은 날짜를 다시 예약하지 않도록)"""
+    db = SessionLocal()
+    try:
+        user_id = db.query(User.id).filter(User.user_id_str == user_id_str).scalar()
+        db.query(Summary)\
+          .filter(Summary.user_id == user_id, Summary.report_date == target_date)\
+          .update({Summary.updated_at: datetime.utcnow()}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
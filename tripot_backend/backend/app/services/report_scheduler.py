@@ -0,0 +1,104 @@
+import logging
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func
+
+from app.core.config import settings
+from app.db import report_utils
+from app.db.database import SessionLocal
+from app.db.models import Conversation, Summary, User
+from app.services import job_runner, report_service
+
+logger = logging.getLogger(__name__)
+
+# 일일 리포트 자동 생성
+# - 세션 종료 후: 어르신의 마지막 세션이 끝나고 REPORT_IDLE_DELAY_SECONDS 동안 새 세션이 없으면 오늘 리포트를 생성합니다.
+#   (세션이 끝날 때마다 같은 작업의 실행 시각을 뒤로 미루는 방식)
+# - 야간 보완: 매일 REPORT_NIGHTLY_HOUR 에 전날 리포트가 없거나 그 뒤에 대화가 더 있었던 사용자를 찾아
+#   REPORT_NIGHTLY_WINDOW_MINUTES 안에 사용자별로 흩어서 생성합니다. (자정 일괄 실행으로 인한 몰림 방지)
+# 생성은 작업 실행기의 reports 큐(동시 1건)에서 실행되므로 서비스의 DB 풀과 OpenAI 클라이언트를 함께 씁니다.
+
+JOB_GENERATE = "report.generate"
+JOB_NIGHTLY = "report.nightly"
+
+
+def schedule_report(user_id_str: str, target_date: date, run_after: datetime) -> int:
+    return job_runner.enqueue(
+        JOB_GENERATE,
+        {"user_id_str": user_id_str, "report_date": target_date.isoformat()},
+        dedup_key=f"report:{user_id_str}:{target_date.isoformat()}",
+        run_after=run_after,
+        debounce=True,
+    )
+
+
+def schedule_after_session(user_id_str: str) -> int:
+    """어르신 세션이 끝날 때 호출합니다. 이후 세션이 이어지면 생성 시각이 계속 미뤄집니다."""
+    run_after = datetime.utcnow() + timedelta(seconds=settings.REPORT_IDLE_DELAY_SECONDS)
+    return schedule_report(user_id_str, date.today(), run_after)
+
+
+def schedule_nightly(reschedule: bool = False) -> int:
+    """다음 야간 보완 작업을 등록합니다. 서버 기동 시에는 이미 예약된 작업을 그대로 두고,
+    야간 작업 안에서(reschedule=True) 호출하면 실행 중인 자신과 별개로 다음 날 작업을 등록합니다."""
+    run_at = job_runner.next_local_run(settings.REPORT_NIGHTLY_HOUR)
+    return job_runner.enqueue(
+        JOB_NIGHTLY,
+        {"report_date": (run_at.date() - timedelta(days=1)).isoformat()},
+        dedup_key=JOB_NIGHTLY,
+        run_after=job_runner.to_run_after(run_at),
+        debounce=reschedule,
+    )
+
+
+def find_stale_reports(target_date: date) -> list[str]:
+    """해당 날짜에 대화가 있었는데 리포트가 없거나, 리포트 생성 이후 대화가 더 있었던 사용자 목록"""
+    start, end = report_utils.day_range(target_date)
+    db = SessionLocal()
+    try:
+        last_spoken = db.query(Conversation.user_id, func.max(Conversation.created_at))\
+                        .filter(Conversation.created_at >= start, Conversation.created_at < end)\
+                        .group_by(Conversation.user_id)\
+                        .all()
+        if not last_spoken:
+            return []
+        user_ids = [user_id for user_id, _ in last_spoken]
+        generated = dict(
+            db.query(Summary.user_id, func.coalesce(Summary.updated_at, Summary.created_at))
+              .filter(Summary.user_id.in_(user_ids), Summary.report_date == target_date)
+              .all()
+        )
+        names = dict(db.query(User.id, User.user_id_str).filter(User.id.in_(user_ids)).all())
+    finally:
+        db.close()
+
+    stale = []
+    for user_id, last_at in last_spoken:
+        generated_at = generated.get(user_id)
+        if generated_at is not None and last_at is not None:
+            # sqlite 는 timezone 정보 없이 읽히고 MySQL 은 DATETIME 이라 naive 로 맞춰 비교합니다.
+            if generated_at.replace(tzinfo=None) >= last_at.replace(tzinfo=None):
+                continue
+        if user_id in names:
+            stale.append(names[user_id])
+    return stale
+
+
+@job_runner.job(JOB_GENERATE, queue="reports")
+def generate_report_job(payload: dict):
+    report_service.generate_daily_report(payload["user_id_str"], date.fromisoformat(payload["report_date"]))
+
+
+@job_runner.job(JOB_NIGHTLY, queue="reports")
+def nightly_job(payload: dict):
+    # 이 작업이 실패하더라도 다음 날 작업은 예약되도록 먼저 등록합니다.
+    schedule_nightly(reschedule=True)
+
+    target_date = date.fromisoformat(payload["report_date"])
+    user_ids = find_stale_reports(target_date)
+    window_seconds = settings.REPORT_NIGHTLY_WINDOW_MINUTES * 60
+    now = datetime.utcnow()
+    for user_id_str in user_ids:
+        run_after = now + timedelta(seconds=job_runner.stagger(user_id_str, window_seconds))
+        schedule_report(user_id_str, target_date, run_after)
+    logger.info("야간 리포트 예약", extra={"report_date": str(target_date), "count": len(user_ids)})
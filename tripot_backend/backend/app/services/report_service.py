@@ -1,97 +1,123 @@
-import mysql.connector
-import os
+import json
+import logging
 from datetime import date
 
-def get_mysql_connection():
-    """MySQL 직접 연결"""
-    return mysql.connector.connect(
-        host='db',  # Docker 내부에서는 'db' 사용
-        user=os.getenv('MYSQL_USER'),
-        password=os.getenv('MYSQL_PASSWORD'),
-        database=os.getenv('MYSQL_DATABASE')
-    )
+from sqlalchemy.orm import Session
 
-def get_report_by_user_id(db, user_id_str: str):
+from app.db import models, report_utils
+from app.services import activity_counters, ai_service, report_facts, report_memo
+
+logger = logging.getLogger(__name__)
+
+def get_latest_summary(db: Session, user_id_str: str):
+    """사용자의 가장 최신 summary 를 조회합니다. (ix_summaries_user_created 사용)"""
+    return db.query(models.Summary)\
+             .join(models.User, models.Summary.user_id == models.User.id)\
+             .filter(models.User.user_id_str == user_id_str)\
+             .order_by(models.Summary.created_at.desc())\
+             .first()
+
+def generate_daily_report(user_id_str: str, target_date: date) -> dict | None:
+    """해당 날짜의 대화로 리포트를 만들어 summaries 에 저장합니다. (스케줄러 작업과 scripts/generate_reports.py 공용)
+    이전 리포트와 입력이 같으면 모델을 부르지 않고, 대화가 늘기만 했으면 늘어난 대화만 분석합니다. (report_memo)
+    대화가 없으면 None, 생성/저장에 실패하면 RuntimeError (작업 실행기가 재시도)."""
+    turns = report_utils.fetch_daily_turns(user_id_str, target_date)
+    if not turns:
+        return None
+
+    previous = report_memo.load_previous(user_id_str, target_date)
+    plan = report_memo.plan(previous, turns)
+    report_memo.RUNS.inc(action=plan.action)
+    if plan.action == report_memo.ACTION_SKIP:
+        report_memo.touch(user_id_str, target_date)
+        logger.info("입력이 같아 리포트 생성 건너뜀", extra={"user_id": user_id_str, "report_date": str(target_date)})
+        return previous.report
+
+    conversation_text = report_utils.format_conversation(plan.turns)
+    if plan.action == report_memo.ACTION_INCREMENTAL:
+        previous_report = {k: v for k, v in previous.report.items() if k not in report_memo.REPORT_META_KEYS}
+        report = ai_service.update_summary_report(previous_report, conversation_text)
+    else:
+        report = ai_service.generate_summary_report(conversation_text)
+    if report is None:
+        raise RuntimeError("AI 리포트 생성 실패")
+    report["리포트_날짜"] = target_date.strftime('%Y-%m-%d')
+    report["어르신_ID"] = user_id_str
+
+    if not report_utils.save_summary_to_db(user_id_str, target_date, report, memo=plan.memo):
+        raise RuntimeError("리포트 저장 실패")
+    logger.info("일일 리포트 생성 완료", extra={
+        "user_id": user_id_str, "report_date": str(target_date), "action": plan.action,
+        "turns": len(plan.turns), "chars": len(conversation_text),
+    })
+    return report
+
+def get_report_by_user_id(db: Session, user_id_str: str):
     """
     사용자 ID로 최신 리포트 데이터를 조회하여 HomeScreen에 맞는 형태로 반환합니다.
     """
     try:
-        print(f"✅ 리포트 서비스: {user_id_str}의 최신 데이터를 조회합니다.")
-        
-        # MySQL 직접 연결
-        conn = get_mysql_connection()
-        cursor = conn.cursor()
-        
-        # 🔧 가장 최신 summary 조회 (created_at 기준)
-        query = """
-        SELECT s.summary_json, s.report_date, s.created_at
-        FROM summaries s
-        JOIN users u ON s.user_id = u.id
-        WHERE u.user_id_str = %s
-        ORDER BY s.created_at DESC
-        LIMIT 1
-        """
-        
-        cursor.execute(query, (user_id_str,))
-        result = cursor.fetchone()
-        
-        cursor.close()
-        conn.close()
-        
-        if not result:
-            print(f"❌ 요약 데이터를 찾을 수 없습니다: {user_id_str}")
+        user = db.query(models.User).filter(models.User.user_id_str == user_id_str).first()
+        if not user:
+            logger.info("사용자를 찾을 수 없습니다", extra={"user_id": user_id_str})
             return _get_default_report_data()
-        
-        summary_json, report_date, created_at = result
-        print(f"✅ 최신 요약 데이터 조회 성공 - 날짜: {report_date}, 생성시간: {created_at}")
-        
-        # JSON 파싱
-        import json
-        try:
-            summary_data = json.loads(summary_json)
-        except json.JSONDecodeError as e:
-            print(f"❌ JSON 파싱 오류: {e}")
-            return _get_default_report_data()
-        
+        activity = _home_activity(db, user)
+
+        # 🔧 가장 최신 summary 조회 (created_at 기준)
+        summary = get_latest_summary(db, user_id_str)
+        if not summary:
+            logger.info("요약 데이터를 찾을 수 없습니다", extra={"user_id": user_id_str})
+            return _get_default_report_data(activity)
+
+        summary_data = summary.summary_json
+        # 이전 데이터 중 JSON 문자열로 저장된 경우가 있어 파싱합니다.
+        if isinstance(summary_data, str):
+            try:
+                summary_data = json.loads(summary_data)
+            except json.JSONDecodeError as e:
+                logger.error("JSON 파싱 오류", extra={"user_id": user_id_str, "error": str(e)})
+                return _get_default_report_data(activity)
+
         # HomeScreen 형태로 변환
-        return _transform_summary_to_homescreen(summary_data, report_date)
+        return _transform_summary_to_homescreen(summary_data or {}, summary.report_date, activity)
         
-    except Exception as e:
-        print(f"❌ 리포트 조회 중 오류 발생: {str(e)}")
-        import traceback
-        traceback.print_exc()
+    except Exception:
+        logger.exception("리포트 조회 중 오류 발생", extra={"user_id": user_id_str})
         return _get_default_report_data()
 
-def _transform_summary_to_homescreen(summary_data, report_date):
+DEFAULT_NAME = "어르신"
+EMPTY_RANKING = ({"name": "데이터 없음", "score": 0},)
+
+MOOD_LABELS = {
+    report_facts.MOOD_POSITIVE: "좋음 😊",
+    report_facts.MOOD_NEUTRAL: "보통 😐",
+    report_facts.MOOD_NEGATIVE: "우울함 😔",
+}
+
+def _home_activity(db: Session, user: models.User) -> dict:
+    """홈 화면의 이름/통계/랭킹. 통계는 쓰기 시점에 더해 둔 activity_counters 한 번 조회로 만듭니다."""
+    counters = activity_counters.get_counters(db, user.id)
+    return {
+        "name": f"{user.display_name}님" if user.display_name else DEFAULT_NAME,
+        "stats": activity_counters.home_stats(counters),
+        "ranking": activity_counters.family_ranking(counters) or list(EMPTY_RANKING),
+    }
+
+def _transform_summary_to_homescreen(summary_data, report_date, activity: dict):
     """summary_json을 HomeScreen이 기대하는 형태로 변환"""
     try:
-        print(f"🔄 리포트 데이터 변환 중... 날짜: {report_date}")
-        
         # 기본값 설정
-        name = "라기선님"
         mood = "보통"
         condition = "특별한 언급 없음"
         last_activity = "일상 생활"
         needs = "특별한 요청 없음"
         
-        # 🔧 감정 상태 추출
-        emotion_status = summary_data.get("감정_신체_상태", {})
-        if emotion_status:
-            emotion = emotion_status.get("전반적_감정", "")
-            print(f"📊 감정 상태: {emotion}")
-            
-            if "긍정" in emotion or "좋" in emotion:
-                mood = "좋음 😊"
-            elif "부정" in emotion or "우울" in emotion or "슬픔" in emotion:
-                mood = "우울함 😔"
-            else:
-                mood = "보통 😐"
-            
-            # 🔧 건강 상태
-            health_mentions = emotion_status.get("건강_언급", [])
-            if health_mentions and len(health_mentions) > 0:
-                condition = ", ".join(health_mentions[:2])  # 최대 2개만
-                print(f"🏥 건강 언급: {condition}")
+        # 🔧 감정 / 건강 상태 (리포트 저장 시 report_facts 에 뽑아 두는 것과 같은 기준)
+        facts = report_facts.extract_facts(summary_data)
+        if facts["mood"]:
+            mood = MOOD_LABELS[facts["mood"]]
+        if facts["health_mentions"]:
+            condition = ", ".join(facts["health_mentions"][:2])  # 최대 2개만
         
         # 🔧 최근 활동 (일일 대화 요약에서 추출)
         daily_summary = summary_data.get("일일_대화_요약", {})
@@ -104,32 +130,15 @@ def _transform_summary_to_homescreen(summary_data, report_date):
                 first_sentence = summary_text.split('.')[0]
                 if len(first_sentence) > 0:
                     last_activity = first_sentence[:30] + "..."
-                    print(f"📝 최근 활동: {last_activity}")
             elif keywords and len(keywords) > 0:
                 last_activity = f"{keywords[0]} 관련 대화"
         
         # 🔧 요청 물품 추출
-        requested_items = summary_data.get("요청_물품", [])
-        if requested_items and len(requested_items) > 0:
-            item = requested_items[0].get("물품", "")
-            if item:
-                needs = item
-                print(f"🛒 요청 물품: {needs}")
-        
-        # 기본 통계 (고정값 - 나중에 실제 데이터로 교체 가능)
-        contact_count = 12
-        visit_count = 1
-        question_count = 3
-        
-        # 랭킹 데이터 (고정값)
-        ranking_data = [
-            {"name": "첫째 아들", "score": 120},
-            {"name": "막내 딸", "score": 95},
-            {"name": "둘째 아들", "score": 80}
-        ]
+        if facts["requested_items"]:
+            needs = facts["requested_items"][0]
         
         result = {
-            "name": name,
+            "name": activity["name"],
             "report_date": str(report_date),  # 리포트 날짜 추가
             "status": {
                 "mood": mood,
@@ -137,27 +146,20 @@ def _transform_summary_to_homescreen(summary_data, report_date):
                 "last_activity": last_activity,
                 "needs": needs
             },
-            "stats": {
-                "contact": contact_count,
-                "visit": visit_count,
-                "question_answered": question_count
-            },
-            "ranking": ranking_data
+            "stats": activity["stats"],
+            "ranking": activity["ranking"]
         }
         
-        print(f"✅ HomeScreen 데이터 변환 완료")
         return result
         
-    except Exception as e:
-        print(f"❌ 데이터 변환 중 오류: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return _get_default_report_data()
+    except Exception:
+        logger.exception("데이터 변환 중 오류")
+        return _get_default_report_data(activity)
 
-def _get_default_report_data():
-    """데이터가 없을 때 반환할 기본 리포트 데이터"""
-    return {
-        "name": "라기선님",
+def _get_default_report_data(activity: dict | None = None):
+    """데이터가 없을 때 반환할 기본 리포트 데이터 (사용자가 있으면 이름/통계/랭킹은 실제 값)"""
+    report = {
+        "name": DEFAULT_NAME,
         "status": {
             "mood": "데이터 없음",
             "condition": "정보 없음", 
@@ -169,7 +171,8 @@ def _get_default_report_data():
             "visit": 0,
             "question_answered": 0
         },
-        "ranking": [
-            {"name": "데이터 없음", "score": 0}
-        ]
-    }
\ No newline at end of file
+        "ranking": list(EMPTY_RANKING)
+    }
+    if activity:
+        report.update(activity)
+    return report
\ No newline at end of file
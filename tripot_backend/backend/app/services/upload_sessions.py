@@ -0,0 +1,224 @@
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.database import SessionLocal
+from app.db.models import Post, UploadChunk, UploadSession, User
+from app.services import family_events, job_runner, media_store, photo_view_service
+from app.services.photo_service import PhotoService
+
+logger = logging.getLogger(__name__)
+
+# 이어받기 가능한 사진 업로드
+# 1. 세션 생성: 전체 크기를 받아 최종 위치에 같은 크기의 파일을 만들어 둡니다.
+# 2. 조각 전송: 번호가 매겨진 조각을 (번호 * 조각 크기) 위치에 바로 씁니다. 순서와 상관없이, 같은 조각을 다시 보내도 됩니다.
+# 3. 상태 조회: 연결이 끊긴 뒤 받은 조각/빠진 조각을 확인해 빠진 것만 다시 보냅니다.
+# 4. 완료: 모든 조각이 있으면 FamilyPhoto, Post 를 만들고 기존 업로드와 같은 알림을 보냅니다.
+# 완료되지 않고 UPLOAD_SESSION_TTL_HOURS 가 지난 업로드는 매일 정리 작업이 파일과 함께 지웁니다.
+
+STATUS_UPLOADING = "uploading"
+STATUS_COMPLETED = "completed"
+
+MIN_CHUNK_SIZE = 64 * 1024
+
+JOB_CLEANUP = "upload.cleanup"
+
+
+def create_session(
+    db: Session,
+    user: User,
+    uploaded_by: str,
+    file_name: str,
+    total_size: int,
+    chunk_size: int | None = None,
+    description: str = "",
+    mentions: str = "",
+    location: str = "",
+    audio_message: str = "",
+) -> UploadSession:
+    if total_size <= 0 or total_size > settings.UPLOAD_MAX_FILE_BYTES:
+        raise HTTPException(status_code=400, detail=f"파일 크기는 1 ~ {settings.UPLOAD_MAX_FILE_BYTES} 바이트여야 합니다.")
+    chunk_size = min(max(chunk_size or settings.UPLOAD_CHUNK_SIZE, MIN_CHUNK_SIZE), settings.UPLOAD_MAX_CHUNK_SIZE)
+    audio_message, audio_path = media_store.extract_inline_audio(audio_message)
+
+    upload_path, unique_filename_base = PhotoService.generate_file_path()
+    filename = f"{unique_filename_base}{os.path.splitext(file_name)[1].lower()}"
+    file_path = os.path.join(upload_path, filename)
+    # 조각을 제자리에 쓸 수 있도록 전체 크기의 (빈) 파일을 먼저 만듭니다.
+    with open(file_path, "wb") as f:
+        f.truncate(total_size)
+
+    upload = UploadSession(
+        id=str(uuid.uuid4()),
+        user_id=user.id,
+        uploaded_by=uploaded_by,
+        original_name=file_name,
+        filename=filename,
+        file_path=file_path,
+        total_size=total_size,
+        chunk_size=chunk_size,
+        total_chunks=-(-total_size // chunk_size),
+        description=description,
+        mentions=mentions,
+        location=location,
+        audio_message=audio_message,
+        audio_path=audio_path,
+    )
+    db.add(upload)
+    try:
+        db.commit()
+    except Exception:
+        db.rollback()
+        _remove_file(file_path)
+        media_store.remove(audio_path)
+        raise
+    logger.info("이어받기 업로드 생성", extra={"upload_id": upload.id, "total_size": total_size, "chunks": upload.total_chunks})
+    return upload
+
+
+def get_session(db: Session, upload_id: str) -> UploadSession:
+    upload = db.query(UploadSession).filter(UploadSession.id == upload_id).first()
+    if not upload:
+        raise HTTPException(status_code=404, detail="업로드를 찾을 수 없습니다.")
+    return upload
+
+
+def write_chunk(db: Session, upload_id: str, chunk_index: int, data: bytes, offset: int | None = None) -> dict:
+    """조각 하나를 파일의 제자리에 쓰고 받은 것으로 기록합니다. (파일 쓰기가 있으므로 스레드에서 호출)"""
+    upload = get_session(db, upload_id)
+    if upload.status != STATUS_UPLOADING:
+        raise HTTPException(status_code=409, detail="이미 완료된 업로드입니다.")
+    if not 0 <= chunk_index < upload.total_chunks:
+        raise HTTPException(status_code=400, detail=f"조각 번호는 0 ~ {upload.total_chunks - 1} 이어야 합니다.")
+    start = chunk_index * upload.chunk_size
+    if offset is not None and offset != start:
+        raise HTTPException(status_code=400, detail=f"{chunk_index}번 조각의 위치는 {start} 입니다.")
+    expected = min(upload.chunk_size, upload.total_size - start)
+    if len(data) != expected:
+        raise HTTPException(status_code=400, detail=f"{chunk_index}번 조각은 {expected} 바이트여야 합니다. (받은 크기 {len(data)})")
+
+    fd = os.open(upload.file_path, os.O_WRONLY)
+    try:
+        os.pwrite(fd, data, start)
+    finally:
+        os.close(fd)
+
+    db.merge(UploadChunk(upload_id=upload.id, chunk_index=chunk_index, size=len(data), received_at=datetime.utcnow()))
+    upload.updated_at = datetime.utcnow()
+    db.commit()
+    return get_status(db, upload)
+
+
+def get_status(db: Session, upload: UploadSession) -> dict:
+    received = [row.chunk_index for row in db.query(UploadChunk.chunk_index)
+                                               .filter(UploadChunk.upload_id == upload.id)
+                                               .order_by(UploadChunk.chunk_index)]
+    received_set = set(received)
+    return {
+        "upload_id": upload.id,
+        "status": upload.status,
+        "total_size": upload.total_size,
+        "chunk_size": upload.chunk_size,
+        "total_chunks": upload.total_chunks,
+        "received_chunks": received,
+        "missing_chunks": [i for i in range(upload.total_chunks) if i not in received_set],
+        "received_bytes": sum(min(upload.chunk_size, upload.total_size - i * upload.chunk_size) for i in received),
+        "photo_id": upload.photo_id,
+        "post_id": upload.post_id,
+    }
+
+
+def complete(db: Session, upload_id: str) -> dict:
+    """모든 조각을 받았으면 사진/게시글을 만듭니다. 이미 완료된 업로드는 같은 결과를 돌려줍니다."""
+    upload = get_session(db, upload_id)
+    if upload.status == STATUS_COMPLETED:
+        return get_status(db, upload)
+    status = get_status(db, upload)
+    if status["missing_chunks"]:
+        raise HTTPException(status_code=409, detail=f"받지 못한 조각이 {len(status['missing_chunks'])}개 있습니다.")
+
+    # 동시에 완료 요청이 와도 사진은 한 번만 만듭니다.
+    claimed = db.query(UploadSession)\
+                .filter(UploadSession.id == upload_id, UploadSession.status == STATUS_UPLOADING)\
+                .update({"status": STATUS_COMPLETED, "updated_at": datetime.utcnow()}, synchronize_session=False)
+    if not claimed:
+        db.rollback()
+        db.refresh(upload)
+        return get_status(db, upload)
+
+    user = db.query(User).filter(User.id == upload.user_id).first()
+    photo = PhotoService.save_photo_metadata(
+        db=db,
+        user=user,
+        filename=upload.filename,
+        original_name=upload.original_name,
+        file_path=upload.file_path,
+        file_size=upload.total_size,
+        uploaded_by=upload.uploaded_by,
+        commit=False,
+    )
+    post = Post(
+        photo_id=photo.id,
+        user_id=user.id,
+        description=upload.description,
+        mentions=upload.mentions,
+        location=upload.location,
+        audio_message=upload.audio_message,
+        audio_path=upload.audio_path,
+    )
+    db.add(post)
+    db.flush()
+    upload.photo_id = photo.id
+    upload.post_id = post.id
+    db.commit()
+    db.refresh(upload)
+
+    photo_view_service.invalidate(photo.id)
+    family_events.publish(user.id, family_events.EVENT_PHOTOS_ADDED, photo_ids=[photo.id])
+    logger.info("이어받기 업로드 완료", extra={"upload_id": upload.id, "photo_id": photo.id, "post_id": post.id})
+    return get_status(db, upload)
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def cleanup_expired(now: datetime | None = None) -> int:
+    """완료되지 않고 오래된 업로드를 파일과 함께 지우고 지운 수를 반환합니다."""
+    cutoff = (now or datetime.utcnow()) - timedelta(hours=settings.UPLOAD_SESSION_TTL_HOURS)
+    db = SessionLocal()
+    try:
+        expired = db.query(UploadSession)\
+                    .filter(UploadSession.status == STATUS_UPLOADING, UploadSession.updated_at < cutoff)\
+                    .all()
+        for upload in expired:
+            _remove_file(upload.file_path)
+            media_store.remove(upload.audio_path)
+            db.query(UploadChunk).filter(UploadChunk.upload_id == upload.id).delete(synchronize_session=False)
+            db.delete(upload)
+        db.commit()
+    finally:
+        db.close()
+    if expired:
+        logger.info("미완료 업로드 정리", extra={"count": len(expired)})
+    return len(expired)
+
+
+def schedule_cleanup(reschedule: bool = False) -> int:
+    """다음 정리 작업을 등록합니다. (report_scheduler.schedule_nightly 와 같은 방식)"""
+    run_at = job_runner.next_local_run(settings.UPLOAD_CLEANUP_HOUR)
+    return job_runner.enqueue(JOB_CLEANUP, {}, dedup_key=JOB_CLEANUP, run_after=job_runner.to_run_after(run_at), debounce=reschedule)
+
+
+@job_runner.job(JOB_CLEANUP, queue="default")
+def cleanup_job(payload: dict):
+    schedule_cleanup(reschedule=True)
+    cleanup_expired()
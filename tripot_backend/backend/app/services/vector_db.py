@@ -1,52 +1,97 @@
 import uuid
 import time
 import asyncio
+import logging
+import threading
 from pinecone import Pinecone, ServerlessSpec
 
 # 설정 파일과 AI 서비스 함수를 올바른 위치에서 가져옵니다.
 from app.core.config import settings
+from app.core import resilience, tokens
+from app.core.metrics import span
+from . import job_runner, memory_search
 from . import ai_service # 순환 참조를 피하기 위해 ai_service를 나중에 가져올 수 있도록 구조화 필요
 
-# Pinecone 클라이언트 초기화
-try:
+logger = logging.getLogger(__name__)
+
+# Pinecone 인덱스는 처음 사용할 때 연결합니다. (import 시점의 네트워크 호출 제거)
+_index = None
+_index_lock = threading.Lock()
+_last_failure_at = 0.0
+_RETRY_INTERVAL_SECONDS = 60
+# OpenAI 임베딩 모델의 차원 수
+EMBEDDING_DIMENSION = 1536
+
+
+def _connect_index():
     pc = Pinecone(api_key=settings.PINECONE_API_KEY)
-    
+
     # 인덱스가 없으면 새로 생성
     if settings.PINECONE_INDEX_NAME not in pc.list_indexes().names():
         pc.create_index(
             name=settings.PINECONE_INDEX_NAME, 
-            dimension=1536, # OpenAI 임베딩 모델의 차원 수
+            dimension=EMBEDDING_DIMENSION,
             metric="cosine", 
             spec=ServerlessSpec(cloud="aws", region="us-east-1")
         )
-    
-    index = pc.Index(settings.PINECONE_INDEX_NAME)
-    print(f"✅ Pinecone '{settings.PINECONE_INDEX_NAME}' 인덱스에 성공적으로 연결되었습니다.")
 
-except Exception as e:
-    print(f"❌ Pinecone 초기화 중 오류 발생: {e}")
-    index = None
+    return pc.Index(settings.PINECONE_INDEX_NAME)
+
+
+def _get_index_sync():
+    global _index, _last_failure_at
+    if _index is None:
+        with _index_lock:
+            # 연결 실패 직후에는 매 턴마다 재시도하지 않습니다.
+            if _index is None and time.time() - _last_failure_at >= _RETRY_INTERVAL_SECONDS:
+                try:
+                    _index = _connect_index()
+                    logger.info("Pinecone 인덱스 연결 완료", extra={"index_name": settings.PINECONE_INDEX_NAME})
+                except Exception as e:
+                    _last_failure_at = time.time()
+                    logger.error("Pinecone 초기화 중 오류 발생", extra={"error": str(e)})
+    return _index
+
+
+async def get_index():
+    """Pinecone 인덱스를 최초 사용 시점에 (이벤트 루프를 막지 않고) 연결하여 반환합니다."""
+    if _index is not None:
+        return _index
+    return await asyncio.to_thread(_get_index_sync)
+
+
+def set_index(index):
+    """Pinecone 인덱스를 교체합니다. (벤치마크에서 가짜 인덱스를 주입할 때 사용)"""
+    global _index
+    _index = index
+
+
+def is_initialized() -> bool:
+    """Pinecone 인덱스 연결 여부를 반환합니다. (연결을 시도하지는 않음)"""
+    return _index is not None
 
 
 async def create_memory_for_pinecone(user_id: str, current_session_log: list):
     """세션 대화 내용을 요약하거나 원문 그대로 Pinecone에 기억으로 저장합니다."""
+    index = await get_index()
     if not index:
-        print("Pinecone 인덱스가 초기화되지 않아 기억을 저장할 수 없습니다.")
+        logger.warning("Pinecone 인덱스가 초기화되지 않아 기억을 저장할 수 없습니다.")
         return
 
-    print(f"🧠 [{user_id}] 님의 세션 기억 생성을 시작합니다.")
     if not current_session_log: return
 
     is_short_conversation = len(current_session_log) < 4
     memory_text, memory_type = "", ""
 
     if is_short_conversation:
-        print("-> 짧은 대화로 판단, 대화 원문을 'utterance' 타입으로 저장합니다.")
-        memory_text = "\n".join(current_session_log)
+        # 짧은 세션이라도 발화가 길면 기억 검색 결과가 대화 프롬프트 예산을 다 차지하므로 앞부분만 남깁니다.
+        memory_text = tokens.truncate("\n".join(current_session_log), settings.MEMORY_UTTERANCE_MAX_TOKENS)
         memory_type = 'utterance'
     else:
-        print("-> 긴 대화로 판단, 핵심 요약을 'summary' 타입으로 생성합니다.")
-        conversation_history = "\n".join(current_session_log)
+        # 긴 세션은 시작(인사/근황)과 끝(마무리/약속)을 남기고 가운데를 줄입니다.
+        conversation_history = tokens.truncate(
+            "\n".join(current_session_log), settings.MEMORY_SUMMARY_INPUT_MAX_TOKENS, settings.CHAT_MODEL_LARGE, keep="middle"
+        )
         summary_prompt = f"""다음 대화 내용에서 사용자의 주요 관심사, 감정, 중요한 정보 등을 1~2 문장의 간결한 기억으로 생성해줘. 규칙: 지명, 인명 등 모든 고유명사는 반드시 포함시켜야 해.
 
 --- 대화 내용 ---
@@ -54,11 +99,10 @@ async def create_memory_for_pinecone(user_id: str, current_session_log: list):
 -----------------
 
 핵심 기억:"""
-        memory_text = await ai_service.get_ai_chat_completion(summary_prompt, max_tokens=200, temperature=0.3)
+        memory_text = await ai_service.get_ai_chat_completion(summary_prompt, max_tokens=200, temperature=0.3, call_site="memory_summary")
         memory_type = 'summary'
 
-    print(f"📝 생성된 기억 (타입: {memory_type}): {memory_text}")
-    embedding = await ai_service.get_embedding(memory_text)
+    embedding = await ai_service.get_embedding(memory_text, call_site="memory_store")
     
     vector_to_upsert = {
         'id': str(uuid.uuid4()), 
@@ -71,44 +115,94 @@ async def create_memory_for_pinecone(user_id: str, current_session_log: list):
         }
     }
     await asyncio.to_thread(index.upsert, vectors=[vector_to_upsert])
-    print(f"✅ [{user_id}] 님의 새로운 세션 기억이 Pinecone에 저장되었습니다.")
+    # 키워드 검색용 원문 사본. 실패해도 기억 정리(memory.compact) 때 Pinecone 에서 다시 채워집니다.
+    metadata = vector_to_upsert['metadata']
+    try:
+        await asyncio.to_thread(
+            memory_search.record_memory, user_id, vector_to_upsert['id'], memory_text, metadata['timestamp'], memory_type
+        )
+    except Exception as e:
+        logger.warning("기억 원문 사본 저장 실패 (무시)", extra={"user_id": user_id, "error": str(e)})
+    logger.info("세션 기억 저장 완료", extra={"user_id": user_id, "memory_type": memory_type, "chars": len(memory_text)})
+
+
+@job_runner.job("memory.create", queue="memory")
+async def create_memory_job(payload: dict):
+    """세션 종료 후 등록되는 기억 생성 작업. 인덱스에 연결하지 못하면 실패로 처리해 재시도합니다."""
+    if await get_index() is None:
+        raise RuntimeError("Pinecone 인덱스에 연결할 수 없습니다.")
+    await create_memory_for_pinecone(payload["user_id"], payload.get("session_log") or [])
+
+
+async def _lexical_search(user_id: str, query_message: str, limit: int) -> list:
+    if not settings.MEMORY_LEXICAL_ENABLED:
+        return []
+    try:
+        with span("memory_lexical"):
+            return await asyncio.to_thread(memory_search.search, user_id, query_message, limit)
+    except Exception as e:
+        logger.warning("기억 키워드 검색 실패 (벡터 검색만 사용)", extra={"user_id": user_id, "error": str(e)})
+        return []
 
 
 async def search_memories(user_id: str, query_message: str, top_k=5):
-    """과거 대화 기억을 검색하고 현재 대화와의 관련도에 따라 순위를 매겨 반환합니다."""
+    """과거 대화 기억을 벡터 유사도와 키워드(BM25) 점수로 함께 검색하고, 관련도와 최신성으로 순위를 매겨 반환합니다."""
+    index = await get_index()
     if not index:
-        print("Pinecone 인덱스가 초기화되지 않아 기억을 검색할 수 없습니다.")
+        logger.warning("Pinecone 인덱스가 초기화되지 않아 기억을 검색할 수 없습니다.")
         return ""
-        
-    query_embedding = await ai_service.get_embedding(query_message)
-    results = await asyncio.to_thread(
-        index.query, 
-        vector=query_embedding, 
-        top_k=top_k, 
-        filter={'user_id': user_id}, 
-        include_metadata=True
-    )
-    
+
+    # 키워드 검색은 로컬 역색인이라 임베딩/벡터 조회를 기다리는 동안 함께 실행합니다.
+    lexical_task = asyncio.create_task(_lexical_search(user_id, query_message, top_k))
+    try:
+        with span("memory_embed"):
+            query_embedding = await ai_service.get_embedding(query_message, call_site="memory_query")
+        with span("vector_query"):
+            results = await resilience.call_upstream(
+                "pinecone_query",
+                index.query, 
+                timeout_kwarg=None,
+                vector=query_embedding, 
+                top_k=top_k, 
+                filter={'user_id': user_id}, 
+                include_metadata=True
+            )
+    except BaseException:
+        lexical_task.cancel()
+        raise
+    lexical_hits = await lexical_task
+
     now = int(time.time())
-    ranked_memories = []
-    if not results['matches']:
+    # 기억 id → 원문, timestamp, 벡터 유사도, 키워드 점수
+    candidates = {}
+    for match in results['matches'] or []:
+        metadata = match.get('metadata', {})
+        candidates[match['id']] = {
+            'text': metadata.get('text', ''), 'timestamp': metadata.get('timestamp', now), 'vector': match['score'], 'lexical': 0.0,
+        }
+    # BM25 점수는 범위가 정해져 있지 않아 이번 검색의 최고 점수로 나눠 0~1 로 맞춥니다.
+    best_lexical = max((hit.score for hit in lexical_hits), default=0.0) or 1.0
+    for hit in lexical_hits:
+        candidate = candidates.setdefault(hit.id, {'text': hit.text, 'timestamp': hit.timestamp, 'vector': 0.0, 'lexical': 0.0})
+        candidate['lexical'] = hit.score / best_lexical
+    if not candidates:
         return ""
 
-    for match in results['matches']:
-        similarity_score = match['score']
-        metadata = match.get('metadata', {})
-        timestamp = metadata.get('timestamp', now)
-        
+    vector_weight = settings.MEMORY_HYBRID_VECTOR_WEIGHT if lexical_hits else 1.0
+    ranked_memories = []
+    for candidate in candidates.values():
+        relevance_score = candidate['vector'] * vector_weight + candidate['lexical'] * (1 - vector_weight)
+
         # 시간 가중치 계산 (30일 이내의 기억에 더 높은 점수 부여)
         time_decay_factor = 30 * 24 * 60 * 60 
-        recency_score = max(0, (timestamp - (now - time_decay_factor)) / time_decay_factor)
+        recency_score = max(0, (candidate['timestamp'] - (now - time_decay_factor)) / time_decay_factor)
         
-        # 최종 점수 = 유사도 70% + 최신성 30%
-        final_score = (similarity_score * 0.7) + (recency_score * 0.3)
-        ranked_memories.append({'text': metadata.get('text', ''), 'score': final_score})
+        # 최종 점수 = 관련도 70% + 최신성 30%
+        final_score = (relevance_score * 0.7) + (recency_score * 0.3)
+        ranked_memories.append({'text': candidate['text'], 'score': final_score})
         
     ranked_memories.sort(key=lambda x: x['score'], reverse=True)
     top_memories = [item['text'] for item in ranked_memories[:3]]
     
-    print(f"🔍 [{user_id}] 님의 과거 핵심 기억 {len(top_memories)}개를 재정렬하여 검색했습니다.")
+    logger.debug("과거 핵심 기억 재정렬 검색 완료", extra={"user_id": user_id, "count": len(top_memories), "lexical_hits": len(lexical_hits)})
     return "\n".join(top_memories)
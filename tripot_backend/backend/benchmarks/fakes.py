@@ -0,0 +1,125 @@
+# benchmarks/fakes.py
+# 네트워크/API 키 없이 벤치마크를 돌리기 위한 OpenAI, Pinecone 가짜 구현
+
+import hashlib
+import math
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+EMBEDDING_DIMENSION = 1536
+
+
+class Latency:
+    """평균 지연(ms)과 지터 비율로 호출마다 지연 시간을 흉내냅니다."""
+
+    def __init__(self, mean_ms: float, jitter: float = 0.2):
+        self.mean_ms = mean_ms
+        self.jitter = jitter
+
+    def sleep(self):
+        if self.mean_ms <= 0:
+            return
+        delay = self.mean_ms * (1 + random.uniform(-self.jitter, self.jitter))
+        time.sleep(delay / 1000)
+
+
+def fake_embedding(text: str) -> list[float]:
+    """같은 텍스트에는 항상 같은 단위 벡터를 돌려줍니다."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    values = [rng.uniform(-1, 1) for _ in range(EMBEDDING_DIMENSION)]
+    norm = math.sqrt(sum(v * v for v in values)) or 1.0
+    return [v / norm for v in values]
+
+
+_SAMPLE_UTTERANCES = ["네 좋아", "오늘 날씨가 참 좋네", "무릎이 좀 아파", "손주가 전화했어", "점심 뭐 먹을까?", "고마워"]
+
+
+class FakeOpenAI:
+    """ai_service 가 사용하는 OpenAI 클라이언트 메서드만 흉내냅니다. (모두 동기 호출)"""
+
+    def __init__(self, stt_ms: float = 400, chat_ms: float = 800, embed_ms: float = 80, jitter: float = 0.2):
+        stt_latency, chat_latency, embed_latency = Latency(stt_ms, jitter), Latency(chat_ms, jitter), Latency(embed_ms, jitter)
+        # 작은 모델은 큰 모델보다 빠르다고 가정합니다.
+        small_chat_latency = Latency(chat_ms * 0.4, jitter)
+
+        def transcribe(**kwargs):
+            stt_latency.sleep()
+            return SimpleNamespace(text=random.choice(_SAMPLE_UTTERANCES))
+
+        def complete(**kwargs):
+            (small_chat_latency if "mini" in kwargs.get("model", "") else chat_latency).sleep()
+            if kwargs.get("response_format", {}).get("type") == "json_object":
+                content = "{}"
+            else:
+                content = "그러셨군요. 오늘은 어떻게 지내셨어요?"
+            usage = SimpleNamespace(prompt_tokens=1200, completion_tokens=40, total_tokens=1240)
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))], usage=usage)
+
+        def embed(input, **kwargs):
+            embed_latency.sleep()
+            return SimpleNamespace(data=[SimpleNamespace(embedding=fake_embedding(input))])
+
+        self.audio = SimpleNamespace(transcriptions=SimpleNamespace(create=transcribe))
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=complete))
+        self.embeddings = SimpleNamespace(create=embed)
+
+
+class FakeIndex:
+    """Pinecone Index 의 upsert/query/fetch/delete 를 메모리에서 흉내냅니다."""
+
+    def __init__(self, query_ms: float = 60, jitter: float = 0.2):
+        self._latency = Latency(query_ms, jitter)
+        self._vectors: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def upsert(self, vectors, **kwargs):
+        self._latency.sleep()
+        with self._lock:
+            for vector in vectors:
+                self._vectors[vector["id"]] = vector
+        return {"upserted_count": len(vectors)}
+
+    def _matches_filter(self, metadata: dict, filter: dict | None) -> bool:
+        for key, condition in (filter or {}).items():
+            value = metadata.get(key)
+            if isinstance(condition, dict):
+                if "$in" in condition and value not in condition["$in"]:
+                    return False
+                if "$eq" in condition and value != condition["$eq"]:
+                    return False
+                if "$lt" in condition and not (value is not None and value < condition["$lt"]):
+                    return False
+            elif value != condition:
+                return False
+        return True
+
+    def query(self, vector, top_k=5, filter=None, include_metadata=False, include_values=False, **kwargs):
+        self._latency.sleep()
+        with self._lock:
+            candidates = [v for v in self._vectors.values() if self._matches_filter(v.get("metadata", {}), filter)]
+        scored = []
+        for candidate in candidates:
+            score = sum(a * b for a, b in zip(vector, candidate["values"]))
+            match = {"id": candidate["id"], "score": score}
+            if include_metadata:
+                match["metadata"] = candidate.get("metadata", {})
+            if include_values:
+                match["values"] = candidate["values"]
+            scored.append(match)
+        scored.sort(key=lambda m: m["score"], reverse=True)
+        return {"matches": scored[:top_k]}
+
+    def fetch(self, ids, **kwargs):
+        self._latency.sleep()
+        with self._lock:
+            return {"vectors": {i: self._vectors[i] for i in ids if i in self._vectors}}
+
+    def delete(self, ids=None, **kwargs):
+        self._latency.sleep()
+        with self._lock:
+            for vector_id in ids or []:
+                self._vectors.pop(vector_id, None)
+        return {}
@@ -0,0 +1,316 @@
+# benchmarks/run.py
+# sqlite + 가짜 OpenAI/Pinecone 으로 FastAPI 앱을 띄우고 부하를 걸어 지연 시간 분포를 측정합니다.
+#
+# 사용법 (backend 폴더에서):
+#   python -m benchmarks.run --sessions 20 --turns 5 --family-clients 10 --output bench.json
+#   python -m benchmarks.run --compare bench.json   # 이전 결과와 비교
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+# 앱을 import 하기 전에 필요한 환경 변수를 채웁니다. (실제 키/DB 불필요)
+_BENCH_DIR = tempfile.mkdtemp(prefix="tripot-bench-")
+_BENCH_ENV = {
+    "OPENAI_API_KEY": "bench",
+    "PINECONE_API_KEY": "bench",
+    "MYSQL_DATABASE": "bench",
+    "MYSQL_USER": "bench",
+    "MYSQL_PASSWORD": "bench",
+    "DB_HOST": "localhost",
+    "MYSQL_ROOT_PASSWORD": "bench",
+    "SQLALCHEMY_DATABASE_URL": f"sqlite:///{os.path.join(_BENCH_DIR, 'bench.db')}",
+    "LOG_LEVEL": "WARNING",
+}
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """nearest-rank 방식의 백분위수"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, int(round(pct / 100 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summarize(samples: list[float], errors: int = 0) -> dict:
+    """초 단위 샘플을 ms 단위 요약 통계로 변환합니다."""
+    return {
+        "count": len(samples),
+        "errors": errors,
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 2) if samples else 0.0,
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+    }
+
+
+class Recorder:
+    """엔드포인트/단계별 지연 시간 원본 샘플을 모읍니다. (서버 스레드와 클라이언트 루프에서 동시에 기록)"""
+
+    def __init__(self):
+        self.samples: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, name: str, elapsed: float):
+        with self._lock:
+            self.samples[name].append(elapsed)
+
+    def error(self, name: str):
+        with self._lock:
+            self.errors[name] += 1
+
+    def report(self, names=None) -> dict:
+        with self._lock:
+            keys = sorted(set(self.samples) | set(self.errors)) if names is None else names
+            return {key: summarize(self.samples.get(key, []), self.errors.get(key, 0)) for key in keys}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def _start_server(app, port: int):
+    import uvicorn
+
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+def _seed_family_data(photo_count: int) -> tuple[str, list[int]]:
+    """가족 피드 부하용 사용자/사진/게시글/댓글을 만듭니다."""
+    from app.db import models
+    from app.db.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        user = models.User(user_id_str="bench_family_user")
+        db.add(user)
+        db.commit()
+        photo_ids = []
+        for i in range(photo_count):
+            photo = models.FamilyPhoto(
+                user_id=user.id,
+                filename=f"bench_{i}.jpg",
+                original_name=f"bench_{i}.jpg",
+                file_path=f"uploads/family_photos/bench/bench_{i}.jpg",
+                file_size=1024,
+                uploaded_by="벤치",
+            )
+            db.add(photo)
+            db.flush()
+            db.add(models.Post(photo_id=photo.id, user_id=user.id, description=f"사진 {i}", mentions="", location="", audio_message=""))
+            for j in range(3):
+                db.add(models.PhotoComment(photo_id=photo.id, user_id=user.id, author_name="가족", comment_text=f"댓글 {j}"))
+            photo_ids.append(photo.id)
+        db.commit()
+        return user.user_id_str, photo_ids
+    finally:
+        db.close()
+
+
+async def _wait_ready(client, base_url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = await client.get(f"{base_url}/ready")
+        if response.status_code == 200:
+            return
+        await asyncio.sleep(0.1)
+    raise RuntimeError("서버가 준비 상태가 되지 않았습니다.")
+
+
+async def _senior_session(ws_url: str, session_no: int, turns: int, audio_frame: str | bytes, recorder: Recorder, think_ms: float, encoding: str):
+    import msgpack
+    import websockets
+
+    # msgpack: 음성은 바이너리 프레임(원본 바이트)으로 보내고 서버 메시지도 MessagePack 으로 받습니다.
+    decode = msgpack.unpackb if encoding == "msgpack" else json.loads
+    user_id = f"bench_senior_{session_no}"
+    try:
+        async with websockets.connect(f"{ws_url}/api/v1/senior/ws/{user_id}?encoding={encoding}", max_size=None) as ws:
+            await ws.recv()  # 시작 질문
+            for _ in range(turns):
+                started_at = time.perf_counter()
+                await ws.send(audio_frame)
+                while True:
+                    frame = decode(await ws.recv())
+                    if frame.get("type") == "ai_message":
+                        break
+                recorder.add("WS senior turn", time.perf_counter() - started_at)
+                await asyncio.sleep(think_ms / 1000)
+    except Exception:
+        recorder.error("WS senior turn")
+
+
+async def _family_client(client, base_url: str, user_id_str: str, photo_ids: list[int], requests: int, recorder: Recorder):
+    import random
+
+    async def timed(name: str, url: str, **kwargs):
+        started_at = time.perf_counter()
+        try:
+            response = await client.get(url, **kwargs)
+            if response.status_code >= 400:
+                recorder.error(name)
+                return
+        except Exception:
+            recorder.error(name)
+            return
+        recorder.add(name, time.perf_counter() - started_at)
+
+    for _ in range(requests):
+        photo_id = random.choice(photo_ids)
+        await timed("GET /family/family-yard/photos", f"{base_url}/api/v1/family/family-yard/photos", params={"user_id_str": user_id_str})
+        await timed("GET /family/family-yard/photo/{id}/detail", f"{base_url}/api/v1/family/family-yard/photo/{photo_id}/detail")
+        await timed("GET /family/family-yard/photo/{id}/comments", f"{base_url}/api/v1/family/family-yard/photo/{photo_id}/comments")
+
+
+async def run_benchmark(args) -> dict:
+    os.environ.update(_BENCH_ENV)
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+    import httpx
+    from app.core import metrics
+    from app.db import migrations
+    from app.db.database import engine
+    from app.main import app
+    from app.services import ai_service, vector_db
+    from benchmarks.fakes import FakeIndex, FakeOpenAI
+
+    ai_service.set_client(FakeOpenAI(stt_ms=args.stt_ms, chat_ms=args.chat_ms, embed_ms=args.embed_ms, jitter=args.jitter))
+    vector_db.set_index(FakeIndex(query_ms=args.vector_ms, jitter=args.jitter))
+
+    recorder = Recorder()
+    stage_recorder = Recorder()
+    listener = lambda stage, elapsed: stage_recorder.add(stage, elapsed)
+    metrics.add_span_listener(listener)
+
+    # 서버는 기동 시 스키마 버전만 확인하므로 마이그레이션을 먼저 적용합니다.
+    migrations.upgrade(engine)
+    port = _free_port()
+    server, thread = _start_server(app, port)
+    base_url, ws_url = f"http://127.0.0.1:{port}", f"ws://127.0.0.1:{port}"
+    audio_frame = os.urandom(args.audio_bytes)
+    if args.ws_encoding == "json":
+        audio_frame = base64.b64encode(audio_frame).decode()
+
+    try:
+        async with httpx.AsyncClient(timeout=60) as client:
+            await _wait_ready(client, base_url)
+            user_id_str, photo_ids = await asyncio.to_thread(_seed_family_data, args.photos)
+
+            started_at = time.perf_counter()
+            await asyncio.gather(
+                *[_senior_session(ws_url, i, args.turns, audio_frame, recorder, args.think_ms, args.ws_encoding) for i in range(args.sessions)],
+                *[_family_client(client, base_url, user_id_str, photo_ids, args.family_requests, recorder) for _ in range(args.family_clients)],
+            )
+            wall_seconds = time.perf_counter() - started_at
+    finally:
+        metrics.remove_span_listener(listener)
+        server.should_exit = True
+        thread.join(timeout=10)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+            "wall_seconds": round(wall_seconds, 3),
+        },
+        "endpoints": recorder.report(),
+        "stages": stage_recorder.report(),
+    }
+
+
+def compare(current: dict, previous: dict) -> list[str]:
+    """두 결과의 p50/p95/p99 변화를 사람이 읽기 쉬운 줄 목록으로 만듭니다."""
+    lines = []
+    for section in ("endpoints", "stages"):
+        for name, stats in current.get(section, {}).items():
+            before = previous.get(section, {}).get(name)
+            if not before:
+                continue
+            deltas = []
+            for key in ("p50_ms", "p95_ms", "p99_ms"):
+                if before[key]:
+                    change = (stats[key] - before[key]) / before[key] * 100
+                    deltas.append(f"{key[:-3]} {before[key]:.1f}→{stats[key]:.1f}ms ({change:+.1f}%)")
+            lines.append(f"[{section}] {name}: " + ", ".join(deltas))
+    return lines
+
+
+def _print_table(result: dict):
+    for section in ("endpoints", "stages"):
+        print(f"\n== {section} ==")
+        print(f"{'name':48} {'count':>6} {'err':>4} {'p50':>9} {'p95':>9} {'p99':>9}")
+        for name, stats in result[section].items():
+            print(f"{name:48} {stats['count']:>6} {stats['errors']:>4} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tripot 백엔드 오프라인 부하 테스트")
+    parser.add_argument("--sessions", type=int, default=10, help="동시 어르신 WebSocket 세션 수")
+    parser.add_argument("--turns", type=int, default=5, help="세션당 음성 턴 수")
+    parser.add_argument("--think-ms", type=float, default=200, help="턴 사이 대기 시간(ms)")
+    parser.add_argument("--audio-bytes", type=int, default=48_000, help="음성 프레임 원본 크기(바이트)")
+    parser.add_argument("--ws-encoding", choices=("json", "msgpack"), default="json", help="어르신 WebSocket 프레임 형식 (msgpack: 바이너리 음성 프레임)")
+    parser.add_argument("--family-clients", type=int, default=5, help="동시 가족 앱 클라이언트 수")
+    parser.add_argument("--family-requests", type=int, default=20, help="가족 클라이언트당 요청 반복 횟수")
+    parser.add_argument("--photos", type=int, default=100, help="미리 만들어 둘 사진 수")
+    parser.add_argument("--stt-ms", type=float, default=400, help="가짜 STT 평균 지연(ms)")
+    parser.add_argument("--chat-ms", type=float, default=800, help="가짜 대화 모델 평균 지연(ms)")
+    parser.add_argument("--embed-ms", type=float, default=80, help="가짜 임베딩 평균 지연(ms)")
+    parser.add_argument("--vector-ms", type=float, default=60, help="가짜 벡터 DB 평균 지연(ms)")
+    parser.add_argument("--jitter", type=float, default=0.2, help="지연 시간 지터 비율")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON 경로")
+    args = parser.parse_args()
+
+    try:
+        result = asyncio.run(run_benchmark(args))
+    finally:
+        shutil.rmtree(_BENCH_DIR, ignore_errors=True)
+    _print_table(result)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\n결과 저장: {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        print("\n== 이전 결과 대비 ==")
+        for line in compare(result, previous):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# scripts/check_migrations.py
+# 마이그레이션 도입 전(create_all 로 만들던 시절) 스키마의 DB 를 처음부터 최신 리비전까지 올려 봅니다.
+# 운영 DB 는 이 경로로 올라가므로, 이전 리비전의 데이터 채우기(backfill)가 최신 모델의 컬럼을 읽어
+# "no such column" 으로 멈추는 회귀를 막습니다. (리비전을 추가/수정하면 실행하세요)
+#
+# 사용법 (backend 폴더에서):
+#   python scripts/check_migrations.py
+#       임시 sqlite DB 에 이전 스키마와 샘플 데이터를 만들고 upgrade 합니다. (네트워크 불필요)
+#   python scripts/check_migrations.py --database-url "mysql+pymysql://user:pw@localhost:3307/tripot_migrate_check"
+#       빈 MySQL DB 로 확인합니다. (테이블을 만들고 데이터를 넣으므로 운영 DB 에 쓰지 마세요)
+#
+# upgrade 가 실패하거나, 끝난 뒤 스키마가 models.py 와 다르거나, 데이터 채우기 결과가 비어 있으면 종료 코드 1 을 반환합니다.
+
+import argparse
+import base64
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _configure_env(database_url: str):
+    # app 설정에 필요한 값만 채웁니다. (이 스크립트는 OpenAI/Pinecone 을 사용하지 않음)
+    for key in ("OPENAI_API_KEY", "PINECONE_API_KEY", "MYSQL_DATABASE", "MYSQL_USER", "MYSQL_PASSWORD", "DB_HOST", "MYSQL_ROOT_PASSWORD"):
+        os.environ.setdefault(key, "unused")
+    os.environ["SQLALCHEMY_DATABASE_URL"] = database_url
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+def legacy_metadata():
+    """마이그레이션 도입 전 스키마 (고정 사본). models.py 가 바뀌어도 수정하지 않습니다."""
+    from sqlalchemy import JSON, Column, Date, DateTime, ForeignKey, Integer, MetaData, String, Table, Text, func
+
+    metadata = MetaData()
+    Table("users", metadata,
+          Column("id", Integer, primary_key=True, index=True),
+          Column("user_id_str", String(255), unique=True, index=True, nullable=False))
+    Table("family_photos", metadata,
+          Column("id", Integer, primary_key=True, index=True),
+          Column("user_id", Integer, ForeignKey("users.id")),
+          Column("filename", String(255), nullable=False),
+          Column("original_name", String(255)),
+          Column("file_path", String(512), nullable=False),
+          Column("file_size", Integer),
+          Column("uploaded_by", String(50)),
+          Column("created_at", DateTime(timezone=True), server_default=func.now()))
+    Table("photo_comments", metadata,
+          Column("id", Integer, primary_key=True, index=True),
+          Column("photo_id", Integer, ForeignKey("family_photos.id"), nullable=False),
+          Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+          Column("author_name", String(100), nullable=False),
+          Column("comment_text", Text, nullable=False),
+          Column("created_at", DateTime(timezone=True), server_default=func.now()))
+    Table("posts", metadata,
+          Column("id", Integer, primary_key=True, index=True),
+          Column("photo_id", Integer, ForeignKey("family_photos.id"), nullable=False),
+          Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+          Column("description", Text),
+          Column("mentions", Text),
+          Column("location", String(255)),
+          Column("audio_message", Text),
+          Column("created_at", DateTime(timezone=True), server_default=func.now()))
+    Table("summaries", metadata,
+          Column("id", Integer, primary_key=True, autoincrement=True),
+          Column("user_id", String(255), nullable=False),
+          Column("summary_json", JSON),
+          Column("report_date", Date),
+          Column("created_at", DateTime(timezone=True), server_default=func.now()))
+    Table("conversations", metadata,
+          Column("id", Integer, primary_key=True, index=True),
+          Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+          Column("speaker", String(10), nullable=False),
+          Column("message", Text, nullable=False),
+          Column("created_at", DateTime(timezone=True), server_default=func.now()))
+    return metadata
+
+
+def _seed(conn, metadata):
+    from datetime import date, datetime, timedelta
+
+    t = metadata.tables
+    audio = "data:audio/mp4;base64," + base64.b64encode(b"\0\0\0\x18ftypM4A " + b"\0" * 64).decode()
+    conn.execute(t["users"].insert(), [{"id": 1, "user_id_str": "senior_1"}])
+    conn.execute(t["family_photos"].insert(), [
+        {"id": 1, "user_id": 1, "filename": "a.jpg", "file_path": "uploads/family_photos/a.jpg", "uploaded_by": "딸"},
+    ])
+    conn.execute(t["photo_comments"].insert(), [
+        {"photo_id": 1, "user_id": 1, "author_name": "아들", "comment_text": "좋아요"},
+    ])
+    conn.execute(t["posts"].insert(), [
+        {"photo_id": 1, "user_id": 1, "description": "산책", "audio_message": audio},
+        {"photo_id": 1, "user_id": 1, "description": "점심", "audio_message": "음성 메시지가 도착했어요"},
+    ])
+    started = datetime.combine(date.today() - timedelta(days=1), datetime.min.time()) + timedelta(hours=9)
+    conn.execute(t["conversations"].insert(), [
+        {"user_id": 1, "speaker": "user", "message": "오늘 병원에 다녀왔어", "created_at": started},
+        {"user_id": 1, "speaker": "ai", "message": "병원에서는 뭐라고 하던가요?", "created_at": started + timedelta(seconds=5)},
+    ])
+    conn.execute(t["summaries"].insert(), [
+        {"user_id": "1", "report_date": started.date(), "summary_json": {"감정_신체_상태": {"전반적_감정": "긍정", "건강_언급": ["무릎 통증"]}}},
+    ])
+
+
+def _schema_diff(engine, metadata) -> list[str]:
+    """upgrade 후 models.py 에 있는데 DB 에 없는 테이블/컬럼"""
+    from sqlalchemy import inspect
+
+    inspector = inspect(engine)
+    problems = []
+    for table in metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            problems.append(f"테이블 없음: {table.name}")
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        problems += [f"컬럼 없음: {table.name}.{column.name}" for column in table.columns if column.name not in existing]
+    return problems
+
+
+def _backfill_checks(conn) -> list[str]:
+    """리비전의 데이터 채우기가 샘플 데이터를 옮겼는지"""
+    from sqlalchemy import text
+
+    checks = {
+        "report_facts (리비전 6)": "SELECT COUNT(*) FROM report_facts",
+        "activity_counters (리비전 7)": "SELECT COUNT(*) FROM activity_counters",
+        "posts.audio_path (리비전 9)": "SELECT COUNT(*) FROM posts WHERE audio_path IS NOT NULL AND audio_message = ''",
+        "search_documents (리비전 11)": "SELECT COUNT(*) FROM search_documents",
+    }
+    return [f"채워지지 않음: {name}" for name, sql in checks.items() if not conn.execute(text(sql)).scalar()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="이전 스키마에서 최신 리비전까지 마이그레이션 점검")
+    parser.add_argument("--database-url", help="빈 점검용 DB (생략 시 임시 sqlite DB 를 만들어 사용)")
+    args = parser.parse_args()
+
+    # 음성 파일 등 데이터 채우기가 만드는 파일은 임시 폴더에 씁니다.
+    temp_dir = tempfile.mkdtemp(prefix="tripot-migrate-")
+    _configure_env(args.database_url or f"sqlite:///{os.path.join(temp_dir, 'migrate.db')}")
+    cwd = os.getcwd()
+
+    from sqlalchemy import inspect
+    from app.db import migrations, models
+    from app.db.database import engine
+
+    try:
+        if inspect(engine).get_table_names():
+            print("❌ 빈 DB 가 아닙니다. 점검용 빈 DB 를 지정하세요.")
+            return 1
+        legacy = legacy_metadata()
+        legacy.create_all(engine)
+        with engine.begin() as conn:
+            _seed(conn, legacy)
+
+        os.chdir(temp_dir)
+        try:
+            version = migrations.upgrade(engine)
+        except Exception as e:
+            print(f"❌ upgrade 실패: {type(e).__name__}: {e}")
+            return 1
+        finally:
+            os.chdir(cwd)
+
+        problems = _schema_diff(engine, models.Base.metadata)
+        with engine.connect() as conn:
+            problems += _backfill_checks(conn)
+        for problem in problems:
+            print(f"❌ {problem}")
+        if problems:
+            return 1
+        print(f"✅ {engine.dialect.name}: 이전 스키마에서 리비전 {version} 까지 적용, 스키마와 데이터 채우기 확인 완료")
+        return 0
+    finally:
+        engine.dispose()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,273 @@
+# scripts/check_query_plans.py
+# 자주 실행되는 조회 쿼리들이 인덱스를 타는지 EXPLAIN 으로 확인합니다. (인덱스 회귀 방지용)
+#
+# 사용법 (backend 폴더에서):
+#   python scripts/check_query_plans.py
+#       임시 sqlite DB 에 마이그레이션을 적용하고 샘플 데이터를 만들어 확인합니다. (네트워크 불필요)
+#   python scripts/check_query_plans.py --database-url "mysql+pymysql://user:pw@localhost:3307/tripot"
+#       실제 MySQL 스키마/통계로 확인합니다. (데이터는 추가하지 않습니다)
+#
+# 풀 스캔 또는 정렬용 임시 테이블(filesort)이 필요한 쿼리가 있으면 종료 코드 1 을 반환합니다.
+
+import argparse
+import os
+import re
+import shutil
+import sys
+import tempfile
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _configure_env(database_url: str):
+    # app 설정에 필요한 값만 채웁니다. (이 스크립트는 OpenAI/Pinecone 을 사용하지 않음)
+    for key in ("OPENAI_API_KEY", "PINECONE_API_KEY", "MYSQL_DATABASE", "MYSQL_USER", "MYSQL_PASSWORD", "DB_HOST", "MYSQL_ROOT_PASSWORD"):
+        os.environ.setdefault(key, "unused")
+    os.environ["SQLALCHEMY_DATABASE_URL"] = database_url
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+def hot_queries(db, models):
+    """(이름, 쿼리, 인덱스를 타야 하는 테이블) 목록. 각 쿼리는 서비스 코드의 실제 조회와 같은 형태입니다."""
+    from sqlalchemy import func
+
+    today = date.today()
+    day_start = datetime.combine(today, datetime.min.time())
+    day_end = day_start + timedelta(days=1)
+    return [
+        # photo_service.get_photos_by_user
+        (
+            "photos_by_user",
+            db.query(models.FamilyPhoto)
+              .filter(models.FamilyPhoto.user_id == 1)
+              .order_by(models.FamilyPhoto.created_at.desc()),
+            ("family_photos",),
+        ),
+        # comment_service.get_comments_by_photo_id
+        (
+            "comments_by_photo",
+            db.query(models.PhotoComment)
+              .filter(models.PhotoComment.photo_id == 1)
+              .order_by(models.PhotoComment.created_at.asc()),
+            ("photo_comments",),
+        ),
+        # family.get_photo_meta / get_photo_detail (family_photos LEFT JOIN posts)
+        (
+            "photo_with_post",
+            db.query(models.FamilyPhoto, models.Post)
+              .outerjoin(models.Post, models.FamilyPhoto.id == models.Post.photo_id)
+              .filter(models.FamilyPhoto.id == 1),
+            ("family_photos", "posts"),
+        ),
+        # report_service.get_latest_summary
+        (
+            "latest_summary",
+            db.query(models.Summary)
+              .join(models.User, models.Summary.user_id == models.User.id)
+              .filter(models.User.user_id_str == "user_1")
+              .order_by(models.Summary.created_at.desc())
+              .limit(1),
+            ("summaries", "users"),
+        ),
+        # report_utils.save_summary_to_db
+        (
+            "summary_by_date",
+            db.query(models.Summary)
+              .filter(models.Summary.user_id == 1, models.Summary.report_date == today),
+            ("summaries",),
+        ),
+        # report_utils.fetch_daily_conversations
+        (
+            "daily_conversations",
+            db.query(models.Conversation)
+              .filter(
+                  models.Conversation.user_id == 1,
+                  models.Conversation.created_at >= day_start,
+                  models.Conversation.created_at < day_end,
+              )
+              .order_by(models.Conversation.created_at),
+            ("conversations",),
+        ),
+        # report_utils.get_all_user_ids_for_today
+        (
+            "users_talked_today",
+            db.query(models.User.user_id_str)
+              .join(models.Conversation)
+              .filter(models.Conversation.created_at >= day_start, models.Conversation.created_at < day_end)
+              .distinct(),
+            ("conversations",),
+        ),
+        # memory_search.LexicalIndexCache._build
+        (
+            "user_memories",
+            db.query(models.Memory.id, models.Memory.text, models.Memory.timestamp)
+              .filter(models.Memory.user_id == "user_1"),
+            ("memories",),
+        ),
+        # activity_counters.get_counters (홈 화면 통계/랭킹)
+        (
+            "home_activity_counters",
+            db.query(models.ActivityCounter.actor, models.ActivityCounter.metric, models.ActivityCounter.value)
+              .filter(models.ActivityCounter.user_id == 1),
+            ("activity_counters",),
+        ),
+        # report_facts.get_trends (granularity=day)
+        (
+            "report_trend_days",
+            db.query(models.ReportFact)
+              .filter(models.ReportFact.user_id == 1,
+                      models.ReportFact.report_date >= today - timedelta(days=90),
+                      models.ReportFact.report_date <= today)
+              .order_by(models.ReportFact.report_date),
+            ("report_facts",),
+        ),
+        # report_facts.get_trends (granularity=week|month)
+        (
+            "report_trend_rollups",
+            db.query(models.ReportRollup)
+              .filter(models.ReportRollup.user_id == 1,
+                      models.ReportRollup.period == "week",
+                      models.ReportRollup.period_start >= today - timedelta(days=90),
+                      models.ReportRollup.period_start <= today)
+              .order_by(models.ReportRollup.period_start),
+            ("report_rollups",),
+        ),
+        # family_search._candidate_ids (sqlite 역색인, MySQL 은 FULLTEXT)
+        (
+            "family_search_postings",
+            db.query(models.SearchPosting.document_id)
+              .filter(models.SearchPosting.user_id == 1, models.SearchPosting.token.in_(["병원", "산책"]))
+              .group_by(models.SearchPosting.document_id)
+              .having(func.count() == 2)
+              .order_by(models.SearchPosting.document_id.desc())
+              .limit(60),
+            ("search_postings",),
+        ),
+        # family_search._candidate_ids 의 한 글자 검색어 ("약" 으로 시작하는 토큰)
+        (
+            "family_search_prefix",
+            db.query(models.SearchPosting.document_id)
+              .filter(models.SearchPosting.user_id == 1, models.SearchPosting.token >= "약", models.SearchPosting.token < chr(ord("약") + 1))
+              .group_by(models.SearchPosting.document_id)
+              .order_by(models.SearchPosting.document_id.desc())
+              .limit(60),
+            ("search_postings",),
+        ),
+    ]
+
+
+def _compile(query, dialect) -> str:
+    return str(query.statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+
+
+def _explain_sqlite(conn, sql: str, tables: tuple) -> tuple[list[str], list[str]]:
+    from sqlalchemy import text
+
+    rows = conn.execute(text("EXPLAIN QUERY PLAN " + sql)).fetchall()
+    plan = [row[-1] for row in rows]
+    problems = []
+    for detail in plan:
+        scan = re.match(r"SCAN (?:TABLE )?(\w+)", detail)
+        if scan and scan.group(1) in tables and "INDEX" not in detail:
+            problems.append(f"{scan.group(1)} 풀 스캔")
+        if "TEMP B-TREE FOR ORDER BY" in detail:
+            problems.append("정렬용 임시 B-TREE")
+    return plan, problems
+
+
+def _explain_mysql(conn, sql: str, tables: tuple) -> tuple[list[str], list[str]]:
+    from sqlalchemy import text
+
+    rows = conn.execute(text("EXPLAIN " + sql)).mappings().all()
+    plan = [f"{row['table']}: type={row['type']} key={row['key']} extra={row['Extra']}" for row in rows]
+    problems = []
+    for row in rows:
+        if row["table"] in tables and row["type"] == "ALL":
+            problems.append(f"{row['table']} 풀 스캔")
+        if row["Extra"] and "Using filesort" in row["Extra"]:
+            problems.append(f"{row['table']} filesort")
+    return plan, problems
+
+
+def _seed(db, models, users: int = 20, per_user: int = 30):
+    """옵티마이저가 인덱스를 고를 수 있을 만큼의 샘플 데이터를 만듭니다."""
+    now = datetime.now()
+    for u in range(1, users + 1):
+        user = models.User(user_id_str=f"user_{u}")
+        db.add(user)
+        db.flush()
+        for i in range(per_user):
+            created_at = now - timedelta(hours=i * 7)
+            photo = models.FamilyPhoto(
+                user_id=user.id, filename=f"{u}_{i}.jpg", file_path=f"uploads/{u}_{i}.jpg", created_at=created_at
+            )
+            db.add(photo)
+            db.flush()
+            db.add(models.Post(photo_id=photo.id, user_id=user.id, description="샘플", created_at=created_at))
+            db.add(models.PhotoComment(
+                photo_id=photo.id, user_id=user.id, author_name="가족", comment_text="좋아요", created_at=created_at
+            ))
+            db.add(models.Conversation(user_id=user.id, speaker="user", message="안녕", created_at=created_at))
+            db.add(models.Summary(user_id=user.id, report_date=(now - timedelta(days=i)).date(), summary_json={}, created_at=created_at))
+            db.add(models.ActivityCounter(user_id=user.id, actor=f"가족{i}", metric="comment", value=i))
+            db.add(models.ReportFact(user_id=user.id, report_date=(now - timedelta(days=i)).date(), mood="neutral", mood_score=0))
+            db.add(models.ReportRollup(user_id=user.id, period="week", period_start=(now - timedelta(days=i * 7)).date()))
+            doc = models.SearchDocument(user_id=user.id, doc_type="conversation", source_id=u * 1000 + i, body="병원 산책", created_at=created_at)
+            db.add(doc)
+            db.flush()
+            for token in ("병원", "산책"):
+                db.add(models.SearchPosting(user_id=user.id, token=token, document_id=doc.id))
+            db.add(models.Memory(
+                id=f"{u}-{i}", user_id=user.user_id_str, memory_type="summary", text="샘플 기억", timestamp=int(created_at.timestamp())
+            ))
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="핫 쿼리 실행 계획(EXPLAIN) 점검")
+    parser.add_argument("--database-url", help="점검할 DB (생략 시 임시 sqlite DB 를 만들어 사용)")
+    args = parser.parse_args()
+
+    temp_dir = None
+    if args.database_url:
+        _configure_env(args.database_url)
+    else:
+        temp_dir = tempfile.mkdtemp(prefix="tripot-plan-")
+        _configure_env(f"sqlite:///{os.path.join(temp_dir, 'plan.db')}")
+
+    from sqlalchemy import text
+    from app.db import migrations, models
+    from app.db.database import SessionLocal, engine
+
+    try:
+        if temp_dir:
+            migrations.upgrade(engine)
+            with SessionLocal() as db:
+                _seed(db, models)
+            with engine.begin() as conn:
+                conn.execute(text("ANALYZE"))
+
+        explain = _explain_sqlite if engine.dialect.name == "sqlite" else _explain_mysql
+        failures = 0
+        with SessionLocal() as db, engine.connect() as conn:
+            for name, query, tables in hot_queries(db, models):
+                plan, problems = explain(conn, _compile(query, engine.dialect), tables)
+                if problems:
+                    failures += 1
+                    print(f"❌ {name}: {', '.join(problems)}")
+                else:
+                    print(f"✅ {name}")
+                for line in plan:
+                    print(f"     {line}")
+
+        print(f"\n{engine.dialect.name}: {failures}개 쿼리가 인덱스를 타지 않습니다." if failures else f"\n{engine.dialect.name}: 모든 핫 쿼리가 인덱스를 사용합니다.")
+        return 1 if failures else 0
+    finally:
+        engine.dispose()
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,119 @@
+# scripts/check_search.py
+# 가족 검색(family_search)과 기억 키워드 검색(memory_search)이 샘플 대화에서 기대한 결과를 찾는지 확인합니다.
+# 토큰화/후보 조회를 바꾸면 실행하세요. (한 글자 검색어 "약" 으로 "약을" 을 찾는지 등)
+#
+# 사용법 (backend 폴더에서):
+#   python scripts/check_search.py
+#       임시 sqlite DB 에 마이그레이션을 적용하고 샘플 대화를 색인해 확인합니다. (네트워크 불필요)
+#   python scripts/check_search.py --database-url "mysql+pymysql://user:pw@localhost:3307/tripot_search_check"
+#       빈 MySQL DB 로 FULLTEXT 검색을 확인합니다. (테이블을 만들고 데이터를 넣으므로 운영 DB 에 쓰지 마세요)
+#
+# 기대와 다른 결과가 있으면 종료 코드 1 을 반환합니다.
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# (어르신 발화, AI 응답)
+TURNS = [
+    ("오늘 아침에 약을 먹었어", "잘하셨어요. 식사는 하셨어요?"),
+    ("약 먹는 걸 깜빡했네", "지금 챙겨 드세요."),
+    ("눈이 많이 왔어", "미끄러우니 조심하세요."),
+    ("병원에서 검사를 받았어", "결과는 언제 나온대요?"),
+    ("밥은 먹었고 잠이 안 와", "따뜻한 우유를 드셔 보세요."),
+]
+
+# (검색어, 찾아야 하는 TURNS 번호)
+SEARCH_CASES = [
+    ("약", {0, 1}),
+    ("눈", {2}),
+    ("병원", {3}),
+    ("약 아침", {0}),
+    ("밥 잠", {4}),
+    ("산책", set()),
+]
+
+# (검색어, 찾아야 하는 기억(TURNS 의 어르신 발화) 번호)
+MEMORY_CASES = [
+    ("약", {0, 1}),
+    ("눈", {2}),
+    ("병원", {3}),
+]
+
+
+def _configure_env(database_url: str):
+    # app 설정에 필요한 값만 채웁니다. (이 스크립트는 OpenAI/Pinecone 을 사용하지 않음)
+    for key in ("OPENAI_API_KEY", "PINECONE_API_KEY", "MYSQL_DATABASE", "MYSQL_USER", "MYSQL_PASSWORD", "DB_HOST", "MYSQL_ROOT_PASSWORD"):
+        os.environ.setdefault(key, "unused")
+    os.environ["SQLALCHEMY_DATABASE_URL"] = database_url
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+def _check_family_search(db, models, family_search) -> list[str]:
+    user = models.User(user_id_str="search_check")
+    db.add(user)
+    db.flush()
+    source_ids = []
+    for user_message, ai_message in TURNS:
+        conversation = models.Conversation(user_id=user.id, speaker="user", message=user_message)
+        db.add(conversation)
+        db.flush()
+        family_search.index_turn(db, user.id, conversation.id, user_message, ai_message)
+        source_ids.append(conversation.id)
+    db.commit()
+
+    problems = []
+    for query, expected in SEARCH_CASES:
+        found = {source_ids.index(result["source_id"]) for result in family_search.search(db, user.id, query)["results"]}
+        if found != expected:
+            problems.append(f"가족 검색 '{query}': 기대 {sorted(expected)}, 결과 {sorted(found)}")
+    return problems
+
+
+def _check_memory_search(memory_search) -> list[str]:
+    index = memory_search.UserLexicalIndex()
+    for i, (user_message, _) in enumerate(TURNS):
+        index.add(str(i), user_message, i)
+
+    problems = []
+    for query, expected in MEMORY_CASES:
+        found = {int(hit.id) for hit in index.search(query, len(TURNS))}
+        if found != expected:
+            problems.append(f"기억 검색 '{query}': 기대 {sorted(expected)}, 결과 {sorted(found)}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="가족 검색/기억 키워드 검색 결과 점검")
+    parser.add_argument("--database-url", help="빈 점검용 DB (생략 시 임시 sqlite DB 를 만들어 사용)")
+    args = parser.parse_args()
+
+    temp_dir = tempfile.mkdtemp(prefix="tripot-search-")
+    _configure_env(args.database_url or f"sqlite:///{os.path.join(temp_dir, 'search.db')}")
+
+    from app.db import migrations, models
+    from app.db.database import SessionLocal, engine
+    from app.services import family_search, memory_search
+
+    try:
+        migrations.upgrade(engine)
+        with SessionLocal() as db:
+            problems = _check_family_search(db, models, family_search)
+        problems += _check_memory_search(memory_search)
+        for problem in problems:
+            print(f"❌ {problem}")
+        if problems:
+            return 1
+        print(f"✅ {engine.dialect.name}: 검색어 {len(SEARCH_CASES) + len(MEMORY_CASES)}개 모두 기대한 결과를 찾았습니다.")
+        return 0
+    finally:
+        engine.dispose()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())